@@ -0,0 +1,49 @@
+"""Administrative endpoints for stored request profiles."""
+
+from __future__ import annotations
+
+import os
+from typing import Annotated, Any
+
+from fastapi import APIRouter, Depends, Header, HTTPException
+from fastapi.responses import FileResponse
+
+from backend.utils.profiling import list_profiles, load_profile, raw_profile_path
+
+
+def require_admin(x_admin_token: Annotated[str | None, Header()] = None) -> None:
+    """Require ``X-Admin-Token`` to match ``TDIE_ADMIN_TOKEN`` when that variable is set."""
+
+    expected = os.environ.get("TDIE_ADMIN_TOKEN")
+    if expected and x_admin_token != expected:
+        raise HTTPException(status_code=403, detail="Admin token required")
+
+
+router = APIRouter(prefix="/admin", dependencies=[Depends(require_admin)])
+
+
+@router.get("/profiles")
+def profiles() -> list[dict[str, Any]]:
+    """List stored request profiles, newest first."""
+
+    return list_profiles()
+
+
+@router.get("/profiles/{request_id}")
+def profile(request_id: str) -> dict[str, Any]:
+    """Return a profile summary: stage timings, hottest functions and allocation sites."""
+
+    summary = load_profile(request_id)
+    if summary is None:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    return summary
+
+
+@router.get("/profiles/{request_id}/raw")
+def raw_profile(request_id: str) -> FileResponse:
+    """Download the raw ``pstats`` dump for tools such as ``snakeviz``."""
+
+    path = raw_profile_path(request_id)
+    if path is None:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    return FileResponse(path, media_type="application/octet-stream", filename=path.name)
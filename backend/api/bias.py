@@ -7,18 +7,26 @@ from typing import Any
 from fastapi import APIRouter, HTTPException
 
 from backend.engines.bias_engine import run_bias_checks
-from backend.utils.data_loader import load_dataset
+from backend.engines.sampling import approximate_bias
+from backend.utils.data_loader import JsonPayload, load_dataset, sample_spec
+from backend.utils.profiling import profiled
+from backend.utils.scheduler import default_scheduler, scan_rows
 
 router = APIRouter()
 
 
 @router.post("/bias_check")
-def bias_check(payload: dict[str, Any]) -> dict[str, Any]:
+@profiled
+def bias_check(payload: JsonPayload) -> dict[str, Any]:
     """Run fairness integrity checks on the dataset."""
 
     try:
-        _, records = load_dataset(payload)
+        _, records = load_dataset(payload, columns=("group", "label"))
+        spec = sample_spec(payload)
     except Exception as exc:  # broad for validation errors
         raise HTTPException(status_code=400, detail=str(exc)) from exc
 
-    return run_bias_checks(records)
+    with default_scheduler.admit("bias_check", scan_rows(records, spec), 2, ["bias_checks"]) as job:
+        if spec is not None:
+            return approximate_bias(records, spec)
+        return job.run(run_bias_checks, records)
@@ -0,0 +1,40 @@
+"""Known-bad fingerprint blocklist endpoints."""
+
+from __future__ import annotations
+
+from typing import Any
+
+from fastapi import APIRouter, HTTPException
+
+from backend.utils.blocklist import BLOCKLIST_BLOCK_ROWS, add_to_blocklist, blocklist_stats
+from backend.utils.data_loader import JsonPayload, load_dataset
+from backend.utils.hash_utils import hash_dataset_blocks
+
+router = APIRouter()
+
+
+@router.post("/blocklist")
+def block(payload: JsonPayload) -> dict[str, Any]:
+    """Blocklist digests, or a dataset payload together with every one of its blocks."""
+
+    dataset_hashes = list(payload.get("dataset_hashes", []))
+    block_hashes = list(payload.get("block_hashes", []))
+    try:
+        if payload.get("records") is not None or payload.get("dataset") is not None:
+            _, records = load_dataset(payload, screen=False)
+            dataset_hash, blocks = hash_dataset_blocks(records, BLOCKLIST_BLOCK_ROWS)
+            dataset_hashes.append(dataset_hash)
+            block_hashes.extend(blocks)
+        if not dataset_hashes and not block_hashes:
+            raise ValueError("Supply digests or a dataset to blocklist")
+        added = add_to_blocklist(dataset_hashes, block_hashes, str(payload.get("reason", "")))
+    except Exception as exc:  # broad for validation errors
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
+    return {"added": added, "dataset_hashes": dataset_hashes, "block_hashes": block_hashes}
+
+
+@router.get("/blocklist")
+def blocklist() -> dict[str, Any]:
+    """Blocklist sizes and Bloom filter parameters."""
+
+    return blocklist_stats()
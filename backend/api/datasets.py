@@ -0,0 +1,33 @@
+"""Dataset reference registry endpoints."""
+
+from __future__ import annotations
+
+from typing import Any
+
+from fastapi import APIRouter, HTTPException
+
+from backend.utils.dataset_refs import list_datasets, register_dataset
+
+router = APIRouter()
+
+
+@router.post("/datasets")
+def register(payload: dict[str, Any]) -> dict[str, Any]:
+    """Register a dataset id for a file or column directory under the dataset root."""
+
+    dataset_id = payload.get("id")
+    path = payload.get("path")
+    if not dataset_id or not path:
+        raise HTTPException(status_code=400, detail="Both 'id' and 'path' are required")
+    try:
+        entry = register_dataset(str(dataset_id), str(path), payload.get("format"))
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
+    return {"id": dataset_id, **entry}
+
+
+@router.get("/datasets")
+def datasets() -> dict[str, dict[str, Any]]:
+    """List registered dataset ids."""
+
+    return list_datasets()
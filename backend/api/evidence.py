@@ -0,0 +1,26 @@
+"""Evidence bundle retrieval endpoint."""
+
+from __future__ import annotations
+
+import gzip
+
+from fastapi import APIRouter, HTTPException, Request, Response
+
+from backend.utils.evidence import evidence_store
+
+router = APIRouter()
+
+
+@router.get("/evidence/{digest}")
+def get_evidence(digest: str, request: Request) -> Response:
+    """Return a stored evidence bundle, gzip-encoded when the client accepts it."""
+
+    bundle = evidence_store().read(digest)
+    if bundle is None:
+        raise HTTPException(status_code=404, detail="Evidence bundle not found")
+    headers = {"ETag": f'"{digest}"', "Cache-Control": "public, max-age=31536000, immutable"}
+    if "gzip" in request.headers.get("accept-encoding", ""):
+        headers["Content-Encoding"] = "gzip"
+    else:
+        bundle = gzip.decompress(bundle)
+    return Response(content=bundle, media_type="text/plain; charset=utf-8", headers=headers)
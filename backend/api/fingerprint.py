@@ -7,19 +7,21 @@ from typing import Any
 from fastapi import APIRouter, HTTPException
 
 from backend.engines.fingerprint_engine import detect_tampering, fingerprint_dataset
-from backend.utils.data_loader import load_dataset
+from backend.utils.data_loader import JsonPayload, load_dataset
 from backend.utils.logger import get_logger
+from backend.utils.profiling import profiled
 
 router = APIRouter()
 logger = get_logger(__name__)
 
 
 @router.post("/fingerprint")
-def fingerprint(payload: dict[str, Any]) -> dict[str, Any]:
+@profiled
+def fingerprint(payload: JsonPayload) -> dict[str, Any]:
     """Return dataset and per-feature hashes with tamper detection."""
 
     try:
-        schema, records = load_dataset(payload)
+        schema, records = load_dataset(payload, screen=False)
     except Exception as exc:  # broad for validation errors
         raise HTTPException(status_code=400, detail=str(exc)) from exc
 
@@ -0,0 +1,57 @@
+"""Integrity metrics history endpoints for trend charts."""
+
+from __future__ import annotations
+
+from datetime import datetime
+from typing import Any
+
+from fastapi import APIRouter, HTTPException
+
+from backend.utils.history import downsample_history, list_histories, query_history
+
+router = APIRouter()
+
+
+def _metrics(metrics: str | None) -> list[str] | None:
+    return None if metrics is None else [name for name in metrics.split(",") if name]
+
+
+@router.get("/history")
+def histories() -> list[str]:
+    """Schemas with recorded integrity history."""
+
+    return list_histories()
+
+
+@router.get("/history/{schema_name}")
+def history(
+    schema_name: str,
+    start: datetime | None = None,
+    end: datetime | None = None,
+    metrics: str | None = None,
+    limit: int | None = None,
+) -> dict[str, Any]:
+    """Recorded runs between ``start`` and ``end`` as column lists (``limit`` keeps the latest)."""
+
+    if limit is not None and limit < 1:
+        raise HTTPException(status_code=400, detail="limit must be at least 1")
+    try:
+        return query_history(schema_name, start, end, _metrics(metrics), limit)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
+
+
+@router.get("/history/{schema_name}/downsample")
+def downsample(
+    schema_name: str,
+    bucket_seconds: float = 3600,
+    start: datetime | None = None,
+    end: datetime | None = None,
+    metrics: str | None = None,
+) -> dict[str, Any]:
+    """Runs aggregated into fixed-width time buckets: mean/min/max per metric, decision counts."""
+
+    try:
+        return downsample_history(schema_name, bucket_seconds, start, end, _metrics(metrics))
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
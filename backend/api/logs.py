@@ -0,0 +1,80 @@
+"""Log query and live tail endpoints."""
+
+from __future__ import annotations
+
+from collections.abc import AsyncIterator
+from datetime import datetime
+
+from fastapi import APIRouter, HTTPException, Request
+from fastapi.responses import StreamingResponse
+
+from backend.utils.log_query import LogQuery, follow_logs, query_logs
+from backend.utils.logger import get_logger
+
+router = APIRouter()
+logger = get_logger(__name__)
+
+
+def _build_query(
+    level: str | None,
+    logger_name: str | None,
+    since: datetime | None,
+    until: datetime | None,
+    request_id: str | None,
+) -> LogQuery:
+    try:
+        return LogQuery(level, logger_name, since, until, request_id)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
+
+
+@router.get("/logs")
+def get_logs(
+    lines: int = 200,
+    level: str | None = None,
+    logger_name: str | None = None,
+    since: datetime | None = None,
+    until: datetime | None = None,
+    request_id: str | None = None,
+) -> list[str]:
+    """Return the most recent matching log entries, oldest first.
+
+    Entries are read backwards from the end of ``tdie.log`` and its rotated backups, so
+    cost follows the number of entries returned rather than the size of the files.
+    """
+
+    safe_line_limit = max(1, min(lines, 1000))
+    query = _build_query(level, logger_name, since, until, request_id)
+    try:
+        return query_logs(query, safe_line_limit)
+    except OSError as exc:
+        logger.error("Unable to read log file: %s", exc)
+        raise HTTPException(status_code=500, detail="Unable to read logs") from exc
+
+
+@router.get("/logs/stream")
+async def stream_logs(
+    request: Request,
+    level: str | None = None,
+    logger_name: str | None = None,
+    request_id: str | None = None,
+    limit: int | None = None,
+) -> StreamingResponse:
+    """Stream newly written matching log lines as server-sent events.
+
+    ``limit`` closes the stream after that many events, which suits scripted consumers.
+    """
+
+    query = _build_query(level, logger_name, None, None, request_id)
+
+    async def events() -> AsyncIterator[str]:
+        sent = 0
+        async for line in follow_logs(query):
+            if await request.is_disconnected():
+                break
+            yield f"data: {line.rstrip()}\n\n"
+            sent += 1
+            if limit is not None and sent >= limit:
+                break
+
+    return StreamingResponse(events(), media_type="text/event-stream")
@@ -0,0 +1,17 @@
+"""Prometheus metrics endpoint."""
+
+from __future__ import annotations
+
+from fastapi import APIRouter
+from fastapi.responses import Response
+
+from backend.utils.metrics import CONTENT_TYPE, render_metrics
+
+router = APIRouter()
+
+
+@router.get("/metrics")
+def metrics() -> Response:
+    """Expose stage timings, throughput, HTTP sizes and cache hit counts."""
+
+    return Response(content=render_metrics(), media_type=CONTENT_TYPE)
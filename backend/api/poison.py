@@ -4,21 +4,43 @@ from __future__ import annotations
 
 from typing import Any
 
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Request, Response
 
 from backend.engines.poison_detector import compute_poisoning_risk
-from backend.utils.data_loader import load_dataset
+from backend.engines.sampling import approximate_poisoning
+from backend.utils.data_loader import (
+    JsonPayload,
+    class_conditional,
+    load_dataset,
+    sample_spec,
+)
+from backend.utils.encoding import negotiated
+from backend.utils.profiling import profiled
+from backend.utils.scheduler import default_scheduler, scan_rows
 
 router = APIRouter()
 
 
-@router.post("/poison_detect")
-def poison_detect(payload: dict[str, Any]) -> dict[str, Any]:
-    """Simulate poisoning detection heuristics for the provided dataset."""
+@router.post("/poison_detect", response_model=None)
+@profiled
+def poison_detect(payload: JsonPayload, request: Request) -> dict[str, Any] | Response:
+    """Simulate poisoning detection heuristics for the provided dataset.
+
+    The report is JSON unless the ``Accept`` header asks for a compact encoding.
+    """
 
     try:
-        _, records = load_dataset(payload)
+        schema, records = load_dataset(payload)
+        spec = sample_spec(payload)
+        per_class = class_conditional(payload)
     except Exception as exc:  # broad for validation errors
         raise HTTPException(status_code=400, detail=str(exc)) from exc
 
-    return compute_poisoning_risk(records)
+    with default_scheduler.admit(
+        "poison_detect", scan_rows(records, spec), len(schema.fields), ["poisoning_risk"]
+    ) as job:
+        if spec is not None:
+            report = approximate_poisoning(records, spec)
+        else:
+            report = job.run(compute_poisoning_risk, records, None, None, per_class)
+    return negotiated(request, report)
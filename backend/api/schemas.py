@@ -0,0 +1,63 @@
+"""Schema registry endpoints."""
+
+from __future__ import annotations
+
+from typing import Any
+
+from fastapi import APIRouter, HTTPException
+from pydantic import ValidationError
+
+from backend.engines.schema_validator import DatasetSchema
+from backend.utils.schema_registry import (
+    SchemaConflict,
+    compare_schemas,
+    get_schema_entry,
+    list_schemas,
+    register_schema,
+)
+
+router = APIRouter()
+
+
+@router.post("/schemas")
+def register(payload: dict[str, Any]) -> dict[str, Any]:
+    """Register a contract under its (name, version) and report compatibility."""
+
+    try:
+        schema = DatasetSchema.parse_obj(payload.get("schema"))
+    except ValidationError as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
+    try:
+        entry = register_schema(schema, bool(payload.get("require_compatible", False)))
+    except SchemaConflict as exc:
+        raise HTTPException(status_code=409, detail=str(exc)) from exc
+    return {"name": schema.name, "version": schema.version, **entry}
+
+
+@router.get("/schemas")
+def schemas() -> dict[str, list[str]]:
+    """List registered contract versions by name."""
+
+    return list_schemas()
+
+
+@router.get("/schemas/{name}/{version}")
+def schema(name: str, version: str) -> dict[str, Any]:
+    """Return a registered contract with its digest and compatibility report."""
+
+    try:
+        return {"name": name, "version": version, **get_schema_entry(name, version)}
+    except KeyError as exc:
+        raise HTTPException(status_code=404, detail=exc.args[0]) from exc
+
+
+@router.get("/schemas/{name}/{version}/compatibility")
+def compatibility(name: str, version: str, against: str) -> dict[str, Any]:
+    """Compare a registered version with another version of the same contract."""
+
+    try:
+        old = DatasetSchema.parse_obj(get_schema_entry(name, against)["schema"])
+        new = DatasetSchema.parse_obj(get_schema_entry(name, version)["schema"])
+    except KeyError as exc:
+        raise HTTPException(status_code=404, detail=exc.args[0]) from exc
+    return {"name": name, "version": version, "against": against, **compare_schemas(old, new)}
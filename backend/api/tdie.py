@@ -4,66 +4,56 @@ from __future__ import annotations
 
 from typing import Any
 
-from fastapi import APIRouter, HTTPException
-
-from backend.engines.bias_engine import run_bias_checks
-from backend.engines.poison_detector import compute_poisoning_risk
-from backend.engines.provenance import provenance_completeness, record_provenance
-from backend.engines.quality_checker import generate_quality_report
-from backend.engines.schema_validator import SchemaValidator
-from backend.engines.tdie_scorer import compute_tdie_score
-from backend.utils.data_loader import load_dataset
+from fastapi import APIRouter, HTTPException, Request, Response
+
+from backend.engines.incremental import IncrementalStateError
+from backend.engines.pipeline import run_tdie_pipeline
+from backend.engines.registry import BUILTIN_ENGINES
+from backend.engines.sampling import approximate_tdie
+from backend.utils.blocklist import KnownBadDataset
+from backend.utils.data_loader import JsonPayload, load_dataset, sample_spec
+from backend.utils.encoding import negotiated
+from backend.utils.profiling import profiled
+from backend.utils.scheduler import default_scheduler, scan_rows
 
 router = APIRouter()
 
 
-@router.post("/tdie_score")
-def tdie_score(payload: dict[str, Any]) -> dict[str, Any]:
-    """Run the full TDIE stack and return a consolidated integrity report."""
+@router.post("/tdie_score", response_model=None)
+@profiled
+def tdie_score(payload: JsonPayload, request: Request) -> dict[str, Any] | Response:
+    """Run the full TDIE stack and return a consolidated integrity report.
+
+    The report is JSON unless the ``Accept`` header asks for a compact encoding.
+    """
 
     try:
         schema, records = load_dataset(payload)
+        spec = sample_spec(payload)
     except Exception as exc:
         raise HTTPException(status_code=400, detail=str(exc)) from exc
 
     if not records:
         raise HTTPException(status_code=400, detail="No records supplied for scoring")
 
-    validator = SchemaValidator(schema)
-    schema_violations = validator.validate(records)
-    quality_report = generate_quality_report(records, records)
-    bias_report = run_bias_checks(records)
-    poison_report = compute_poisoning_risk(records)
-    provenance_entry = record_provenance(
-        source=payload.get("source", "synthetic"),
-        user=payload.get("user", "system"),
-        transformation_steps=payload.get("transformation_steps", []),
-        metadata={"schema_version": schema.version, "schema_name": schema.name},
-    )
-    provenance_score = provenance_completeness(
-        {
-            "schema_version": schema.version,
-            "schema_name": schema.name,
-            "source": payload.get("source"),
-            "user": payload.get("user"),
-            "transformation_steps": payload.get("transformation_steps", []),
-        }
-    )
-
-    combined = compute_tdie_score(
-        quality_score=quality_report.score,
-        poisoning_risk=poison_report["poisoning_risk_score"],
-        bias_score=bias_report["bias_integrity_score"],
-        schema_violations=schema_violations,
-        provenance_completeness=provenance_score,
-    )
-
-    return {
-        **quality_report.to_dict(),
-        "schema_violations": [v.dict() for v in schema_violations],
-        **poison_report,
-        **bias_report,
-        "provenance": provenance_entry,
-        "provenance_completeness": provenance_score,
-        **combined,
-    }
+    if payload.get("short_circuit") and payload.get("incremental_id") is not None:
+        raise HTTPException(
+            status_code=400, detail="Use either 'short_circuit' or 'incremental_id'"
+        )
+
+    if spec is not None and payload.get("incremental_id") is not None:
+        raise HTTPException(status_code=400, detail="Use either 'sample' or 'incremental_id'")
+
+    rows = scan_rows(records, spec, escalates=True)
+    with default_scheduler.admit("tdie_score", rows, len(schema.fields), BUILTIN_ENGINES) as job:
+        if spec is not None:
+            try:
+                report = approximate_tdie(schema, records, payload, spec)
+            except KnownBadDataset as exc:  # found by the full screen of an escalated run
+                raise HTTPException(status_code=400, detail=str(exc)) from exc
+        else:
+            try:
+                report = run_tdie_pipeline(schema, records, payload, job.run)
+            except IncrementalStateError as exc:
+                raise HTTPException(status_code=400, detail=str(exc)) from exc
+    return negotiated(request, report)
@@ -8,10 +8,15 @@ from typing import Any
 
 from fastapi import APIRouter, HTTPException
 
+from backend.engines.incremental import IncrementalStateError, append_rows
 from backend.engines.quality_checker import generate_quality_report
-from backend.engines.schema_validator import SchemaValidator
-from backend.utils.data_loader import load_dataset
+from backend.engines.sampling import approximate_validation
+from backend.engines.schema_validator import DatasetSchema
+from backend.utils.data_loader import JsonPayload, load_dataset, sample_spec
 from backend.utils.logger import get_logger
+from backend.utils.profiling import profiled
+from backend.utils.scheduler import default_scheduler, scan_rows
+from backend.utils.schema_registry import validator_for
 
 router = APIRouter()
 logger = get_logger(__name__)
@@ -31,21 +36,49 @@ def _load_baseline() -> list[dict[str, Any]]:
         return []
 
 
+def validate_records(
+    schema: DatasetSchema, records: Any, baseline: list[dict[str, Any]]
+) -> dict[str, Any]:
+    """Full-scan schema and quality checks; module-level so it can run in a worker process."""
+
+    violations = validator_for(schema).validate(records)
+    quality_report = generate_quality_report(records, baseline)
+    return {
+        "schema_violations": [v.dict() for v in violations],
+        **quality_report.to_dict(),
+    }
+
+
 @router.post("/validate_dataset")
-def validate_dataset(payload: dict[str, Any]) -> dict[str, Any]:
+@profiled
+def validate_dataset(payload: JsonPayload) -> dict[str, Any]:
     """Validate schema compliance and generate data quality report."""
 
     try:
         schema, records = load_dataset(payload)
+        spec = sample_spec(payload)
     except Exception as exc:  # broad for validation errors
         raise HTTPException(status_code=400, detail=str(exc)) from exc
 
-    validator = SchemaValidator(schema)
-    violations = validator.validate(records)
     baseline = _load_baseline()
-    quality_report = generate_quality_report(records, baseline)
+    dataset_id = payload.get("incremental_id")
+    if spec is not None and dataset_id is not None:
+        raise HTTPException(status_code=400, detail="Use either 'sample' or 'incremental_id'")
 
-    return {
-        "schema_violations": [v.dict() for v in violations],
-        **quality_report.to_dict(),
-    }
+    engines = ["schema_validate", "quality_report"]
+    with default_scheduler.admit(
+        "validate_dataset", scan_rows(records, spec), len(schema.fields), engines
+    ) as job:
+        if spec is not None:
+            return approximate_validation(schema, records, spec, baseline)
+        if dataset_id is None:
+            return job.run(validate_records, schema, records, baseline)
+        try:
+            update = append_rows(dataset_id, schema, records, payload.get("incremental_offset"))
+        except IncrementalStateError as exc:
+            raise HTTPException(status_code=400, detail=str(exc)) from exc
+        return {
+            "schema_violations": [v.dict() for v in update.schema_violations],
+            **update.quality_report(baseline).to_dict(),
+            "incremental": update.summary(),
+        }
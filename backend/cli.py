@@ -0,0 +1,254 @@
+"""Offline batch scoring: run the full TDIE pipeline over local files without HTTP.
+
+Usage::
+
+    python -m backend.cli data/partitions/ --schema schema.json --guardrail MODERATE
+    python -m backend.cli payload.json --fingerprint --full
+
+Each input file, column directory, or partition inside an input directory is scored in its
+own process, and one JSON line is written to stdout per partition as it finishes. Provenance,
+checksum history, metrics history, and training-gate audit entries are written by the parent
+process only.
+The exit code reflects the worst training decision: 0 PASS, 1 REVIEW, 2 BLOCK, 3 error.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import logging
+import multiprocessing
+import sys
+from collections.abc import Iterator
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+from typing import Any, NoReturn
+
+from backend.engines.fingerprint_engine import compute_fingerprint, store_fingerprint
+from backend.engines.pipeline import (
+    DatasetEvaluation,
+    assemble_report,
+    evaluate_dataset,
+    evaluate_short_circuit,
+    record_submission,
+    submission_completeness,
+)
+from backend.engines.schema_validator import DatasetSchema
+from backend.engines.training_gate import GuardrailLevel, training_gate
+from backend.utils.audit import flush_audit_writers
+from backend.utils.columnar import ColumnarDataset
+from backend.utils.data_loader import decode_json, load_dataset
+from backend.utils.dataset_refs import SUFFIX_FORMATS, infer_format, open_dataset
+from backend.utils.history import record_run
+from backend.utils.parallel import resolve_workers
+
+EXIT_CODES = {"PASS": 0, "REVIEW": 1, "BLOCK": 2}
+EXIT_ERROR = 3
+JSON_SUFFIXES = {".json", ".ndjson", ".jsonl"}
+PARTITION_SUFFIXES = JSON_SUFFIXES | set(SUFFIX_FORMATS)
+
+
+class _Parser(argparse.ArgumentParser):
+    """Argument parser whose usage errors exit with ``EXIT_ERROR`` rather than 2 (BLOCK)."""
+
+    def error(self, message: str) -> NoReturn:
+        self.print_usage(sys.stderr)
+        self.exit(EXIT_ERROR, f"{self.prog}: error: {message}\n")
+
+
+def _is_column_directory(path: Path) -> bool:
+    return path.is_dir() and any(path.glob("*.npy")) and not any(p.is_dir() for p in path.iterdir())
+
+
+def expand_partitions(paths: list[Path]) -> list[Path]:
+    """Expand inputs into partitions: files and column directories are taken as they are,
+    other directories contribute their supported files and column subdirectories."""
+
+    partitions: list[Path] = []
+    for path in paths:
+        if path.is_file() or _is_column_directory(path):
+            partitions.append(path)
+        elif path.is_dir():
+            for child in sorted(path.iterdir()):
+                if _is_column_directory(child) or (
+                    child.is_file() and child.suffix.lower() in PARTITION_SUFFIXES
+                ):
+                    partitions.append(child)
+        else:
+            raise FileNotFoundError(f"Input {path} does not exist")
+    return partitions
+
+
+def _read_json_lines(path: Path) -> Iterator[Any]:
+    with path.open("rb") as f:
+        for line in f:
+            if line.strip():
+                yield decode_json(line)
+
+
+def load_partition(
+    path: Path, schema: DatasetSchema | None
+) -> tuple[DatasetSchema, Any, dict[str, Any]]:
+    """Return ``(schema, records, submission)`` for one partition.
+
+    A ``.json`` file holding an object is treated as a full ``/tdie_score`` payload; its
+    schema is used unless ``schema`` overrides it. Record arrays, NDJSON, and columnar files
+    need ``schema``.
+    """
+
+    submission: dict[str, Any] = {"source": str(path), "user": "cli"}
+    suffix = path.suffix.lower() if path.is_file() else ""
+    if suffix == ".json":
+        document = decode_json(path.read_bytes())
+        if isinstance(document, dict):
+            if schema is not None:
+                document = {**document, "schema": json.loads(schema.json())}
+            payload_schema, records = load_dataset(document)
+            envelope = {key: value for key, value in document.items() if key != "records"}
+            return payload_schema, records, {**submission, **envelope}
+        rows: Any = document
+    elif suffix in JSON_SUFFIXES:
+        rows = list(_read_json_lines(path))
+    else:
+        rows = None
+    if schema is None:
+        raise ValueError(f"{path} has no embedded schema; pass --schema")
+    if rows is None:
+        columns = [field.name for field in schema.fields]
+        records: Any = open_dataset(path, infer_format(path), columns)
+    else:
+        if not isinstance(rows, list):
+            raise ValueError(f"{path} must hold a list of record objects")
+        records = ColumnarDataset.from_records(rows)
+    return schema, records, submission
+
+
+def score_partition(
+    path: Path, schema: DatasetSchema | None, fingerprint: bool, short_circuit: bool = False
+) -> tuple[DatasetSchema, DatasetEvaluation, dict[str, Any], dict[str, Any] | None]:
+    """Worker entrypoint: load one partition and run the engines over it."""
+
+    schema, records, submission = load_partition(path, schema)
+    if not len(records):
+        raise ValueError(f"{path} holds no records")
+    if short_circuit:
+        evaluation = evaluate_short_circuit(
+            schema, records, submission_completeness(schema, submission)
+        )
+    else:
+        evaluation = evaluate_dataset(schema, records)
+    fingerprint_entry = None
+    if fingerprint:
+        metadata = {
+            "schema_name": schema.name,
+            "schema_version": schema.version,
+            "record_count": len(records),
+        }
+        fingerprint_entry = compute_fingerprint(records, metadata)
+    return schema, evaluation, submission, fingerprint_entry
+
+
+def _quiet_worker(level: int) -> None:
+    logging.disable(level - 1)
+
+
+def _summary(
+    path: Path,
+    schema: DatasetSchema,
+    evaluation: DatasetEvaluation,
+    submission: dict[str, Any],
+    fingerprint: dict[str, Any] | None,
+    args: argparse.Namespace,
+) -> dict[str, Any]:
+    """Record provenance and history, persist the fingerprint, apply the gate, build the line."""
+
+    report = assemble_report(schema, evaluation, submission, record_submission(schema, submission))
+    record_run(schema.name, report, evaluation.rows)
+    if fingerprint is not None:
+        store_fingerprint(fingerprint)
+    score = report["tdie_score"]
+    if score is None:  # short-circuited: gate on the worst score the skipped stages allow
+        score = report["tdie_score_bounds"][0]
+    gate = training_gate(score, level=args.guardrail, threshold=args.threshold)
+    line: dict[str, Any] = {
+        "partition": str(path),
+        "rows": evaluation.rows,
+        "tdie_score": report["tdie_score"],
+        "severity": report["severity"],
+        "decision": report["decision"],
+        "training_decision": gate["training_decision"],
+        "schema_violations": len(report["schema_violations"]),
+        "quality_score": report.get("quality_score"),
+        "poisoning_risk_score": report.get("poisoning_risk_score"),
+        "bias_integrity_score": report.get("bias_integrity_score"),
+    }
+    if "short_circuit" in report:
+        line["stages_skipped"] = report["short_circuit"]["stages_skipped"]
+        if report["tdie_score"] is None:
+            line["tdie_score_bounds"] = report["tdie_score_bounds"]
+    if fingerprint is not None:
+        line["dataset_hash"] = fingerprint["dataset_hash"]
+    if args.full:
+        line["report"] = report
+    return line
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = _Parser(prog="python -m backend.cli", description=__doc__.splitlines()[0])
+    parser.add_argument("paths", nargs="+", type=Path, help="files, column dirs, or partition dirs")
+    parser.add_argument("--schema", type=Path, help="DatasetSchema JSON (overrides payloads)")
+    parser.add_argument(
+        "--guardrail",
+        default=GuardrailLevel.STRICT,
+        choices=[GuardrailLevel.STRICT, GuardrailLevel.MODERATE, GuardrailLevel.PERMISSIVE],
+    )
+    parser.add_argument("--threshold", type=float, default=60.0)
+    parser.add_argument("--workers", type=int, default=0, help="processes; 0 uses every core")
+    parser.add_argument("--fingerprint", action="store_true", help="also hash and record")
+    parser.add_argument("--full", action="store_true", help="include the full report per line")
+    parser.add_argument(
+        "--short-circuit", action="store_true", help="skip stages once the decision is settled"
+    )
+    parser.add_argument("--log-level", default="WARNING")
+    args = parser.parse_args(argv)
+
+    level = logging.getLevelName(args.log_level.upper())
+    if not isinstance(level, int):
+        parser.error(f"unknown log level {args.log_level}")
+    _quiet_worker(level)
+    try:
+        schema = DatasetSchema.parse_file(args.schema) if args.schema else None
+        partitions = expand_partitions(args.paths)
+    except (OSError, ValueError) as exc:
+        parser.error(str(exc))
+    if not partitions:
+        parser.error("no partitions found in the given paths")
+
+    exit_code = 0
+    workers = min(resolve_workers(args.workers), len(partitions))
+    # Spawned workers start clean: no inherited log listener or audit writer threads.
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(
+        workers, mp_context=context, initializer=_quiet_worker, initargs=(level,)
+    ) as pool:
+        futures = {
+            pool.submit(score_partition, path, schema, args.fingerprint, args.short_circuit): path
+            for path in partitions
+        }
+        for future in as_completed(futures):
+            path = futures[future]
+            try:
+                line = _summary(path, *future.result(), args)
+            except Exception as exc:  # report and keep scoring the other partitions
+                line = {"partition": str(path), "error": f"{type(exc).__name__}: {exc}"}
+                exit_code = max(exit_code, EXIT_ERROR)
+            else:
+                exit_code = max(exit_code, EXIT_CODES[line["training_decision"]])
+            sys.stdout.write(json.dumps(line, default=str) + "\n")
+            sys.stdout.flush()
+    flush_audit_writers()
+    return exit_code
+
+
+if __name__ == "__main__":
+    sys.exit(main())
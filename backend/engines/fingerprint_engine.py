@@ -2,43 +2,67 @@
 
 from __future__ import annotations
 
-import json
 from datetime import UTC, datetime
 from pathlib import Path
 from typing import Any
 
-from backend.utils.hash_utils import hash_dataset, hash_features, persist_hash
+from backend.utils.blocklist import BLOCKLIST_BLOCK_ROWS, blocklist_active, check_blocklist
+from backend.utils.hash_utils import (
+    hash_dataset,
+    hash_dataset_blocks,
+    hash_features,
+    persist_hash,
+)
 from backend.utils.logger import get_logger
+from backend.utils.metrics import timed
+from backend.utils.storage import list_store
 
 logger = get_logger(__name__)
 
 CHECKSUM_HISTORY = Path("provenance/checksum_history.json")
 
 
-def fingerprint_dataset(records: list[dict[str, Any]], metadata: dict[str, Any]) -> dict[str, Any]:
-    """Compute dataset-level and feature-level fingerprints."""
-    dataset_hash = hash_dataset(records)
-    feature_hashes = hash_features(records)
-    fingerprint = {
+def compute_fingerprint(records: list[dict[str, Any]], metadata: dict[str, Any]) -> dict[str, Any]:
+    """Compute dataset-level and feature-level fingerprints without persisting them.
+
+    While the blocklist has entries, block digests are taken in the same pass and the
+    dataset and its blocks are checked against it.
+    """
+    with timed("hash_dataset", len(records)):
+        if blocklist_active():
+            dataset_hash, block_hashes = hash_dataset_blocks(records, BLOCKLIST_BLOCK_ROWS)
+            blocklist = check_blocklist(dataset_hash, block_hashes)
+        else:
+            dataset_hash = hash_dataset(records)
+            blocklist = {"known_bad": False, "dataset": None, "blocks": []}
+    with timed("hash_features", len(records)):
+        feature_hashes = hash_features(records)
+    return {
         "dataset_hash": dataset_hash,
         "feature_hashes": feature_hashes,
+        "blocklist": blocklist,
         "generated_at": datetime.now(UTC).isoformat(),
         "metadata": metadata,
     }
-    persist_hash(CHECKSUM_HISTORY, fingerprint)
-    logger.info("Fingerprint stored with hash %s", dataset_hash)
+
+
+def store_fingerprint(fingerprint: dict[str, Any]) -> None:
+    """Append a fingerprint to the checksum history."""
+    with timed("persist_checksum"):
+        persist_hash(CHECKSUM_HISTORY, fingerprint)
+    logger.info("Fingerprint stored with hash %s", fingerprint["dataset_hash"])
+
+
+def fingerprint_dataset(records: list[dict[str, Any]], metadata: dict[str, Any]) -> dict[str, Any]:
+    """Compute dataset-level and feature-level fingerprints and record them."""
+    fingerprint = compute_fingerprint(records, metadata)
+    store_fingerprint(fingerprint)
     return fingerprint
 
 
 def detect_tampering(new_hash: str) -> bool:
     """Simple tamper detection by comparing latest stored hash."""
-    if not CHECKSUM_HISTORY.exists():
-        return False
-    history_raw = CHECKSUM_HISTORY.read_text()
-    if not history_raw.strip():
-        return False
-    entries = json.loads(history_raw)
-    if not entries:
+    last = list_store(CHECKSUM_HISTORY).last()
+    if last is None:
         return False
-    last_hash = entries[-1]["dataset_hash"]
-    return last_hash != new_hash
+    return last["dataset_hash"] != new_hash
@@ -0,0 +1,377 @@
+"""Incremental evaluation of append-only datasets from stored, mergeable engine state.
+
+A submission carrying ``incremental_id`` holds only the rows appended since the previous
+submission with that id. Row-level work (schema checks, missing values, duplicate digests,
+fairness counts, poisoning signals, fingerprint blocks) runs over those rows only and is
+merged into the state kept under ``INCREMENTAL_DIR/<id>/``:
+
+* ``state.json`` - committed row count and log lengths, the fairness contingency table,
+  numeric moments, poisoning signals, Merkle leaves and the rows of the unfinished block;
+* ``*.col`` - append-only binary columns of numeric values and parsed timestamps;
+* ``missing.jsonl`` / ``violations.jsonl`` - append-only finding logs;
+* ``digests.<n>.npy`` - sorted runs of duplicate-detection digests and their counts, merged
+  pairwise as they grow so lookups stay logarithmic and rewrites amortised.
+
+Appends land past the committed lengths and only become visible when ``state.json`` is
+atomically replaced, so a crash mid-update leaves the previous state intact. The IQR
+outlier fences and timestamp ordering checks depend on every value and are recomputed with
+vectorised passes over the memory-mapped columns. KMeans cluster outliers and embedding
+drift are not mergeable; they are computed for each appended batch.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import re
+from collections import Counter
+from datetime import UTC, datetime
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+
+from backend.engines.bias_engine import _group_metrics, bias_report
+from backend.engines.poison_detector import compute_poisoning_risk
+from backend.engines.quality_checker import (
+    QualityReport,
+    finalize_quality_report,
+    quality_fields,
+    scan_quality,
+)
+from backend.engines.schema_validator import DatasetSchema, SchemaViolation
+from backend.engines.timestamp_engine import TimestampColumn
+from backend.utils.hash_utils import hash_block, merkle_root, stable_json
+from backend.utils.logger import get_logger
+from backend.utils.metrics import timed
+from backend.utils.schema_registry import validator_for
+from backend.utils.storage import atomic_write_text, file_lock
+
+logger = get_logger(__name__)
+
+INCREMENTAL_DIR = Path(os.environ.get("TDIE_INCREMENTAL_DIR", "provenance/incremental"))
+MERKLE_BLOCK_ROWS = 1024
+POISON_SIGNALS = ("label_flips", "cluster_outliers", "bias_injection", "rare_pattern")
+_DATASET_ID = re.compile(r"[A-Za-z0-9_.-]{1,128}")
+_DIGEST_DTYPE = np.dtype([("key", "S16"), ("count", "<i8")])
+_TIMESTAMP_PARTS = {"positions": np.dtype("<i8"), "values": np.dtype("<i8"), "valid": np.dtype("?")}
+
+
+class IncrementalStateError(ValueError):
+    """Raised when a submission does not fit the stored state of its dataset id."""
+
+
+def _append_bytes(path: Path, committed: int, data: bytes) -> int:
+    """Write ``data`` after the first ``committed`` bytes of ``path``; return the new length.
+
+    Anything past ``committed`` is left over from an interrupted update and is discarded.
+    """
+
+    with path.open("ab") as f:
+        f.truncate(committed)
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    return committed + len(data)
+
+
+def _read_column(path: Path, dtype: np.dtype, length: int) -> np.ndarray:
+    count = length // dtype.itemsize
+    if not count:
+        return np.empty(0, dtype=dtype)
+    return np.memmap(path, dtype=dtype, mode="r", shape=(count,))
+
+
+def _read_log(path: Path, length: int) -> list[Any]:
+    if not length:
+        return []
+    with path.open("rb") as f:
+        return [json.loads(line) for line in f.read(length).splitlines()]
+
+
+class StoredQuality:
+    """``QualityPartial``-compatible view of the quality state of a stored dataset."""
+
+    def __init__(self, directory: Path, state: dict[str, Any]) -> None:
+        lengths = state["lengths"]
+        self.rows = state["rows"]
+        self.missing = state["missing"]
+        self.missing_messages = _read_log(directory / "missing.jsonl", lengths["missing.jsonl"])
+        self.duplicate_count = state["duplicate_keys"]
+        self.numeric = {
+            field: _read_column(directory / name, np.dtype("<f8"), lengths[name])
+            for field, name in _numeric_files(state).items()
+        }
+        self.timestamps: dict[str, TimestampColumn] = {}
+        for field, names in _timestamp_files(state).items():
+            parts = {
+                part: _read_column(directory / name, _TIMESTAMP_PARTS[part], lengths[name])
+                for part, name in names.items()
+            }
+            self.timestamps[field] = TimestampColumn(
+                field, parts["positions"], parts["values"].view("datetime64[ns]"), parts["valid"]
+            )
+        self._moments = state["moments"]
+
+    def mean(self, field: str) -> float | None:
+        count, total = self._moments[field]
+        return total / count if count else None
+
+
+class IncrementalUpdate:
+    """Full-dataset engine results after a batch of rows was appended to a dataset id."""
+
+    def __init__(
+        self,
+        dataset_id: str,
+        delta_rows: int,
+        directory: Path,
+        state: dict[str, Any],
+        schema_violations: list[SchemaViolation],
+        poison_report: dict[str, Any],
+    ) -> None:
+        self.dataset_id = dataset_id
+        self.delta_rows = delta_rows
+        self.rows = state["rows"]
+        self.numeric_fields = state["numeric_fields"]
+        self.timestamp_fields = state["timestamp_fields"]
+        self.schema_violations = schema_violations
+        self.quality = StoredQuality(directory, state)
+        self.bias_report = bias_report(state["groups"])
+        self.poison_report = poison_report
+        leaves = state["merkle_leaves"]
+        if state["merkle_tail"]:
+            leaves = [*leaves, hash_block(state["merkle_tail"])]
+        self.merkle_root = merkle_root(leaves)
+        self.merkle_blocks = len(leaves)
+
+    def quality_report(self, baseline: list[dict[str, Any]]) -> QualityReport:
+        return finalize_quality_report(
+            self.quality, baseline, self.numeric_fields, self.timestamp_fields
+        )
+
+    def summary(self) -> dict[str, Any]:
+        return {
+            "dataset_id": self.dataset_id,
+            "rows": self.rows,
+            "delta_rows": self.delta_rows,
+            "merkle_root": self.merkle_root,
+            "merkle_blocks": self.merkle_blocks,
+        }
+
+
+def _numeric_files(state: dict[str, Any]) -> dict[str, str]:
+    return {field: f"numeric.{i}.col" for i, field in enumerate(state["numeric_fields"])}
+
+
+def _timestamp_files(state: dict[str, Any]) -> dict[str, dict[str, str]]:
+    return {
+        field: {part: f"timestamp.{i}.{part}.col" for part in _TIMESTAMP_PARTS}
+        for i, field in enumerate(state["timestamp_fields"])
+    }
+
+
+def _initial_state(schema: DatasetSchema, first: dict[str, Any]) -> dict[str, Any]:
+    numeric_fields, timestamp_fields = quality_fields(first)
+    state: dict[str, Any] = {
+        "schema_name": schema.name,
+        "schema_version": schema.version,
+        "rows": 0,
+        "numeric_fields": numeric_fields,
+        "timestamp_fields": timestamp_fields,
+        "missing": 0,
+        "moments": {field: [0, 0.0] for field in numeric_fields},
+        "duplicate_keys": 0,
+        "digest_runs": [],
+        "next_run": 0,
+        "groups": {},
+        "poison_signals": {name: [] for name in POISON_SIGNALS},
+        "merkle_leaves": [],
+        "merkle_tail": [],
+        "lengths": {"missing.jsonl": 0, "violations.jsonl": 0},
+    }
+    state["lengths"].update({name: 0 for name in _numeric_files(state).values()})
+    for names in _timestamp_files(state).values():
+        state["lengths"].update({name: 0 for name in names.values()})
+    return state
+
+
+def _append(directory: Path, state: dict[str, Any], name: str, data: bytes) -> None:
+    lengths = state["lengths"]
+    lengths[name] = _append_bytes(directory / name, lengths[name], data)
+
+
+def _json_lines(items: list[Any]) -> bytes:
+    return "".join(json.dumps(item) + "\n" for item in items).encode("utf-8")
+
+
+def _write_run(directory: Path, state: dict[str, Any], run: np.ndarray) -> dict[str, Any]:
+    name = f"digests.{state['next_run']}.npy"
+    state["next_run"] += 1
+    with (directory / name).open("wb") as f:
+        np.save(f, run)
+        f.flush()
+        os.fsync(f.fileno())
+    return {"file": name, "size": len(run)}
+
+
+def _merge_runs(first: np.ndarray, second: np.ndarray) -> np.ndarray:
+    joined = np.concatenate([first, second])
+    keys, inverse = np.unique(joined["key"], return_inverse=True)
+    merged = np.empty(len(keys), dtype=_DIGEST_DTYPE)
+    merged["key"] = keys
+    merged["count"] = np.bincount(inverse, weights=joined["count"], minlength=len(keys))
+    return merged
+
+
+def _add_digests(directory: Path, state: dict[str, Any], digests: Counter[bytes]) -> None:
+    """Count newly duplicated keys against the stored runs, then store the batch as a run."""
+
+    if not digests:
+        return
+    batch = np.array(list(digests.items()), dtype=_DIGEST_DTYPE)
+    batch = batch[np.argsort(batch["key"], kind="stable")]
+    prior = np.zeros(len(batch), dtype=np.int64)
+    runs: list[tuple[dict[str, Any] | None, np.ndarray]] = [
+        (entry, np.load(directory / entry["file"], mmap_mode="r")) for entry in state["digest_runs"]
+    ]
+    for _, run in runs:
+        idx = np.minimum(np.searchsorted(run["key"], batch["key"]), len(run) - 1)
+        prior += np.where(run["key"][idx] == batch["key"], run["count"][idx], 0)
+    state["duplicate_keys"] += int(((prior <= 1) & (prior + batch["count"] > 1)).sum())
+
+    runs.append((None, batch))
+    # Merge while the previous run is no more than twice the newest: O(log n) runs remain.
+    while len(runs) > 1 and len(runs[-2][1]) <= 2 * len(runs[-1][1]):
+        _, newest = runs.pop()
+        _, previous = runs.pop()
+        runs.append((None, _merge_runs(previous, newest)))
+    state["digest_runs"] = [
+        entry if entry is not None else _write_run(directory, state, run) for entry, run in runs
+    ]
+
+
+def _prune_runs(directory: Path, state: dict[str, Any]) -> None:
+    live = {run["file"] for run in state["digest_runs"]}
+    for path in directory.glob("digests.*.npy"):
+        if path.name not in live:
+            path.unlink(missing_ok=True)
+
+
+def _add_groups(state: dict[str, Any], counts: dict[str, dict[str, float]]) -> None:
+    groups = state["groups"]
+    for group, batch in counts.items():
+        stored = groups.setdefault(group, {"positives": 0, "total": 0})
+        stored["positives"] += int(batch["positives"])
+        stored["total"] += int(batch["total"])
+
+
+def _add_poison_signals(
+    state: dict[str, Any], batch_report: dict[str, Any], offset: int
+) -> dict[str, Any]:
+    """Shift the batch's suspect indices to dataset positions and rescore the union."""
+
+    signals = state["poison_signals"]
+    for name in POISON_SIGNALS:
+        signals[name].extend(idx + offset for idx in batch_report["signals"][name])
+    drift = batch_report["signals"]["embedding_drift"]
+    hits = set().union(*(signals[name] for name in POISON_SIGNALS))
+    risk_score = min(100, 10 * len(hits) + drift)
+    return {
+        "poisoning_risk_score": round(risk_score, 2),
+        "suspected_poison_samples": sorted(hits),
+        "signals": {
+            **{name: list(signals[name]) for name in POISON_SIGNALS},
+            "embedding_drift": drift,
+        },
+        "anomaly_visualization": "simulated",
+    }
+
+
+def _add_merkle_blocks(state: dict[str, Any], records: Any) -> None:
+    tail = state["merkle_tail"]
+    for record in records:
+        tail.append(stable_json(record))
+        if len(tail) == MERKLE_BLOCK_ROWS:
+            state["merkle_leaves"].append(hash_block(tail))
+            tail.clear()
+
+
+def append_rows(
+    dataset_id: str,
+    schema: DatasetSchema,
+    records: Any,
+    expected_offset: int | None = None,
+    sensitive_field: str = "group",
+    label_field: str = "label",
+) -> IncrementalUpdate:
+    """Merge ``records`` into the stored state of ``dataset_id`` and return full results.
+
+    ``expected_offset`` guards against replays: when given, it must equal the number of
+    rows already stored, or the batch is rejected without changing anything.
+    """
+
+    if not _DATASET_ID.fullmatch(dataset_id):
+        raise IncrementalStateError(
+            "incremental_id must be 1-128 letters, digits, '.', '_' or '-' characters"
+        )
+    if not len(records):
+        raise IncrementalStateError("No records supplied")
+    directory = INCREMENTAL_DIR / dataset_id
+    state_path = directory / "state.json"
+    with timed("incremental_update", len(records)), file_lock(state_path):
+        if state_path.exists():
+            state = json.loads(state_path.read_text())
+        else:
+            state = _initial_state(schema, records[0])
+        if (state["schema_name"], state["schema_version"]) != (schema.name, schema.version):
+            raise IncrementalStateError(
+                f"Dataset {dataset_id} is tracked under schema "
+                f"{state['schema_name']} {state['schema_version']}"
+            )
+        offset = state["rows"]
+        if expected_offset is not None and expected_offset != offset:
+            raise IncrementalStateError(
+                f"Dataset {dataset_id} holds {offset} rows, batch expected {expected_offset}"
+            )
+
+        validator = validator_for(schema)
+        batch_violations = validator.validate_rows(records, offset)
+        _append(
+            directory, state, "violations.jsonl", _json_lines([v.dict() for v in batch_violations])
+        )
+
+        partial = scan_quality(records, offset, state["numeric_fields"], state["timestamp_fields"])
+        state["missing"] += partial.missing
+        _append(directory, state, "missing.jsonl", _json_lines(partial.missing_messages))
+        for field, name in _numeric_files(state).items():
+            values = partial.numeric[field]
+            _append(directory, state, name, values.astype("<f8").tobytes())
+            state["moments"][field][0] += len(values)
+            state["moments"][field][1] += float(values.sum())
+        for field, names in _timestamp_files(state).items():
+            column = partial.timestamps[field]
+            _append(directory, state, names["positions"], column.positions.astype("<i8").tobytes())
+            _append(directory, state, names["values"], column.values.view("<i8").tobytes())
+            _append(directory, state, names["valid"], column.valid.astype("?").tobytes())
+        _add_digests(directory, state, partial.digests)
+
+        _add_groups(state, _group_metrics(records, label_field, sensitive_field))
+        poison_report = _add_poison_signals(state, compute_poisoning_risk(records), offset)
+        _add_merkle_blocks(state, records)
+
+        state["rows"] = offset + len(records)
+        state["updated_at"] = datetime.now(UTC).isoformat()
+        atomic_write_text(state_path, json.dumps(state))
+        _prune_runs(directory, state)
+
+    stored = _read_log(directory / "violations.jsonl", state["lengths"]["violations.jsonl"])
+    violations = [SchemaViolation(**entry) for entry in stored]
+    violations.extend(validator.validate_dataset_shape(state["rows"]))
+    logger.info(
+        "Appended %d rows to incremental dataset %s (%d total)",
+        len(records),
+        dataset_id,
+        state["rows"],
+    )
+    return IncrementalUpdate(dataset_id, len(records), directory, state, violations, poison_report)
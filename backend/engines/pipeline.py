@@ -0,0 +1,298 @@
+"""Full TDIE pipeline shared by the ``/tdie_score`` endpoint and the batch CLI."""
+
+from __future__ import annotations
+
+from collections.abc import Callable, Mapping
+from typing import Any
+
+from backend.engines.incremental import append_rows
+from backend.engines.provenance import provenance_completeness, record_provenance
+from backend.engines.quality_checker import QualityReport
+from backend.engines.registry import BUILTIN_ENGINES, EngineRegistry, default_registry
+from backend.engines.schema_validator import DatasetSchema, SchemaViolation
+from backend.engines.tdie_scorer import (
+    MAX_SCHEMA_VIOLATIONS,
+    compute_tdie_score,
+    decision_gate,
+    schema_penalty,
+    score_value,
+    severity_tier,
+)
+from backend.utils.history import record_run
+from backend.utils.metrics import timed
+from backend.utils.schema_registry import validator_for
+
+# Cheapest first as measured on 200k rows. Schema goes first because it stops at the first
+# rows that break the contract, and poisoning moves the score most per unit of work.
+SHORT_CIRCUIT_STAGES = ("schema_validate", "bias_checks", "poisoning_risk", "quality_report")
+# Range of each engine score while its stage has not run.
+ENGINE_SCORE_RANGE = (0.0, 100.0)
+
+
+class DatasetEvaluation:
+    """Engine outputs for one dataset, before provenance is recorded and scores combined.
+
+    Holds only picklable values so batch workers can return it to the parent process. A
+    short-circuited evaluation leaves skipped engine reports as None and describes the
+    skipped stages in ``short_circuit``. ``detectors`` holds the outputs of registered
+    engines beyond the built-in four.
+    """
+
+    def __init__(
+        self,
+        rows: int,
+        schema_violations: list[SchemaViolation],
+        quality_report: QualityReport | None,
+        bias_report: dict[str, Any] | None,
+        poison_report: dict[str, Any] | None,
+        short_circuit: dict[str, Any] | None = None,
+        detectors: dict[str, Any] | None = None,
+    ) -> None:
+        self.rows = rows
+        self.schema_violations = schema_violations
+        self.quality_report = quality_report
+        self.bias_report = bias_report
+        self.poison_report = poison_report
+        self.short_circuit = short_circuit
+        self.detectors = detectors or {}
+
+
+def evaluate_dataset(
+    schema: DatasetSchema, records: Any, registry: EngineRegistry = default_registry
+) -> DatasetEvaluation:
+    """Run every engine in ``registry`` over ``records``, sharing their intermediates."""
+
+    inputs = {"records": records, "schema": schema, "baseline": records}
+    outputs = registry.start(inputs, registry.engines).run()
+    return DatasetEvaluation(
+        len(records),
+        outputs["schema_validate"],
+        outputs["quality_report"],
+        outputs["bias_checks"],
+        outputs["poisoning_risk"],
+        detectors={k: v for k, v in outputs.items() if k not in BUILTIN_ENGINES},
+    )
+
+
+def evaluate_short_circuit(
+    schema: DatasetSchema, records: Any, provenance_score: float
+) -> DatasetEvaluation:
+    """Run the engines in ``SHORT_CIRCUIT_STAGES`` order until the TDIE decision is settled.
+
+    After each stage the final score is bounded by letting every pending engine score take
+    its best and worst value. Once both ends give the same decision the remaining stages are
+    skipped. Schema validation itself stops after ``MAX_SCHEMA_VIOLATIONS`` are exceeded.
+    Custom detectors do not affect the decision and are not run in this mode.
+    """
+
+    rows = len(records)
+    run = default_registry.start(
+        {"records": records, "schema": schema, "baseline": records}, SHORT_CIRCUIT_STAGES[1:]
+    )
+    results: dict[str, Any] = {}
+    for stage in SHORT_CIRCUIT_STAGES:
+        if stage == "schema_validate":
+            with timed(stage, rows):
+                results[stage] = validator_for(schema).validate_until(
+                    records, MAX_SCHEMA_VIOLATIONS
+                )
+        else:
+            results[stage] = run.result(stage)
+        low, high, decision = _decision_bounds(results, rows, provenance_score)
+        if decision is not None:
+            break
+
+    violations, checked = results["schema_validate"]
+    skipped = [name for name in SHORT_CIRCUIT_STAGES if name not in results]
+    summary: dict[str, Any] = {
+        "stages_run": list(results),
+        "stages_skipped": skipped,
+        "score_bounds": [round(low, 2), round(high, 2)],
+    }
+    if checked < rows:
+        summary["schema_rows_checked"] = checked
+    if skipped:
+        summary["decision"] = decision
+        if len(violations) > MAX_SCHEMA_VIOLATIONS:
+            summary["reason"] = (
+                f"{len(violations)} schema violations exceed {MAX_SCHEMA_VIOLATIONS}, "
+                "which blocks training whatever the other scores"
+            )
+        else:
+            summary["reason"] = (
+                f"TDIE score lies in [{low:.2f}, {high:.2f}] after {stage}, "
+                f"which gives {decision} whatever the skipped stages return"
+            )
+    return DatasetEvaluation(
+        rows,
+        violations,
+        results.get("quality_report"),
+        results.get("bias_checks"),
+        results.get("poisoning_risk"),
+        short_circuit=summary,
+    )
+
+
+def _decision_bounds(
+    results: Mapping[str, Any], rows: int, provenance_score: float
+) -> tuple[float, float, str | None]:
+    """Bound the TDIE score over the stages in ``results``; the decision is None if still open."""
+
+    def engine_range(stage: str, read: Any) -> tuple[float, float]:
+        if stage not in results:
+            return ENGINE_SCORE_RANGE
+        return read(results[stage]), read(results[stage])
+
+    quality = engine_range("quality_report", lambda report: report.score)
+    bias = engine_range("bias_checks", lambda report: report["bias_integrity_score"])
+    risk = engine_range("poisoning_risk", lambda report: report["poisoning_risk_score"])
+    violations, checked = results.get("schema_validate", ([], 0))
+    penalty = schema_penalty(violations)
+
+    high = score_value(quality[1], risk[0], bias[1], penalty, provenance_score)
+    best = decision_gate(high, len(violations))
+    if checked < rows:
+        # Unchecked rows can add any number of violations, so the worst case is always BLOCK.
+        return 0.0, high, best if best == "BLOCK" else None
+    low = score_value(quality[0], risk[1], bias[0], penalty, provenance_score)
+    worst = decision_gate(low, len(violations))
+    return low, high, best if best == worst else None
+
+
+def evaluate_incremental(
+    schema: DatasetSchema,
+    records: Any,
+    dataset_id: str,
+    expected_offset: int | None = None,
+) -> tuple[DatasetEvaluation, dict[str, Any]]:
+    """Append ``records`` to the stored state of ``dataset_id`` and evaluate the whole dataset.
+
+    Returns the evaluation with the incremental summary (row counts and Merkle root).
+    """
+
+    update = append_rows(dataset_id, schema, records, expected_offset)
+    with timed("quality_report", update.rows):
+        # The full pipeline compares the dataset with itself, which never reports drift.
+        quality_report = update.quality_report([])
+    evaluation = DatasetEvaluation(
+        update.rows,
+        update.schema_violations,
+        quality_report,
+        update.bias_report,
+        update.poison_report,
+    )
+    return evaluation, update.summary()
+
+
+def record_submission(schema: DatasetSchema, submission: Mapping[str, Any]) -> dict[str, Any]:
+    """Record the provenance entry for a scored submission."""
+
+    return record_provenance(
+        source=submission.get("source", "synthetic"),
+        user=submission.get("user", "system"),
+        transformation_steps=submission.get("transformation_steps", []),
+        metadata={"schema_version": schema.version, "schema_name": schema.name},
+    )
+
+
+def submission_completeness(schema: DatasetSchema, submission: Mapping[str, Any]) -> float:
+    """Provenance completeness of a submission's envelope."""
+
+    return provenance_completeness(
+        {
+            "schema_version": schema.version,
+            "schema_name": schema.name,
+            "source": submission.get("source"),
+            "user": submission.get("user"),
+            "transformation_steps": submission.get("transformation_steps", []),
+        }
+    )
+
+
+def assemble_report(
+    schema: DatasetSchema,
+    evaluation: DatasetEvaluation,
+    submission: Mapping[str, Any],
+    provenance_entry: dict[str, Any],
+) -> dict[str, Any]:
+    """Combine engine outputs and provenance into the consolidated TDIE report."""
+
+    provenance_score = submission_completeness(schema, submission)
+    summary = evaluation.short_circuit
+    if summary is not None and summary["stages_skipped"]:
+        # Skipped stages leave only bounds on the score; a severity needs both in one tier.
+        low, high = summary["score_bounds"]
+        combined = {
+            "tdie_score": None,
+            "tdie_score_bounds": [low, high],
+            "severity": severity_tier(low) if severity_tier(low) == severity_tier(high) else None,
+            "decision": summary["decision"],
+        }
+    else:
+        combined = compute_tdie_score(
+            quality_score=evaluation.quality_report.score,
+            poisoning_risk=evaluation.poison_report["poisoning_risk_score"],
+            bias_score=evaluation.bias_report["bias_integrity_score"],
+            schema_violations=evaluation.schema_violations,
+            provenance_completeness=provenance_score,
+        )
+    report = {
+        **(evaluation.quality_report.to_dict() if evaluation.quality_report else {}),
+        "schema_violations": [v.dict() for v in evaluation.schema_violations],
+        **(evaluation.poison_report or {}),
+        **(evaluation.bias_report or {}),
+        "provenance": provenance_entry,
+        "provenance_completeness": provenance_score,
+        **combined,
+    }
+    if evaluation.detectors:
+        report["detectors"] = evaluation.detectors
+    if summary is not None:
+        report["short_circuit"] = summary
+    return report
+
+
+def _call(func: Callable[..., Any], *args: Any) -> Any:
+    return func(*args)
+
+
+def run_tdie_pipeline(
+    schema: DatasetSchema,
+    records: Any,
+    submission: Mapping[str, Any],
+    run: Callable[..., Any] = _call,
+) -> dict[str, Any]:
+    """Evaluate ``records``, record provenance for ``submission``, and return the report.
+
+    ``submission`` carries the envelope fields of a ``/tdie_score`` payload (``source``,
+    ``user``, ``transformation_steps``). With ``incremental_id`` set, ``records`` are only
+    the rows appended since the previous submission and the report covers the whole dataset.
+    With ``short_circuit`` set, stages that can no longer change the decision are skipped.
+    The engine pass is executed as ``run(func, *args)``; the scheduler's ``Job.run`` may send
+    it to a worker process, while provenance and the metrics history are always recorded here.
+    """
+
+    dataset_id = submission.get("incremental_id")
+    if dataset_id is None:
+        if submission.get("short_circuit"):
+            evaluation = run(
+                evaluate_short_circuit,
+                schema,
+                records,
+                submission_completeness(schema, submission),
+            )
+        else:
+            evaluation = run(evaluate_dataset, schema, records)
+        report = assemble_report(
+            schema, evaluation, submission, record_submission(schema, submission)
+        )
+    else:
+        evaluation, summary = evaluate_incremental(
+            schema, records, dataset_id, submission.get("incremental_offset")
+        )
+        report = assemble_report(
+            schema, evaluation, submission, record_submission(schema, submission)
+        )
+        report["incremental"] = summary
+    record_run(schema.name, report, evaluation.rows)
+    return report
@@ -2,19 +2,42 @@
 
 from __future__ import annotations
 
+import os
+from collections.abc import Hashable
+from concurrent.futures import ProcessPoolExecutor
 from typing import Any
 
 import numpy as np
-from sklearn.cluster import KMeans
 
+from backend.utils.columnar import ColumnarDataset
 from backend.utils.logger import get_logger
+from backend.utils.memory import allocate, chunk_bounds, over_budget
+from backend.utils.parallel import resolve_workers
 
 logger = get_logger(__name__)
 
+# Cluster each label's rows separately instead of the whole matrix at once.
+CLASS_CONDITIONAL = os.environ.get("TDIE_POISON_CLASS_CONDITIONAL", "0") == "1"
+# Classes smaller than this are too small to cluster and are left unscored.
+MIN_CLASS_ROWS = 3
+
 
 def _vectorise(records: list[dict[str, Any]], numeric_fields: list[str]) -> np.ndarray:
+    """Row-aligned float matrix of ``numeric_fields``, memory-mapped over the memory budget."""
+
+    shape = (len(records), max(len(numeric_fields), 1))
+    if over_budget(shape[0] * shape[1] * 8):
+        return _spilled_matrix(records, numeric_fields, shape)
     if not numeric_fields:
-        return np.zeros((len(records), 1))
+        return np.zeros(shape)
+    if isinstance(records, ColumnarDataset) and all(
+        records.is_dense(field) and records.column(field).dtype.kind in "biuf"
+        for field in numeric_fields
+    ):
+        stacked = np.column_stack([records.column(field) for field in numeric_fields])
+        matrix_view = stacked.astype(float, copy=False)
+        if not np.isnan(matrix_view).any():
+            return matrix_view
     matrix = []
     for record in records:
         row = [float(record.get(field, 0.0)) for field in numeric_fields]
@@ -22,6 +45,35 @@ def _vectorise(records: list[dict[str, Any]], numeric_fields: list[str]) -> np.n
     return np.array(matrix)
 
 
+def _spilled_matrix(
+    records: list[dict[str, Any]], numeric_fields: list[str], shape: tuple[int, int]
+) -> np.ndarray:
+    """``_vectorise`` written chunk by chunk into a disk-backed matrix."""
+
+    # A fresh memory-mapped file reads as zeros, which is the no-field matrix.
+    matrix = allocate(shape, float, "numeric_matrix")
+    if not numeric_fields:
+        return matrix
+    if isinstance(records, ColumnarDataset) and all(
+        records.is_dense(field) and records.column(field).dtype.kind in "biuf"
+        for field in numeric_fields
+    ):
+        has_nan = False
+        for index, field in enumerate(numeric_fields):
+            column = records.column(field)
+            for start, stop in chunk_bounds(len(records)):
+                matrix[start:stop, index] = column[start:stop]
+                has_nan = has_nan or bool(np.isnan(matrix[start:stop, index]).any())
+        if not has_nan:
+            return matrix
+    for start, stop in chunk_bounds(len(records)):
+        matrix[start:stop] = [
+            [float(records[idx].get(field, 0.0)) for field in numeric_fields]
+            for idx in range(start, stop)
+        ]
+    return matrix
+
+
 def detect_label_flips(records: list[dict[str, Any]], label_field: str = "label") -> list[int]:
     flips: list[int] = []
     for idx, record in enumerate(records):
@@ -34,24 +86,164 @@ def detect_label_flips(records: list[dict[str, Any]], label_field: str = "label"
     return flips
 
 
-def detect_cluster_anomalies(records: list[dict[str, Any]], numeric_fields: list[str]) -> list[int]:
-    matrix = _vectorise(records, numeric_fields)
+def detect_cluster_anomalies(
+    records: list[dict[str, Any]], numeric_fields: list[str], matrix: np.ndarray | None = None
+) -> list[int]:
+    if matrix is None:
+        matrix = _vectorise(records, numeric_fields)
     if len(records) < 3 or matrix.shape[1] == 0:
         return []
-    n_clusters = min(3, len(records))
+    return _minority_cluster(matrix)[0]
+
+
+def _minority_cluster(matrix: np.ndarray) -> tuple[list[int], np.ndarray]:
+    """Rows in the smallest k-means cluster of ``matrix`` and each row's distance to the
+    centroid of the largest one.
+    """
+
+    if isinstance(matrix, np.memmap):
+        return _chunked_cluster_anomalies(matrix)
+    from sklearn.cluster import KMeans  # deferred: scikit-learn dominates cold-start time
+
+    n_clusters = min(3, len(matrix))
     kmeans = KMeans(n_clusters=n_clusters, n_init=5, random_state=42)
     labels = kmeans.fit_predict(matrix)
-    counts = {label: list(labels).count(label) for label in set(labels)}
-    minority = [idx for idx, lbl in enumerate(labels) if counts[lbl] == min(counts.values())]
-    return minority
+    counts = np.bincount(labels, minlength=n_clusters)
+    minority = np.flatnonzero(counts == counts[counts > 0].min())
+    dominant = kmeans.cluster_centers_[counts.argmax()]
+    distances = np.linalg.norm(matrix - dominant, axis=1)
+    return np.flatnonzero(np.isin(labels, minority)).tolist(), distances
+
+
+def _chunked_cluster_anomalies(
+    matrix: np.ndarray, n_clusters: int = 3
+) -> tuple[list[int], np.ndarray]:
+    """Out-of-core variant for a spilled matrix: mini-batch k-means fitted chunk by chunk."""
+
+    from sklearn.cluster import MiniBatchKMeans
+
+    bounds = list(chunk_bounds(len(matrix)))
+    kmeans = MiniBatchKMeans(n_clusters=n_clusters, n_init=3, random_state=42)
+    for start, stop in bounds:
+        kmeans.partial_fit(matrix[start:stop])
+    labels = allocate((len(matrix),), np.int8, "cluster_labels")
+    for start, stop in bounds:
+        labels[start:stop] = kmeans.predict(matrix[start:stop])
+    counts = sum(np.bincount(labels[start:stop], minlength=n_clusters) for start, stop in bounds)
+    minority = np.flatnonzero(counts == counts[counts > 0].min())
+    dominant = kmeans.cluster_centers_[counts.argmax()]
+    flagged: list[int] = []
+    distances = np.empty(len(matrix))
+    for start, stop in bounds:
+        flagged.extend((np.flatnonzero(np.isin(labels[start:stop], minority)) + start).tolist())
+        distances[start:stop] = np.linalg.norm(matrix[start:stop] - dominant, axis=1)
+    return flagged, distances
+
+
+def _label_key(value: Any) -> Any:
+    return value if isinstance(value, Hashable) else repr(value)
+
+
+def class_partitions(records: list[dict[str, Any]], label_field: str = "label") -> list[np.ndarray]:
+    """Row indices of each distinct label value (missing labels form one class)."""
+
+    if (
+        isinstance(records, ColumnarDataset)
+        and records.has_column(label_field)
+        and records.is_dense(label_field)
+        and records.column(label_field).dtype.kind in "biufU"
+    ):
+        _, codes = np.unique(records.column(label_field), return_inverse=True)
+    else:
+        seen: dict[Any, int] = {}
+        codes = np.fromiter(
+            (seen.setdefault(_label_key(record.get(label_field)), len(seen)) for record in records),
+            dtype=np.int64,
+            count=len(records),
+        )
+    order = np.argsort(codes, kind="stable")
+    return np.split(order, np.flatnonzero(np.diff(codes[order])) + 1)
+
+
+def _class_matrix(matrix: np.ndarray, rows: np.ndarray) -> np.ndarray:
+    """Gather ``rows`` of ``matrix``, spilling the copy when it exceeds the memory budget."""
+
+    if not isinstance(matrix, np.memmap):
+        return matrix[rows]
+    gathered = allocate((len(rows), matrix.shape[1]), matrix.dtype, "class_matrix")
+    for start, stop in chunk_bounds(len(rows)):
+        gathered[start:stop] = matrix[rows[start:stop]]
+    return gathered
+
+
+def detect_class_anomalies(
+    records: list[dict[str, Any]],
+    numeric_fields: list[str],
+    matrix: np.ndarray | None = None,
+    label_field: str = "label",
+    workers: int | None = None,
+) -> tuple[list[int], np.ndarray, list[dict[str, Any]]]:
+    """Minority-cluster outliers found within each label's rows, with per-row suspicion.
+
+    Rows are partitioned by label once and each class is clustered on its own, in a process
+    pool when ``workers`` (default ``TDIE_WORKERS``) exceeds one; a spilled matrix is
+    clustered class by class in-process. Returns the flagged dataset rows, a suspicion score
+    per dataset row (its distance to the centroid of its class's largest cluster, over the
+    median distance of the class's unflagged rows; NaN for classes under ``MIN_CLASS_ROWS``)
+    and a summary per class.
+    """
+
+    if matrix is None:
+        matrix = _vectorise(records, numeric_fields)
+    suspicion = np.full(len(records), np.nan)
+    if len(records) < 3 or matrix.shape[1] == 0:
+        return [], suspicion, []
+    partitions = class_partitions(records, label_field)
+    eligible = sorted(
+        (rows for rows in partitions if len(rows) >= MIN_CLASS_ROWS), key=len, reverse=True
+    )
+    workers = min(resolve_workers(workers), len(eligible))
+    if workers > 1 and not isinstance(matrix, np.memmap):
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            local = list(pool.map(_minority_cluster, [matrix[rows] for rows in eligible]))
+    else:
+        local = [_minority_cluster(_class_matrix(matrix, rows)) for rows in eligible]
+
+    flagged: list[int] = []
+    classes: list[dict[str, Any]] = []
+    for rows, (hits, distances) in zip(eligible, local, strict=True):
+        flagged.extend(rows[hits].tolist())
+        typical = np.median(np.delete(distances, hits)) if len(hits) < len(rows) else 0.0
+        scores = distances / typical if typical > 0 else distances
+        suspicion[rows] = scores
+        classes.append(
+            {
+                "label": records[int(rows[0])].get(label_field),
+                "rows": len(rows),
+                "flagged": len(hits),
+                "max_suspicion": round(float(scores.max()), 4),
+            }
+        )
+    logger.info("Class-conditional clustering over %d classes", len(eligible))
+    return sorted(flagged), suspicion, classes
+
+
+def warm_up() -> None:
+    """Import scikit-learn and fit a tiny model so the first request skips that cost."""
+
+    detect_cluster_anomalies([{"x": float(i)} for i in range(6)], ["x"])
 
 
 def detect_embedding_drift(
-    records: list[dict[str, Any]], baseline_embeddings: np.ndarray, numeric_fields: list[str]
+    records: list[dict[str, Any]],
+    baseline_embeddings: np.ndarray,
+    numeric_fields: list[str],
+    current: np.ndarray | None = None,
 ) -> float:
     if not len(records):
         return 0.0
-    current = _vectorise(records, numeric_fields)
+    if current is None:
+        current = _vectorise(records, numeric_fields)
     if current.size == 0:
         return 0.0
     baseline_mean = baseline_embeddings.mean(axis=0)
@@ -70,7 +262,21 @@ def detect_bias_injection(
     return pattern_indices
 
 
-def compute_poisoning_risk(records: list[dict[str, Any]]) -> dict[str, Any]:
+def compute_poisoning_risk(
+    records: list[dict[str, Any]],
+    numeric_fields: list[str] | None = None,
+    matrix: np.ndarray | None = None,
+    class_conditional: bool | None = None,
+) -> dict[str, Any]:
+    """Combine the poisoning heuristics into a risk score.
+
+    ``numeric_fields`` and their ``_vectorise`` ``matrix`` are derived from ``records`` unless
+    passed in; the matrix is built once and shared by clustering and drift. With
+    ``class_conditional`` (default ``TDIE_POISON_CLASS_CONDITIONAL``) cluster outliers come
+    from ``detect_class_anomalies`` and the report gains ``class_conditional``: per-row
+    suspicion scores keyed by dataset index, then a summary per class.
+    """
+
     if not records:
         logger.warning("Poison detection requested on empty record set")
         return {
@@ -86,11 +292,30 @@ def compute_poisoning_risk(records: list[dict[str, Any]]) -> dict[str, Any]:
             "anomaly_visualization": "simulated",
         }
 
-    numeric_fields = [k for k, v in records[0].items() if isinstance(v, (int | float))]
+    if numeric_fields is None:
+        numeric_fields = [k for k, v in records[0].items() if isinstance(v, (int | float))]
+    if matrix is None:
+        matrix = _vectorise(records, numeric_fields)
+    if class_conditional is None:
+        class_conditional = CLASS_CONDITIONAL
     label_flips = detect_label_flips(records)
-    cluster_outliers = detect_cluster_anomalies(records, numeric_fields)
+    per_class = None
+    if class_conditional:
+        cluster_outliers, suspicion, classes = detect_class_anomalies(
+            records, numeric_fields, matrix
+        )
+        scored = np.flatnonzero(~np.isnan(suspicion))
+        per_class = {
+            "row_suspicion": {
+                "indices": scored.tolist(),
+                "scores": np.round(suspicion[scored], 4).tolist(),
+            },
+            "classes": classes,
+        }
+    else:
+        cluster_outliers = detect_cluster_anomalies(records, numeric_fields, matrix)
     baseline_embeddings = np.random.normal(0, 0.5, size=(10, max(len(numeric_fields), 1)))
-    drift = detect_embedding_drift(records, baseline_embeddings, numeric_fields)
+    drift = detect_embedding_drift(records, baseline_embeddings, numeric_fields, matrix)
     bias_injection = detect_bias_injection(records)
 
     rare_pattern_scanner = [
@@ -102,7 +327,7 @@ def compute_poisoning_risk(records: list[dict[str, Any]]) -> dict[str, Any]:
 
     risk_score = min(100, 10 * len(poison_hits) + drift)
     logger.info("Poisoning risk computed at %.2f", risk_score)
-    return {
+    report = {
         "poisoning_risk_score": round(risk_score, 2),
         "suspected_poison_samples": sorted(poison_hits),
         "signals": {
@@ -114,3 +339,6 @@ def compute_poisoning_risk(records: list[dict[str, Any]]) -> dict[str, Any]:
         },
         "anomaly_visualization": "simulated",
     }
+    if per_class is not None:
+        report["class_conditional"] = per_class
+    return report
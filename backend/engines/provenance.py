@@ -2,12 +2,13 @@
 
 from __future__ import annotations
 
-import json
 from datetime import UTC, datetime
 from pathlib import Path
 from typing import Any
 
 from backend.utils.logger import get_logger
+from backend.utils.metrics import timed
+from backend.utils.storage import list_store
 
 logger = get_logger(__name__)
 
@@ -27,16 +28,14 @@ def record_provenance(
         "timestamp": datetime.now(UTC).isoformat(),
         "metadata": metadata,
     }
-    _append_entry(entry)
+    with timed("persist_provenance"):
+        _append_entry(entry)
     logger.info("Provenance captured for source %s", source)
     return entry
 
 
 def _append_entry(entry: dict[str, Any]) -> None:
-    PROVENANCE_LOG.parent.mkdir(parents=True, exist_ok=True)
-    existing = json.loads(PROVENANCE_LOG.read_text()) if PROVENANCE_LOG.exists() else []
-    existing.append(entry)
-    PROVENANCE_LOG.write_text(json.dumps(existing, indent=2))
+    list_store(PROVENANCE_LOG).append(entry)
 
 
 def provenance_completeness(metadata: dict[str, Any]) -> float:
@@ -5,13 +5,37 @@ from __future__ import annotations
 import math
 import statistics
 from collections import Counter
-from datetime import datetime
+from collections.abc import Sequence
+from itertools import chain
 from typing import Any
 
+import numpy as np
+
+from backend.engines.timestamp_engine import (
+    TimestampColumn,
+    extract_timestamp_column,
+    find_timestamp_anomalies,
+)
+from backend.utils.columnar import ColumnarDataset
+from backend.utils.hash_utils import record_digest
 from backend.utils.logger import get_logger
+from backend.utils.memory import (
+    ROW_WORKING_BYTES,
+    allocate,
+    chunk_bounds,
+    count_repeated,
+    over_budget,
+    percentiles,
+)
+from backend.utils.parallel import DEFAULT_CHUNK_SIZE, map_chunks
 
 logger = get_logger(__name__)
 
+# In-memory cost of one entry in a ``digest_counts`` Counter.
+DIGEST_ENTRY_BYTES = 160
+# Size of a Python float in a list relative to the float64 it came from.
+BOXED_FLOAT_FACTOR = 4
+
 
 class QualityReport:
     """Represents quality metrics and derived score."""
@@ -29,10 +53,74 @@ class QualityReport:
         }
 
 
-def detect_missing(records: list[dict[str, Any]]) -> tuple[int, list[str]]:
+class QualityPartial:
+    """Mergeable quality scan state for a run of records.
+
+    Messages and per-field values are kept in row order and duplicate keys are counted, so
+    combining chunk partials in order reproduces a single pass over the whole dataset.
+    """
+
+    def __init__(
+        self,
+        rows: int = 0,
+        missing: int = 0,
+        missing_messages: list[str] | None = None,
+        digests: Counter[bytes] | None = None,
+        numeric: dict[str, np.ndarray] | None = None,
+        timestamps: dict[str, TimestampColumn] | None = None,
+    ) -> None:
+        self.rows = rows
+        self.missing = missing
+        self.missing_messages = missing_messages or []
+        self.digests = digests or Counter()
+        self.numeric = numeric or {}
+        self.timestamps = timestamps or {}
+
+    @classmethod
+    def combine(cls, partials: Sequence[QualityPartial]) -> QualityPartial:
+        """Return the combined state of ``partials`` taken in order.
+
+        Each column is concatenated once and digests are counted in place, so combining
+        many chunks stays linear in their total size.
+        """
+
+        first = partials[0]
+        digests: Counter[bytes] = Counter()
+        for partial in partials:
+            digests.update(partial.digests)
+        return cls(
+            rows=sum(partial.rows for partial in partials),
+            missing=sum(partial.missing for partial in partials),
+            missing_messages=list(
+                chain.from_iterable(partial.missing_messages for partial in partials)
+            ),
+            digests=digests,
+            numeric={
+                field: np.concatenate([partial.numeric[field] for partial in partials])
+                for field in first.numeric
+            },
+            timestamps={
+                field: TimestampColumn.concat([partial.timestamps[field] for partial in partials])
+                for field in first.timestamps
+            },
+        )
+
+    @property
+    def duplicate_count(self) -> int:
+        """Number of distinct records that occur more than once."""
+
+        return sum(1 for count in self.digests.values() if count > 1)
+
+    def mean(self, field: str) -> float | None:
+        """Mean of the numeric values seen for ``field``, or None when there are none."""
+
+        return _mean(self.numeric[field])
+
+
+def detect_missing(records: list[dict[str, Any]], offset: int = 0) -> tuple[int, list[str]]:
     missing = 0
     violations: list[str] = []
-    for idx, record in enumerate(records):
+    for idx, record in enumerate(records, start=offset):
         for key, value in record.items():
             if value in (None, "", [], {}):
                 missing += 1
@@ -41,41 +129,116 @@ def detect_missing(records: list[dict[str, Any]]) -> tuple[int, list[str]]:
 
 
 def detect_duplicates(records: list[dict[str, Any]]) -> tuple[int, list[str]]:
-    serialised = [tuple(sorted(item.items())) for item in records]
-    counts = Counter(serialised)
-    duplicates = [rec for rec, count in counts.items() if count > 1]
+    return _duplicate_findings(count_duplicates(records))
+
+
+def digest_counts(records: list[dict[str, Any]]) -> Counter[bytes]:
+    """Count each record's ``record_digest``; keys seen more than once are duplicates."""
+
+    return Counter(record_digest(item) for item in records)
+
+
+def count_duplicates(records: list[dict[str, Any]]) -> int:
+    """Number of distinct records that occur more than once.
+
+    Digests are counted in memory unless the counter would exceed the memory budget, in
+    which case they are spilled and counted per hash partition.
+    """
+
+    if not over_budget(len(records) * DIGEST_ENTRY_BYTES):
+        return sum(1 for count in digest_counts(records).values() if count > 1)
+    chunks = (
+        np.frombuffer(b"".join(record_digest(records[idx]) for idx in range(start, stop)), "S16")
+        for start, stop in chunk_bounds(len(records))
+    )
+    return count_repeated(chunks, len(records))
+
+
+def _duplicate_findings(duplicates: int) -> tuple[int, list[str]]:
     if not duplicates:
         return 0, []
-    return len(duplicates), ["Duplicate records detected"]
+    return duplicates, ["Duplicate records detected"]
+
+
+def numeric_values(records: list[dict[str, Any]], field: str) -> np.ndarray:
+    """Return the numeric values of ``field`` in row order, skipping absent or non-numeric."""
+
+    if isinstance(records, ColumnarDataset):
+        column = records.numeric_column(field)
+        if column is not None:
+            return column
+    if over_budget(len(records) * 8):
+        return _spilled_numeric_values(records, field)
+    return np.array(
+        [float(r[field]) for r in records if field in r and isinstance(r[field], (int | float))],
+        dtype=float,
+    )
+
+
+def _spilled_numeric_values(records: list[dict[str, Any]], field: str) -> np.ndarray:
+    values = allocate((len(records),), float, f"column:{field}")
+    count = 0
+    for start, stop in chunk_bounds(len(records)):
+        block = [
+            float(records[idx][field])
+            for idx in range(start, stop)
+            if field in records[idx] and isinstance(records[idx][field], (int | float))
+        ]
+        values[count : count + len(block)] = block
+        count += len(block)
+    return values[:count]
 
 
 def detect_outliers(records: list[dict[str, Any]], numeric_fields: list[str]) -> list[str]:
     issues: list[str] = []
     for field in numeric_fields:
-        values = [
-            float(r[field]) for r in records if field in r and isinstance(r[field], (int | float))
-        ]
-        if len(values) < 4:
-            continue
-        q1, q3 = percentile(values, 25), percentile(values, 75)
-        iqr = q3 - q1
-        lower, upper = q1 - 1.5 * iqr, q3 + 1.5 * iqr
-        for idx, val in enumerate(values):
-            if val < lower or val > upper:
-                issues.append(f"Outlier in {field} value {val} at position {idx}")
+        issues.extend(_outlier_messages(field, numeric_values(records, field)))
     return issues
 
 
+def outlier_mask(values: np.ndarray) -> np.ndarray:
+    """Flag values outside the 1.5 IQR fences; fewer than four values are never flagged."""
+
+    if len(values) < 4:
+        return np.zeros(len(values), dtype=bool)
+    if over_budget(values.nbytes * 2):
+        # Sorting would copy the column: select the quartiles out of core and mask per chunk.
+        q1, q3 = percentiles(values, (25, 75))
+        lower, upper = q1 - 1.5 * (q3 - q1), q3 + 1.5 * (q3 - q1)
+        mask = allocate((len(values),), bool, "outlier_mask")
+        for start, stop in chunk_bounds(len(values)):
+            chunk = values[start:stop]
+            mask[start:stop] = (chunk < lower) | (chunk > upper)
+        return mask
+    ordered = np.sort(values)
+    q1, q3 = _sorted_percentile(ordered, 25), _sorted_percentile(ordered, 75)
+    iqr = q3 - q1
+    lower, upper = q1 - 1.5 * iqr, q3 + 1.5 * iqr
+    return (values < lower) | (values > upper)
+
+
+def _outlier_messages(field: str, values: np.ndarray) -> list[str]:
+    flagged = np.flatnonzero(outlier_mask(values))
+    return [
+        f"Outlier in {field} value {val} at position {idx}"
+        for idx, val in zip(flagged.tolist(), values[flagged].tolist(), strict=True)
+    ]
+
+
 def percentile(data: list[float], percentile_value: float) -> float:
-    if not data:
+    if not len(data):
         return 0.0
-    k = (len(data) - 1) * (percentile_value / 100)
+    return _sorted_percentile(np.sort(np.asarray(data, dtype=float)), percentile_value)
+
+
+def _sorted_percentile(ordered: np.ndarray, percentile_value: float) -> float:
+    k = (len(ordered) - 1) * (percentile_value / 100)
     f = math.floor(k)
     c = math.ceil(k)
     if f == c:
-        return sorted(data)[int(k)]
-    d0 = sorted(data)[int(f)] * (c - k)
-    d1 = sorted(data)[int(c)] * (k - f)
+        return float(ordered[int(k)])
+    d0 = float(ordered[int(f)]) * (c - k)
+    d1 = float(ordered[int(c)]) * (k - f)
     return d0 + d1
 
 
@@ -84,35 +247,35 @@ def detect_timestamp_anomalies(
 ) -> list[str]:
     anomalies: list[str] = []
     for field in timestamp_fields:
-        timestamps: list[datetime] = []
-        for record in records:
-            if field not in record:
-                continue
-            try:
-                timestamps.append(datetime.fromisoformat(str(record[field])))
-            except ValueError:
-                anomalies.append(f"Invalid timestamp format in field {field}")
-        if timestamps:
-            sorted_ts = sorted(timestamps)
-            for i in range(1, len(sorted_ts)):
-                if (sorted_ts[i] - sorted_ts[i - 1]).total_seconds() < 0:
-                    anomalies.append(f"Timestamp order anomaly in field {field}")
+        anomalies.extend(find_timestamp_anomalies(extract_timestamp_column(records, field)))
     return anomalies
 
 
 def detect_distribution_drift(
     records: list[dict[str, Any]], baseline: list[dict[str, Any]], fields: list[str]
+) -> list[str]:
+    current = {field: _mean(numeric_values(records, field)) for field in fields}
+    return _drift_messages(current, baseline, fields)
+
+
+def _mean(values: np.ndarray) -> float | None:
+    if not len(values):
+        return None
+    if over_budget(values.nbytes * BOXED_FLOAT_FACTOR):
+        chunks = (values[start:stop].tolist() for start, stop in chunk_bounds(len(values)))
+        return math.fsum(chain.from_iterable(chunks)) / len(values)
+    return statistics.mean(values.tolist())
+
+
+def _drift_messages(
+    current_means: dict[str, float | None], baseline: list[dict[str, Any]], fields: list[str]
 ) -> list[str]:
     drift_messages: list[str] = []
     for field in fields:
-        current_values = [r.get(field) for r in records if field in r]
-        base_values = [r.get(field) for r in baseline if field in r]
-        if not current_values or not base_values:
+        current_mean = current_means[field]
+        base_mean = _mean(numeric_values(baseline, field))
+        if current_mean is None or base_mean is None:
             continue
-        current_mean = statistics.mean(
-            [float(v) for v in current_values if isinstance(v, (int | float))]
-        )
-        base_mean = statistics.mean([float(v) for v in base_values if isinstance(v, (int | float))])
         if base_mean == 0:
             continue
         shift = abs(current_mean - base_mean) / abs(base_mean)
@@ -123,9 +286,52 @@ def detect_distribution_drift(
     return drift_messages
 
 
+def quality_fields(first: dict[str, Any]) -> tuple[list[str], list[str]]:
+    """Numeric and timestamp fields checked for a dataset, judged from its first record."""
+
+    numeric_fields = [key for key, value in first.items() if isinstance(value, (int | float))]
+    timestamp_fields = [key for key in first if "time" in key or "date" in key]
+    return numeric_fields, timestamp_fields
+
+
+def scan_quality(
+    records: list[dict[str, Any]],
+    offset: int,
+    numeric_fields: list[str],
+    timestamp_fields: list[str],
+    digests: bool = True,
+) -> QualityPartial:
+    """Single pass over a run of records producing mergeable quality state.
+
+    With ``digests`` false the duplicate-detection keys are left empty for the caller to
+    supply, as ``quality_report_from`` does.
+    """
+
+    missing, missing_messages = detect_missing(records, offset)
+    return QualityPartial(
+        rows=len(records),
+        missing=missing,
+        missing_messages=missing_messages,
+        digests=digest_counts(records) if digests else None,
+        numeric={field: numeric_values(records, field) for field in numeric_fields},
+        timestamps={
+            field: extract_timestamp_column(records, field, offset) for field in timestamp_fields
+        },
+    )
+
+
 def generate_quality_report(
-    records: list[dict[str, Any]], baseline: list[dict[str, Any]]
+    records: list[dict[str, Any]],
+    baseline: list[dict[str, Any]],
+    workers: int | None = None,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
 ) -> QualityReport:
+    """Score data quality, optionally scanning row chunks in a process pool.
+
+    Chunk partials are merged in order before any dataset-wide statistic is taken, so a
+    partitioned run returns exactly the report a single-process run would.
+    """
+
     if not records:
         logger.warning("Quality report requested for empty record set")
         return QualityReport(
@@ -134,26 +340,108 @@ def generate_quality_report(
             recommendations=["Provide at least one record to assess quality"],
         )
 
+    numeric_fields, timestamp_fields = quality_fields(records[0])
+    if over_budget(len(records) * ROW_WORKING_BYTES):
+        # Merging chunk partials would hold every column and digest in memory at once.
+        numeric = {field: numeric_values(records, field) for field in numeric_fields}
+        return quality_report_from(
+            records,
+            baseline,
+            numeric_fields,
+            timestamp_fields,
+            numeric,
+            count_duplicates(records),
+            workers,
+            chunk_size,
+        )
+    partials = map_chunks(
+        scan_quality,
+        records,
+        numeric_fields,
+        timestamp_fields,
+        workers=workers,
+        chunk_size=chunk_size,
+    )
+    state = QualityPartial.combine(partials)
+    return finalize_quality_report(state, baseline, numeric_fields, timestamp_fields)
+
+
+def quality_report_from(
+    records: list[dict[str, Any]],
+    baseline: list[dict[str, Any]],
+    numeric_fields: list[str],
+    timestamp_fields: list[str],
+    numeric: dict[str, np.ndarray],
+    duplicate_count: int,
+    workers: int | None = None,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    timestamps: dict[str, TimestampColumn] | None = None,
+) -> QualityReport:
+    """``generate_quality_report`` reusing numeric columns and duplicates computed elsewhere.
+
+    ``numeric`` maps each of ``numeric_fields`` to its ``numeric_values``, and
+    ``duplicate_count`` is ``count_duplicates(records)``. ``timestamps``, when given, maps
+    each of ``timestamp_fields`` to its ``extract_timestamp_column``; otherwise timestamps
+    are scanned here along with missing values.
+    """
+
+    if not records:
+        return generate_quality_report(records, baseline)
+
+    partials = map_chunks(
+        scan_quality,
+        records,
+        [],
+        [] if timestamps is not None else timestamp_fields,
+        False,
+        workers=workers,
+        chunk_size=chunk_size,
+    )
+    state = QualityPartial.combine(partials)
+    state.numeric = numeric
+    if timestamps is not None:
+        state.timestamps = {field: timestamps[field] for field in timestamp_fields}
+    return finalize_quality_report(
+        state, baseline, numeric_fields, timestamp_fields, duplicate_count
+    )
+
+
+def finalize_quality_report(
+    state: QualityPartial,
+    baseline: list[dict[str, Any]],
+    numeric_fields: list[str],
+    timestamp_fields: list[str],
+    duplicate_count: int | None = None,
+) -> QualityReport:
+    """Turn merged scan state into violations, recommendations, and a score.
+
+    ``state`` is a ``QualityPartial`` or anything exposing the same attributes, such as the
+    on-disk state kept by ``backend.engines.incremental``. ``duplicate_count`` overrides
+    ``state.duplicate_count`` when the digests were counted elsewhere.
+    """
+
     violations: list[str] = []
     recommendations: list[str] = []
-    missing, missing_messages = detect_missing(records)
-    violations.extend(missing_messages)
+    violations.extend(state.missing_messages)
 
-    duplicate_count, duplicate_messages = detect_duplicates(records)
+    if duplicate_count is None:
+        duplicate_count = state.duplicate_count
+    duplicate_count, duplicate_messages = _duplicate_findings(duplicate_count)
     violations.extend(duplicate_messages)
 
-    numeric_fields = [key for key, value in records[0].items() if isinstance(value, (int | float))]
-    outlier_messages = detect_outliers(records, numeric_fields)
+    outlier_messages: list[str] = []
+    for field in numeric_fields:
+        outlier_messages.extend(_outlier_messages(field, state.numeric[field]))
     violations.extend(outlier_messages)
 
-    timestamp_fields = [key for key in records[0] if "time" in key or "date" in key]
-    timestamp_messages = detect_timestamp_anomalies(records, timestamp_fields)
-    violations.extend(timestamp_messages)
+    for field in timestamp_fields:
+        violations.extend(find_timestamp_anomalies(state.timestamps[field]))
 
-    drift_messages = detect_distribution_drift(records, baseline, numeric_fields)
+    means = {field: state.mean(field) for field in numeric_fields}
+    drift_messages = _drift_messages(means, baseline, numeric_fields)
     violations.extend(drift_messages)
 
-    if missing:
+    if state.missing:
         recommendations.append("Fill missing values or remove affected records")
     if duplicate_count:
         recommendations.append("Deduplicate dataset before training")
@@ -162,7 +450,7 @@ def generate_quality_report(
     if drift_messages:
         recommendations.append("Recompute baseline or retrain model with new distribution")
 
-    penalty = min(len(violations) * 2 + missing + duplicate_count * 5, 100)
+    penalty = min(len(violations) * 2 + state.missing + duplicate_count * 5, 100)
     score = max(100 - penalty, 0)
     logger.info("Quality score computed at %.2f", score)
     return QualityReport(score=score, violations=violations, recommendations=recommendations)
@@ -0,0 +1,306 @@
+"""Engine registry: engines and the intermediates they share, declared as a dependency DAG.
+
+Every stage names the values it consumes: pipeline inputs (``records``, ``schema``,
+``baseline``) or other stages. A ``PipelineRun`` computes only what its targets need, builds
+each intermediate once per dataset, and drops it as soon as its last consumer has run.
+
+Custom detectors register on ``default_registry`` and reuse the built-in intermediates
+instead of scanning the dataset again::
+
+    @default_registry.engine("wide_rows", requires=("numeric_matrix",))
+    def wide_rows(numeric_matrix):
+        return {"rows": int((abs(numeric_matrix) > 1e6).any(axis=1).sum())}
+
+Their outputs are reported under ``detectors`` in the ``/tdie_score`` response.
+"""
+
+from __future__ import annotations
+
+from collections import Counter
+from collections.abc import Callable, Iterable, Mapping
+from typing import Any, TypeVar
+
+import numpy as np
+
+from backend.engines.bias_engine import _group_metrics, bias_report, run_bias_checks
+from backend.engines.poison_detector import _vectorise, compute_poisoning_risk
+from backend.engines.quality_checker import (
+    QualityReport,
+    count_duplicates,
+    numeric_values,
+    quality_fields,
+    quality_report_from,
+)
+from backend.engines.schema_validator import DatasetSchema, SchemaViolation
+from backend.engines.timestamp_engine import TimestampColumn, extract_timestamp_column
+from backend.utils.logger import get_logger
+from backend.utils.metrics import timed
+from backend.utils.schema_registry import validator_for
+
+logger = get_logger(__name__)
+
+StageFunc = TypeVar("StageFunc", bound=Callable[..., Any])
+
+# Values a run is started with rather than computed by a stage.
+PIPELINE_INPUTS = ("records", "schema", "baseline")
+# Engines whose outputs make up the TDIE score; any other registered engine is a detector.
+BUILTIN_ENGINES = ("schema_validate", "quality_report", "bias_checks", "poisoning_risk")
+
+
+class Stage:
+    """A named computation whose keyword arguments are the outputs it requires."""
+
+    def __init__(
+        self, name: str, func: Callable[..., Any], requires: tuple[str, ...], engine: bool
+    ) -> None:
+        self.name = name
+        self.func = func
+        self.requires = requires
+        self.engine = engine
+
+
+class EngineRegistry:
+    """Registered engines and intermediates, resolved into a plan per set of targets."""
+
+    def __init__(self) -> None:
+        self._stages: dict[str, Stage] = {}
+
+    def register(
+        self,
+        name: str,
+        func: Callable[..., Any],
+        requires: Iterable[str] = (),
+        engine: bool = False,
+    ) -> None:
+        """Add a stage; ``func`` is called with one keyword argument per required name."""
+
+        if name in self._stages or name in PIPELINE_INPUTS:
+            raise ValueError(f"Stage {name} is already registered")
+        self._stages[name] = Stage(name, func, tuple(requires), engine)
+
+    def intermediate(
+        self, name: str, requires: Iterable[str] = ()
+    ) -> Callable[[StageFunc], StageFunc]:
+        """Decorator registering a shared intermediate."""
+
+        def decorate(func: StageFunc) -> StageFunc:
+            self.register(name, func, requires)
+            return func
+
+        return decorate
+
+    def engine(self, name: str, requires: Iterable[str] = ()) -> Callable[[StageFunc], StageFunc]:
+        """Decorator registering an engine whose output is reported."""
+
+        def decorate(func: StageFunc) -> StageFunc:
+            self.register(name, func, requires, engine=True)
+            return func
+
+        return decorate
+
+    def unregister(self, name: str) -> None:
+        """Remove a stage, for example a detector registered by a test."""
+
+        del self._stages[name]
+
+    @property
+    def engines(self) -> list[str]:
+        """Names of the registered engines in registration order."""
+
+        return [stage.name for stage in self._stages.values() if stage.engine]
+
+    def plan(self, targets: Iterable[str]) -> list[Stage]:
+        """Return the stages needed for ``targets``, each after everything it requires."""
+
+        ordered: list[Stage] = []
+        state: dict[str, str] = {}
+
+        def visit(name: str, chain: tuple[str, ...]) -> None:
+            if name in PIPELINE_INPUTS or state.get(name) == "done":
+                return
+            if state.get(name) == "visiting":
+                raise ValueError(f"Dependency cycle: {' -> '.join((*chain, name))}")
+            if name not in self._stages:
+                raise ValueError(f"Unknown stage {name}")
+            state[name] = "visiting"
+            for dependency in self._stages[name].requires:
+                visit(dependency, (*chain, name))
+            state[name] = "done"
+            ordered.append(self._stages[name])
+
+        for target in targets:
+            visit(target, ())
+        return ordered
+
+    def start(self, inputs: Mapping[str, Any], targets: Iterable[str]) -> PipelineRun:
+        """Begin a run over ``inputs`` that will compute ``targets`` on demand."""
+
+        targets = list(targets)
+        return PipelineRun(self.plan(targets), inputs, targets)
+
+
+class PipelineRun:
+    """One dataset's pass through a plan, holding intermediates only while still needed."""
+
+    def __init__(
+        self, plan: list[Stage], inputs: Mapping[str, Any], targets: Iterable[str]
+    ) -> None:
+        self._stages = {stage.name: stage for stage in plan}
+        self._values: dict[str, Any] = dict(inputs)
+        self._inputs = frozenset(inputs)
+        self._targets = dict.fromkeys(targets)
+        # Outstanding consumers per value; a target counts as one consumer of itself.
+        self._consumers = Counter(dep for stage in plan for dep in stage.requires)
+        self._consumers.update(list(self._targets))
+        records = inputs.get("records")
+        self._rows = None if records is None else len(records)
+
+    @property
+    def held(self) -> list[str]:
+        """Computed values still in memory, excluding the run's inputs."""
+
+        return [name for name in self._values if name not in self._inputs]
+
+    def result(self, target: str) -> Any:
+        """Compute ``target`` and whatever it needs, then hand its value over to the caller."""
+
+        if target not in self._targets:
+            raise ValueError(f"{target} is not a target of this run")
+        self._ensure(target)
+        value = self._values[target]
+        del self._targets[target]
+        self._release(target)
+        return value
+
+    def run(self) -> dict[str, Any]:
+        """Compute every remaining target in the order the run was started with."""
+
+        return {target: self.result(target) for target in list(self._targets)}
+
+    def _ensure(self, name: str) -> None:
+        if name in self._values:
+            return
+        stage = self._stages[name]
+        for dependency in stage.requires:
+            self._ensure(dependency)
+        arguments = {dependency: self._values[dependency] for dependency in stage.requires}
+        with timed(name, self._rows):
+            self._values[name] = stage.func(**arguments)
+        for dependency in stage.requires:
+            self._release(dependency)
+
+    def _release(self, name: str) -> None:
+        self._consumers[name] -= 1
+        if self._consumers[name] <= 0 and name not in self._inputs:
+            self._values.pop(name, None)
+
+
+default_registry = EngineRegistry()
+
+
+@default_registry.intermediate("numeric_fields", requires=("records",))
+def numeric_fields(records: Any) -> list[str]:
+    """Numeric fields of the first record, shared by the quality and poisoning engines."""
+
+    return quality_fields(records[0])[0] if len(records) else []
+
+
+@default_registry.intermediate("timestamp_fields", requires=("records",))
+def timestamp_fields(records: Any) -> list[str]:
+    return quality_fields(records[0])[1] if len(records) else []
+
+
+@default_registry.intermediate(
+    "timestamp_columns", requires=("records", "schema", "timestamp_fields")
+)
+def timestamp_columns(
+    records: Any, schema: DatasetSchema, timestamp_fields: list[str]
+) -> dict[str, TimestampColumn]:
+    """Schema datetime fields and quality timestamp fields, each parsed once for both engines."""
+
+    declared = [field.name for field in schema.fields if field.dtype == "datetime"]
+    return {
+        field: extract_timestamp_column(records, field)
+        for field in dict.fromkeys([*declared, *timestamp_fields])
+    }
+
+
+@default_registry.intermediate("numeric_columns", requires=("records", "numeric_fields"))
+def numeric_columns(records: Any, numeric_fields: list[str]) -> dict[str, np.ndarray]:
+    """Present numeric values per field in row order (``numeric_values``)."""
+
+    return {field: numeric_values(records, field) for field in numeric_fields}
+
+
+@default_registry.intermediate("numeric_matrix", requires=("records", "numeric_fields"))
+def numeric_matrix(records: Any, numeric_fields: list[str]) -> np.ndarray:
+    """Row-aligned float matrix of the numeric fields, absent values as 0."""
+
+    return _vectorise(records, numeric_fields)
+
+
+@default_registry.intermediate("duplicate_count", requires=("records",))
+def duplicate_count(records: Any) -> int:
+    """Distinct records occurring more than once, spilled to disk over the memory budget."""
+
+    return count_duplicates(records)
+
+
+@default_registry.intermediate("group_counts", requires=("records",))
+def group_counts(records: Any) -> dict[str, dict[str, float]]:
+    """Per-group label counts over the default ``group``/``label`` fields."""
+
+    return _group_metrics(records, "label", "group")
+
+
+@default_registry.engine("schema_validate", requires=("records", "schema", "timestamp_columns"))
+def schema_validate(
+    records: Any, schema: DatasetSchema, timestamp_columns: dict[str, TimestampColumn]
+) -> list[SchemaViolation]:
+    return validator_for(schema).validate(records, timestamps=timestamp_columns)
+
+
+@default_registry.engine(
+    "quality_report",
+    requires=(
+        "records",
+        "baseline",
+        "numeric_fields",
+        "timestamp_fields",
+        "timestamp_columns",
+        "numeric_columns",
+        "duplicate_count",
+    ),
+)
+def quality_report(
+    records: Any,
+    baseline: Any,
+    numeric_fields: list[str],
+    timestamp_fields: list[str],
+    timestamp_columns: dict[str, TimestampColumn],
+    numeric_columns: dict[str, np.ndarray],
+    duplicate_count: int,
+) -> QualityReport:
+    return quality_report_from(
+        records,
+        baseline,
+        numeric_fields,
+        timestamp_fields,
+        numeric_columns,
+        duplicate_count,
+        timestamps=timestamp_columns,
+    )
+
+
+@default_registry.engine("bias_checks", requires=("records", "group_counts"))
+def bias_checks(records: Any, group_counts: dict[str, dict[str, float]]) -> dict[str, Any]:
+    if not len(records):
+        return run_bias_checks(records)
+    return bias_report(group_counts)
+
+
+@default_registry.engine("poisoning_risk", requires=("records", "numeric_fields", "numeric_matrix"))
+def poisoning_risk(
+    records: Any, numeric_fields: list[str], numeric_matrix: np.ndarray
+) -> dict[str, Any]:
+    return compute_poisoning_risk(records, numeric_fields, numeric_matrix)
@@ -0,0 +1,477 @@
+"""Approximate evaluation over a random sample, reported with confidence intervals.
+
+Engines run on ``SampleSpec.size`` rows, drawn either uniformly without replacement or
+stratified by a group column with proportional allocation. Uniform drawing is the same as
+a reservoir sample, but it picks indices directly because loaded datasets allow random
+access. Engine cost depends on the sample size, not the dataset size. Two exceptions:
+stratification reads the group column once, and inline JSON payloads are still decoded
+in full.
+
+Intervals are taken at ``SampleSpec.confidence``:
+
+* Poisoning-suspect proportions use the Wilson score interval.
+* Quality and schema penalties use a Wilson interval on the share of affected rows,
+  scaled up to the dataset size.
+* Fairness metrics are bounded over simultaneous Wilson intervals for each group's
+  positive rate and share.
+* Embedding drift propagates the per-feature standard errors of the mean.
+
+Quality and schema penalties grow with absolute counts, so the sample's counts are
+extrapolated to the dataset size. Duplicates are the exception. A duplicate pair lands in
+the sample with probability of about (n/N)^2, so the sampled count is a lower bound and
+the point estimate scales it by (N/n)^2. A sample with no duplicates cannot rule them out.
+
+For the same reason, a clean sample of a large dataset cannot rule out the handful of
+violations that would change the decision. Such requests escalate to a full scan. Data
+that is clearly bad is rejected from the sample alone. Set ``escalate`` to false to get
+the estimate without the full scan.
+"""
+
+from __future__ import annotations
+
+import math
+import re
+from collections.abc import Mapping, Sequence
+from statistics import NormalDist
+from typing import Any
+
+import numpy as np
+
+from backend.engines.bias_engine import _group_metrics, bias_report
+from backend.engines.pipeline import (
+    DatasetEvaluation,
+    assemble_report,
+    record_submission,
+    run_tdie_pipeline,
+    submission_completeness,
+)
+from backend.engines.poison_detector import _vectorise, compute_poisoning_risk
+from backend.engines.quality_checker import (
+    QualityReport,
+    finalize_quality_report,
+    outlier_mask,
+    quality_fields,
+    scan_quality,
+)
+from backend.engines.schema_validator import DatasetSchema, SchemaValidator, SchemaViolation
+from backend.engines.tdie_scorer import SEVERITY_MAP, combine_scores, schema_penalty
+from backend.utils.blocklist import screen_dataset
+from backend.utils.columnar import ColumnarDataset
+from backend.utils.data_loader import SampleSpec
+from backend.utils.history import record_run
+from backend.utils.logger import get_logger
+from backend.utils.metrics import timed
+from backend.utils.schema_registry import validator_for
+
+logger = get_logger(__name__)
+
+_RECORD_INDEX = re.compile(r"Record (\d+) ")
+
+Interval = tuple[float, float]
+
+
+def _z(confidence: float) -> float:
+    return NormalDist().inv_cdf(0.5 + confidence / 2)
+
+
+def wilson_interval(successes: int, trials: int, confidence: float) -> Interval:
+    """Wilson score interval for a binomial proportion."""
+
+    if not trials:
+        return 0.0, 1.0
+    z = _z(confidence)
+    p = successes / trials
+    denominator = 1 + z * z / trials
+    centre = (p + z * z / (2 * trials)) / denominator
+    half = z * math.sqrt(p * (1 - p) / trials + z * z / (4 * trials * trials)) / denominator
+    return max(0.0, centre - half), min(1.0, centre + half)
+
+
+def total_interval(
+    per_row: np.ndarray, population: int, confidence: float, unit: float
+) -> tuple[float, Interval]:
+    """Extrapolate a per-row count to ``population`` rows, with an interval.
+
+    The share of affected rows gets a Wilson interval, which is then scaled by the mean
+    amount per affected row (``unit`` when the sample has none). A sample with no affected
+    rows therefore still gives an upper bound above zero. The lower bound never falls
+    below what the sample itself contains.
+    """
+
+    affected = per_row > 0
+    rows = int(affected.sum())
+    low_rate, high_rate = wilson_interval(rows, len(per_row), confidence)
+    per_affected = float(per_row[affected].mean()) if rows else unit
+    observed = float(per_row.sum())
+    point = observed * population / len(per_row)
+    low = max(observed, population * low_rate * per_affected)
+    high = max(point, population * high_rate * per_affected)
+    return point, (low, high)
+
+
+def _strata(records: Sequence[dict[str, Any]], field: str) -> np.ndarray:
+    if isinstance(records, ColumnarDataset):
+        strata = np.full(len(records), "unknown", dtype=object)
+        if records.has_column(field):
+            positions = records.present_positions(field)
+            strata[positions] = np.asarray(records.column(field))[positions].astype(str)
+        return strata
+    return np.array([str(record.get(field, "unknown")) for record in records], dtype=object)
+
+
+def _stratified_indices(
+    records: Sequence[dict[str, Any]], spec: SampleSpec, rng: np.random.Generator
+) -> np.ndarray:
+    """Proportional allocation per stratum, rounding by largest remainder."""
+
+    _, inverse = np.unique(_strata(records, spec.stratify_by), return_inverse=True)
+    sizes = np.bincount(inverse)
+    exact = sizes * spec.size / len(records)
+    quotas = np.floor(exact).astype(int)
+    shortfall = spec.size - int(quotas.sum())
+    quotas[np.argsort(quotas - exact, kind="stable")[:shortfall]] += 1
+    order = np.argsort(inverse, kind="stable")
+    starts = np.concatenate(([0], np.cumsum(sizes)[:-1]))
+    picks = [
+        order[start : start + size][rng.choice(size, quota, replace=False)]
+        for start, size, quota in zip(starts, sizes, quotas, strict=True)
+        if quota
+    ]
+    return np.sort(np.concatenate(picks))
+
+
+def draw_sample(
+    records: Sequence[dict[str, Any]], spec: SampleSpec
+) -> tuple[Sequence[dict[str, Any]], np.ndarray | None]:
+    """Return ``(sample, row_indices)``; indices are None when the sample is the whole dataset."""
+
+    if spec.size >= len(records):
+        return records, None
+    rng = np.random.default_rng(spec.seed)
+    if spec.method == "stratified":
+        indices = _stratified_indices(records, spec, rng)
+    else:
+        indices = np.sort(rng.choice(len(records), spec.size, replace=False))
+    if isinstance(records, ColumnarDataset):
+        return records.take(indices), indices
+    return [records[i] for i in indices.tolist()], indices
+
+
+def _record_rows(messages: Sequence[str], rows: int) -> np.ndarray:
+    """Count messages per record from their ``Record <index>`` prefix."""
+
+    hits = [int(match.group(1)) for match in map(_RECORD_INDEX.match, messages) if match]
+    return np.bincount(np.asarray(hits, dtype=np.int64), minlength=rows)
+
+
+def estimate_schema(
+    validator: SchemaValidator, sample: Sequence[dict[str, Any]], population: int, confidence: float
+) -> tuple[list[SchemaViolation], dict[str, tuple[float, Interval]]]:
+    """Sample violations plus extrapolated penalty and count, each with an interval."""
+
+    violations = validator.validate_rows(sample)
+    n = len(sample)
+    penalties = np.zeros(n)
+    counts = np.zeros(n)
+    for violation in violations:
+        match = _RECORD_INDEX.match(violation.message)
+        if match:
+            penalties[int(match.group(1))] += SEVERITY_MAP.get(violation.severity, 5)
+            counts[int(match.group(1))] += 1
+    shape = validator.validate_dataset_shape(population)
+    estimates: dict[str, tuple[float, Interval]] = {}
+    for name, per_row, fixed, unit in (
+        ("schema_penalty", penalties, schema_penalty(shape), SEVERITY_MAP["ERROR"]),
+        ("schema_violation_count", counts, len(shape), 1),
+    ):
+        point, (low, high) = total_interval(per_row, population, confidence, unit)
+        estimates[name] = (point + fixed, (low + fixed, high + fixed))
+    return violations + shape, estimates
+
+
+def _quality_score(penalty: float) -> float:
+    return max(100 - min(penalty, 100), 0)
+
+
+def estimate_quality(
+    records: Sequence[dict[str, Any]],
+    sample: Sequence[dict[str, Any]],
+    baseline: Sequence[dict[str, Any]],
+    confidence: float,
+) -> tuple[QualityReport, Interval]:
+    """Quality report of the sample with its score extrapolated to the whole dataset."""
+
+    population, n = len(records), len(sample)
+    numeric_fields, timestamp_fields = quality_fields(records[0])
+    state = scan_quality(sample, 0, numeric_fields, timestamp_fields)
+    report = finalize_quality_report(state, list(baseline), numeric_fields, timestamp_fields)
+
+    missing = _record_rows(state.missing_messages, n)
+    flagged = np.zeros(n)  # outlier values and unparseable timestamps, one message each
+    for field in numeric_fields:
+        positions = [
+            i for i, record in enumerate(sample) if isinstance(record.get(field), (int | float))
+        ]
+        values = np.array([float(sample[i][field]) for i in positions], dtype=float)
+        np.add.at(flagged, np.asarray(positions, dtype=np.int64)[outlier_mask(values)], 1)
+    for field in timestamp_fields:
+        column = state.timestamps[field]
+        np.add.at(flagged, column.positions[~column.valid], 1)
+
+    # Each row-level message costs 2 points and each missing value 1 more.
+    per_row = 3 * missing + 2 * flagged
+    dataset_messages = len(report.violations) - int(missing.sum() + flagged.sum())
+    duplicates = state.duplicate_count
+    scaled_duplicates = min(duplicates * (population / n) ** 2, population // 2)
+    fixed = 2 * dataset_messages + 5 * duplicates
+    scaled_fixed = 2 * dataset_messages + 5 * scaled_duplicates
+    point, (low, high) = total_interval(per_row, population, confidence, unit=2)
+    point += scaled_fixed
+    lowest, highest = low + fixed, high + scaled_fixed
+    estimate = QualityReport(
+        score=_quality_score(point),
+        violations=report.violations,
+        recommendations=report.recommendations,
+    )
+    return estimate, (_quality_score(highest), _quality_score(lowest))
+
+
+def _spread_bounds(lows: np.ndarray, highs: np.ndarray) -> Interval:
+    """Bounds on the standard deviation of rates known only to lie in ``[lows, highs]``.
+
+    The minimum clips every rate towards a common value, found by fixed-point iteration.
+    The maximum pushes each rate to the end of its interval furthest from the centre.
+    """
+
+    centre = float(((lows + highs) / 2).mean())
+    for _ in range(50):
+        centre = float(np.clip(centre, lows, highs).mean())
+    furthest = np.where(highs - centre > centre - lows, highs, lows)
+    return float(np.std(np.clip(centre, lows, highs))), float(np.std(furthest))
+
+
+def estimate_bias(
+    sample: Sequence[dict[str, Any]],
+    confidence: float,
+    sensitive_field: str = "group",
+    label_field: str = "label",
+) -> tuple[dict[str, Any], dict[str, Interval]]:
+    """Fairness metrics of the sample with intervals from per-group Wilson bounds.
+
+    Each group's positive rate and population share gets a Wilson interval at a
+    Bonferroni-adjusted level, so all of them hold together at ``confidence``. Gaps, the
+    pooled index, imbalance and the score are then bounded by their extreme values over
+    those intervals. Bootstrap intervals cover poorly here, because max-min gaps between
+    nearly equal rates are biased upwards in a sample.
+    """
+
+    counts = _group_metrics(sample, label_field, sensitive_field)
+    report = bias_report(counts)
+    group_confidence = 1 - (1 - confidence) / len(counts)
+    rates = np.array(
+        [wilson_interval(c["positives"], c["total"], group_confidence) for c in counts.values()]
+    )
+    shares = np.array(
+        [wilson_interval(c["total"], len(sample), group_confidence) for c in counts.values()]
+    )
+    gap = (max(0.0, rates[:, 0].max() - rates[:, 1].min()), rates[:, 1].max() - rates[:, 0].min())
+    pooled = _spread_bounds(rates[:, 0], rates[:, 1])
+    # Imbalance is 100 * (1 - smallest share / largest share).
+    ratio_high = min(1.0, shares[:, 1].min() / shares[:, 0].max())
+    ratio_low = shares[:, 0].min() / shares[:, 1].max()
+    imbalance = (100 * (1 - ratio_high), 100 * (1 - ratio_low))
+    intervals = {
+        "demographic_parity_gap": gap,
+        "equal_opportunity_gap": gap,
+        "pooled_fairness_index": pooled,
+        "sensitive_feature_imbalance": imbalance,
+        "bias_integrity_score": (
+            max(0.0, 100 - (2 * gap[1] + pooled[1]) * 50 - imbalance[1]),
+            max(0.0, 100 - (2 * gap[0] + pooled[0]) * 50 - imbalance[0]),
+        ),
+    }
+    return report, intervals
+
+
+def estimate_poisoning(
+    sample: Sequence[dict[str, Any]],
+    indices: np.ndarray | None,
+    population: int,
+    confidence: float,
+) -> tuple[dict[str, Any], dict[str, Interval]]:
+    """Poisoning risk extrapolated from the sample's suspect rate, indices in dataset rows."""
+
+    numeric_fields = [k for k, v in sample[0].items() if isinstance(v, (int | float))]
+    matrix = _vectorise(sample, numeric_fields)
+    report = compute_poisoning_risk(sample, numeric_fields, matrix)
+    n = len(sample)
+    suspects = len(report["suspected_poison_samples"])
+    low, high = wilson_interval(suspects, n, confidence)
+    drift = float(report["signals"]["embedding_drift"])
+    spread = 0.0
+    if n > 1 and population > 1:
+        fpc = math.sqrt(max(0.0, (population - n) / (population - 1)))
+        standard_errors = matrix.std(axis=0, ddof=1) / math.sqrt(n) * fpc
+        spread = _z(confidence) * float(np.linalg.norm(standard_errors))
+
+    def risk(rate: float, drift_value: float) -> float:
+        return min(100.0, 10 * population * rate + drift_value)
+
+    report["poisoning_risk_score"] = round(risk(suspects / n, drift), 2)
+    if indices is not None:
+        report["suspected_poison_samples"] = indices[report["suspected_poison_samples"]].tolist()
+        for name, value in report["signals"].items():
+            if isinstance(value, list):
+                report["signals"][name] = indices[value].tolist()
+        if "class_conditional" in report:
+            scored = report["class_conditional"]["row_suspicion"]
+            scored["indices"] = indices[scored["indices"]].tolist()
+    intervals = {
+        "poisoning_risk_score": (risk(low, max(0.0, drift - spread)), risk(high, drift + spread)),
+        "embedding_drift": (max(0.0, drift - spread), drift + spread),
+    }
+    return report, intervals
+
+
+def _sampling_block(
+    spec: SampleSpec,
+    population: int,
+    indices: np.ndarray | None,
+    intervals: Mapping[str, Interval],
+) -> dict[str, Any]:
+    return {
+        "method": spec.method,
+        "sample_size": population if indices is None else len(indices),
+        "population": population,
+        "confidence": spec.confidence,
+        "seed": spec.seed,
+        "row_indices": None if indices is None else indices.tolist(),
+        "intervals": {name: [round(lo, 4), round(hi, 4)] for name, (lo, hi) in intervals.items()},
+        "escalated": False,
+    }
+
+
+def approximate_validation(
+    schema: DatasetSchema,
+    records: Sequence[dict[str, Any]],
+    spec: SampleSpec,
+    baseline: Sequence[dict[str, Any]],
+) -> dict[str, Any]:
+    """``/validate_dataset`` over a sample; record numbers refer to ``row_indices``."""
+
+    sample, indices = draw_sample(records, spec)
+    with timed("schema_validate", len(sample)):
+        violations, schema_estimates = estimate_schema(
+            validator_for(schema), sample, len(records), spec.confidence
+        )
+    with timed("quality_report", len(sample)):
+        quality, quality_interval = estimate_quality(records, sample, baseline, spec.confidence)
+    intervals = {
+        "quality_score": quality_interval,
+        "schema_violation_count": schema_estimates["schema_violation_count"][1],
+    }
+    return {
+        "schema_violations": [v.dict() for v in violations],
+        **quality.to_dict(),
+        "sampling": _sampling_block(spec, len(records), indices, intervals),
+    }
+
+
+def approximate_bias(records: Sequence[dict[str, Any]], spec: SampleSpec) -> dict[str, Any]:
+    """``/bias_check`` over a sample."""
+
+    sample, indices = draw_sample(records, spec)
+    with timed("bias_checks", len(sample)):
+        report, intervals = estimate_bias(sample, spec.confidence)
+    return {**report, "sampling": _sampling_block(spec, len(records), indices, intervals)}
+
+
+def approximate_poisoning(records: Sequence[dict[str, Any]], spec: SampleSpec) -> dict[str, Any]:
+    """``/poison_detect`` over a sample."""
+
+    sample, indices = draw_sample(records, spec)
+    with timed("poisoning_risk", len(sample)):
+        report, intervals = estimate_poisoning(sample, indices, len(records), spec.confidence)
+    return {**report, "sampling": _sampling_block(spec, len(records), indices, intervals)}
+
+
+def approximate_tdie(
+    schema: DatasetSchema,
+    records: Sequence[dict[str, Any]],
+    submission: Mapping[str, Any],
+    spec: SampleSpec,
+) -> dict[str, Any]:
+    """``/tdie_score`` over a sample, escalating to a full scan near a decision threshold.
+
+    The TDIE interval combines the most pessimistic and most optimistic engine bounds.
+    When its ends fall on different decisions, or straddle ``spec.gate_threshold``, the
+    full pipeline runs instead (unless ``spec.escalate`` is off).
+    """
+
+    sample, indices = draw_sample(records, spec)
+    population, confidence = len(records), spec.confidence
+    if indices is None:
+        report = run_tdie_pipeline(schema, records, submission)
+        report["sampling"] = _sampling_block(spec, population, None, {})
+        return report
+
+    rows = len(sample)
+    with timed("schema_validate", rows):
+        violations, schema_estimates = estimate_schema(
+            validator_for(schema), sample, population, confidence
+        )
+    with timed("quality_report", rows):
+        # The full pipeline compares the dataset with itself, so the sample is its own baseline.
+        quality, quality_interval = estimate_quality(records, sample, sample, confidence)
+    with timed("bias_checks", rows):
+        bias, bias_intervals = estimate_bias(sample, confidence)
+    with timed("poisoning_risk", rows):
+        poison, poison_intervals = estimate_poisoning(sample, indices, population, confidence)
+
+    provenance = submission_completeness(schema, submission)
+    penalty, (penalty_low, penalty_high) = schema_estimates["schema_penalty"]
+    count, (count_low, count_high) = schema_estimates["schema_violation_count"]
+    risk_low, risk_high = poison_intervals["poisoning_risk_score"]
+    bias_low, bias_high = bias_intervals["bias_integrity_score"]
+    point = combine_scores(
+        quality.score,
+        poison["poisoning_risk_score"],
+        bias["bias_integrity_score"],
+        penalty,
+        round(count),
+        provenance,
+    )
+    worst = combine_scores(
+        quality_interval[0], risk_high, bias_low, penalty_high, math.ceil(count_high), provenance
+    )
+    best = combine_scores(
+        quality_interval[1], risk_low, bias_high, penalty_low, math.floor(count_low), provenance
+    )
+    intervals = {
+        "tdie_score": (worst["tdie_score"], best["tdie_score"]),
+        "quality_score": quality_interval,
+        "schema_violation_count": (count_low, count_high),
+        **bias_intervals,
+        **poison_intervals,
+    }
+    undecided = worst["decision"] != best["decision"] or (
+        worst["tdie_score"] < spec.gate_threshold <= best["tdie_score"]
+    )
+    if undecided and spec.escalate:
+        logger.info(
+            "Sampled TDIE interval %.2f-%.2f is inconclusive; running a full scan",
+            worst["tdie_score"],
+            best["tdie_score"],
+        )
+        screen_dataset(records, population)  # load_dataset screened only sampled blocks
+        report = run_tdie_pipeline(schema, records, submission)
+        block = _sampling_block(spec, population, indices, intervals)
+        report["sampling"] = {**block, "row_indices": None, "escalated": True}
+        return report
+
+    evaluation = DatasetEvaluation(population, violations, quality, bias, poison)
+    report = assemble_report(schema, evaluation, submission, record_submission(schema, submission))
+    report.update(point)
+    report["sampling"] = _sampling_block(spec, population, indices, intervals)
+    record_run(schema.name, report, population, sampled=True)
+    return report
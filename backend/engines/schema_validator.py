@@ -2,15 +2,35 @@
 
 from __future__ import annotations
 
-from datetime import datetime
+from collections.abc import Mapping
 from typing import Any
 
+import numpy as np
 from pydantic import BaseModel, validator
 
+from backend.engines.timestamp_engine import (
+    TimestampColumn,
+    extract_timestamp_column,
+    is_timestamp,
+    timestamp_validity,
+)
+from backend.utils.columnar import ColumnarDataset
 from backend.utils.logger import get_logger
+from backend.utils.parallel import DEFAULT_CHUNK_SIZE, map_chunks
 
 logger = get_logger(__name__)
 
+# First block size for ``validate_until``; later blocks double up to DEFAULT_CHUNK_SIZE.
+EARLY_EXIT_BLOCK_ROWS = 1024
+
+# Python value types that satisfy each declared dtype (bool is deliberately not an int here).
+_DTYPE_TYPES: dict[str, frozenset[type]] = {
+    "int": frozenset({int}),
+    "float": frozenset({int, float}),
+    "str": frozenset({str}),
+    "bool": frozenset({bool}),
+}
+
 
 class FieldSchema(BaseModel):
     name: str
@@ -47,12 +67,123 @@ class SchemaValidator:
     def __init__(self, dataset_schema: DatasetSchema) -> None:
         self.schema = dataset_schema
         self.field_map = {field.name: field for field in dataset_schema.fields}
+        # Compiled once per contract: set lookups for allowed values where they are hashable.
+        self.allowed_sets: dict[str, frozenset[Any] | None] = {}
+        for field in dataset_schema.fields:
+            if field.allowed_values:
+                try:
+                    self.allowed_sets[field.name] = frozenset(field.allowed_values)
+                except TypeError:
+                    self.allowed_sets[field.name] = None
+
+    def _is_allowed(self, field: FieldSchema, value: Any) -> bool:
+        allowed = self.allowed_sets.get(field.name)
+        if allowed is not None:
+            try:
+                return value in allowed
+            except TypeError:  # unhashable value: fall back to equality against the list
+                pass
+        return value in field.allowed_values
 
-    def validate(self, records: list[dict[str, Any]]) -> list[SchemaViolation]:
-        """Check each record against schema rules and report violations."""
+    def validate(
+        self,
+        records: list[dict[str, Any]],
+        workers: int | None = None,
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+        timestamps: Mapping[str, TimestampColumn] | None = None,
+    ) -> list[SchemaViolation]:
+        """Check each record against schema rules and report violations.
+
+        With ``workers`` above one, row chunks are validated in a process pool and their
+        violations concatenated in chunk order, matching a single-process run exactly.
+        ``timestamps`` holds datetime fields already parsed over all of ``records`` by
+        ``extract_timestamp_column``; those are not parsed again, and each chunk is sent
+        only its own rows of them.
+        """
+
+        def chunk_timestamps(start: int, stop: int) -> tuple[dict[str, TimestampColumn]]:
+            return ({name: column.window(start, stop) for name, column in timestamps.items()},)
 
         violations: list[SchemaViolation] = []
-        for idx, record in enumerate(records):
+        for partial in map_chunks(
+            _validate_chunk,
+            records,
+            self,
+            workers=workers,
+            chunk_size=chunk_size,
+            chunk_args=chunk_timestamps if timestamps else None,
+        ):
+            violations.extend(partial)
+        violations.extend(self.validate_dataset_shape(len(records)))
+        logger.info("Schema validation produced %d violations", len(violations))
+        return violations
+
+    def validate_until(
+        self, records: list[dict[str, Any]], limit: int
+    ) -> tuple[list[SchemaViolation], int]:
+        """Validate row blocks in order, stopping once more than ``limit`` violations are found.
+
+        Returns the violations and the number of rows checked. Blocks start small and double,
+        so a dataset that breaks its contract early is rejected after a few rows while a clean
+        one costs about as much as ``validate``.
+        """
+
+        shape = self.validate_dataset_shape(len(records))
+        violations: list[SchemaViolation] = []
+        checked = 0
+        block = EARLY_EXIT_BLOCK_ROWS
+        while checked < len(records) and len(violations) + len(shape) <= limit:
+            violations.extend(self.validate_rows(records[checked : checked + block], checked))
+            checked = min(checked + block, len(records))
+            block = min(block * 2, DEFAULT_CHUNK_SIZE)
+        violations.extend(shape)
+        logger.info(
+            "Schema validation produced %d violations in %d of %d records",
+            len(violations),
+            checked,
+            len(records),
+        )
+        return violations, checked
+
+    def validate_dataset_shape(self, row_count: int) -> list[SchemaViolation]:
+        """Dataset-level checks that depend only on the total number of records."""
+
+        if self.schema.expected_records and row_count != self.schema.expected_records:
+            return [
+                SchemaViolation(
+                    field="dataset",
+                    message="Record count deviates from expected",
+                    severity="WARN",
+                )
+            ]
+        return []
+
+    def validate_rows(
+        self,
+        records: list[dict[str, Any]],
+        offset: int = 0,
+        timestamps: Mapping[str, TimestampColumn] | None = None,
+    ) -> list[SchemaViolation]:
+        """Check a run of records whose first element is record ``offset`` of the dataset.
+
+        ``timestamps`` are parsed datetime fields of the whole dataset, as for ``validate``.
+        """
+
+        parsed = {
+            name: column.slice(offset, offset + len(records))
+            for name, column in (timestamps or {}).items()
+        }
+        if isinstance(records, ColumnarDataset):
+            return self._validate_columnar(records, offset, parsed)
+
+        violations: list[SchemaViolation] = []
+        datetime_masks = {
+            field.name: timestamp_validity(records, field.name, parsed.get(field.name))
+            for field in self.schema.fields
+            if field.dtype == "datetime"
+        }
+        for local_idx, record in enumerate(records):
+            idx = local_idx + offset
             for field in self.schema.fields:
                 if field.required and field.name not in record:
                     violations.append(
@@ -65,14 +196,18 @@ class SchemaValidator:
                 if field.name not in record:
                     continue
                 value = record[field.name]
-                if not self._matches_type(value, field.dtype):
+                if field.dtype == "datetime":
+                    matches = bool(datetime_masks[field.name][local_idx])
+                else:
+                    matches = self._matches_type(value, field.dtype)
+                if not matches:
                     violations.append(
                         SchemaViolation(
                             field=field.name,
                             message=f"Record {idx} type mismatch expected {field.dtype}",
                         )
                     )
-                if field.allowed_values and value not in field.allowed_values:
+                if field.allowed_values and not self._is_allowed(field, value):
                     violations.append(
                         SchemaViolation(
                             field=field.name,
@@ -95,17 +230,99 @@ class SchemaValidator:
                             severity="WARN",
                         )
                     )
-        if self.schema.expected_records and len(records) != self.schema.expected_records:
-            violations.append(
-                SchemaViolation(
-                    field="dataset",
-                    message="Record count deviates from expected",
-                    severity="WARN",
-                )
-            )
-        logger.info("Schema validation produced %d violations", len(violations))
         return violations
 
+    def _validate_columnar(
+        self, records: ColumnarDataset, offset: int, parsed: Mapping[str, TimestampColumn]
+    ) -> list[SchemaViolation]:
+        """Bulk ``validate_rows``: build per-column masks, then emit violations in row order.
+
+        Columns whose value types already prove (or disprove) the declared dtype skip the
+        per-value check entirely, so only flagged rows cost Python-level work.
+        """
+
+        found: list[tuple[int, int, int, SchemaViolation]] = []
+        for field_pos, field in enumerate(self.schema.fields):
+            positions = records.present_positions(field.name)
+            if field.required and len(positions) < len(records):
+                missing = np.ones(len(records), dtype=bool)
+                missing[positions] = False
+                for local in np.flatnonzero(missing).tolist():
+                    violation = SchemaViolation(
+                        field=field.name, message=f"Record {local + offset} missing required field"
+                    )
+                    found.append((local, field_pos, 0, violation))
+            if not len(positions):
+                continue
+
+            column = records.column(field.name)[positions]
+            values = records.column_values(field.name)
+            local_positions = positions.tolist()
+            mismatches = self._type_mismatches(records, field, values, parsed.get(field.name))
+            for local in np.flatnonzero(mismatches).tolist():
+                violation = SchemaViolation(
+                    field=field.name,
+                    message=f"Record {local_positions[local] + offset} type mismatch expected "
+                    f"{field.dtype}",
+                )
+                found.append((local_positions[local], field_pos, 1, violation))
+            if field.allowed_values:
+                for local, value in enumerate(values):
+                    if not self._is_allowed(field, value):
+                        idx = local_positions[local] + offset
+                        violation = SchemaViolation(
+                            field=field.name,
+                            message=f"Record {idx} value {value} not in allowed set",
+                        )
+                        found.append((local_positions[local], field_pos, 2, violation))
+            if field.min_value is None and field.max_value is None:
+                continue
+            floats = self._bound_values(column, values)
+            for check, bound, flagged, label in (
+                (3, field.min_value, lambda x, b: x < b, "below min"),
+                (4, field.max_value, lambda x, b: x > b, "above max"),
+            ):
+                if bound is None:
+                    continue
+                for local in np.flatnonzero(flagged(floats, bound)).tolist():
+                    violation = SchemaViolation(
+                        field=field.name,
+                        message=f"Record {local_positions[local] + offset} {label} {bound}",
+                        severity="WARN",
+                    )
+                    found.append((local_positions[local], field_pos, check, violation))
+        found.sort(key=lambda item: item[:3])
+        return [violation for *_, violation in found]
+
+    def _type_mismatches(
+        self,
+        records: ColumnarDataset,
+        field: FieldSchema,
+        values: list[Any],
+        parsed: TimestampColumn | None = None,
+    ) -> np.ndarray:
+        """Return a mask over the present values of ``field`` that fail its dtype."""
+
+        if field.dtype == "datetime":
+            if parsed is None:
+                parsed = extract_timestamp_column(records, field.name)
+            return ~parsed.valid
+        types = records.value_types(field.name)
+        compatible = _DTYPE_TYPES[field.dtype]
+        if types <= compatible:
+            return np.zeros(len(values), dtype=bool)
+        if not types & compatible:
+            return np.ones(len(values), dtype=bool)
+        return np.array([not self._matches_type(value, field.dtype) for value in values])
+
+    def _bound_values(self, column: np.ndarray, values: list[Any]) -> np.ndarray:
+        """Vectorised ``_to_float`` over present values; nulls compare as 0.0."""
+
+        if column.dtype.kind in "biuf":
+            floats = column.astype(np.float64)
+            return np.where(np.isnan(floats), 0.0, floats)
+        return np.array([self._to_float(value) for value in values], dtype=np.float64)
+
     def _matches_type(self, value: Any, dtype: str) -> bool:
         """Return True if value conforms to declared dtype."""
 
@@ -118,11 +335,7 @@ class SchemaValidator:
         if dtype == "bool":
             return isinstance(value, bool)
         if dtype == "datetime":
-            try:
-                datetime.fromisoformat(str(value))
-                return True
-            except ValueError:
-                return False
+            return is_timestamp(value)
         return False
 
     def _to_float(self, value: Any) -> float:
@@ -132,3 +345,14 @@ class SchemaValidator:
             return float(value)
         except (TypeError, ValueError):
             return 0.0
+
+
+def _validate_chunk(
+    records: list[dict[str, Any]],
+    offset: int,
+    validator: SchemaValidator,
+    timestamps: Mapping[str, TimestampColumn] | None = None,
+) -> list[SchemaViolation]:
+    """Process-pool entrypoint validating one row chunk."""
+
+    return validator.validate_rows(records, offset, timestamps)
@@ -11,6 +11,8 @@ logger = get_logger(__name__)
 
 
 SEVERITY_MAP = {"ERROR": 30, "WARN": 10, "INFO": 0}
+# More schema violations than this block training whatever the score.
+MAX_SCHEMA_VIOLATIONS = 5
 
 
 def compute_tdie_score(
@@ -22,13 +24,37 @@ def compute_tdie_score(
 ) -> dict[str, Any]:
     """Aggregate integrity signals and return TDIE score metadata."""
 
-    schema_penalty = sum(SEVERITY_MAP.get(v.severity, 5) for v in schema_violations)
-    base = quality_score + bias_score + provenance_completeness
-    risk_penalty = poisoning_risk
-    raw_score = max(0.0, (base / 3) - risk_penalty - schema_penalty)
-    capped_score = min(100.0, raw_score)
+    return combine_scores(
+        quality_score=quality_score,
+        poisoning_risk=poisoning_risk,
+        bias_score=bias_score,
+        schema_penalty=schema_penalty(schema_violations),
+        violation_count=len(schema_violations),
+        provenance_completeness=provenance_completeness,
+    )
+
+
+def schema_penalty(schema_violations: list[SchemaViolation]) -> float:
+    """Total score penalty for a list of schema violations."""
+
+    return sum(SEVERITY_MAP.get(v.severity, 5) for v in schema_violations)
+
+
+def combine_scores(
+    quality_score: float,
+    poisoning_risk: float,
+    bias_score: float,
+    schema_penalty: float,
+    violation_count: int,
+    provenance_completeness: float,
+) -> dict[str, Any]:
+    """Aggregate engine scores when the schema outcome is known only as a penalty and count."""
+
+    capped_score = score_value(
+        quality_score, poisoning_risk, bias_score, schema_penalty, provenance_completeness
+    )
     severity = severity_tier(capped_score)
-    decision = decision_gate(capped_score, len(schema_violations))
+    decision = decision_gate(capped_score, violation_count)
     logger.info("TDIE score %.2f with severity %s", capped_score, severity)
     return {
         "tdie_score": round(capped_score, 2),
@@ -37,6 +63,20 @@ def compute_tdie_score(
     }
 
 
+def score_value(
+    quality_score: float,
+    poisoning_risk: float,
+    bias_score: float,
+    schema_penalty: float,
+    provenance_completeness: float,
+) -> float:
+    """Unrounded TDIE score in [0, 100]; it rises with every input except the two penalties."""
+
+    base = quality_score + bias_score + provenance_completeness
+    raw_score = max(0.0, (base / 3) - poisoning_risk - schema_penalty)
+    return min(100.0, raw_score)
+
+
 def severity_tier(score: float) -> str:
     """Map TDIE score to a severity tier."""
 
@@ -52,7 +92,7 @@ def severity_tier(score: float) -> str:
 def decision_gate(score: float, schema_violations: int) -> str:
     """Return recommended action based on TDIE score and contract violations."""
 
-    if score < 40 or schema_violations > 5:
+    if score < 40 or schema_violations > MAX_SCHEMA_VIOLATIONS:
         return "BLOCK"
     if score < 60:
         return "REVIEW"
@@ -0,0 +1,218 @@
+"""Vectorised timestamp parsing and ordering checks shared by schema and quality engines."""
+
+from __future__ import annotations
+
+import re
+from collections.abc import Sequence
+from datetime import UTC, datetime
+from typing import Any
+
+import numpy as np
+
+from backend.utils.columnar import ColumnarDataset
+
+GAP_FACTOR = 10.0
+# Canonical ISO layouts that round-trip through ``np.datetime_as_string`` keyed by length.
+_ISO_UNITS = {10: "D", 16: "m", 19: "s", 23: "ms", 26: "us"}
+_ISO_PATTERN = re.compile(r"\d{4}-\d{2}-\d{2}(T\d{2}:\d{2}(:\d{2}(\.\d{3}|\.\d{6})?)?)?")
+# datetime64[ns] only spans roughly 1678-2262; values outside parse fine but cannot be ordered.
+_NS_MIN_YEAR, _NS_MAX_YEAR = 1678, 2261
+_NS_LOWER = np.datetime64(f"{_NS_MIN_YEAR}-01-01", "D")
+_NS_UPPER = np.datetime64(f"{_NS_MAX_YEAR + 1}-01-01", "D")
+_NAT = np.datetime64("NaT", "ns")
+
+
+class TimestampColumn:
+    """A timestamp field parsed once into ``datetime64[ns]`` alongside its record positions."""
+
+    def __init__(self, field: str, positions: np.ndarray, values: np.ndarray, valid: np.ndarray):
+        self.field = field
+        self.positions = positions
+        self.values = values
+        self.valid = valid
+
+    @property
+    def invalid_count(self) -> int:
+        return int((~self.valid).sum())
+
+    def slice(self, start: int, stop: int) -> TimestampColumn:
+        """The entries for records ``start:stop``, with positions relative to ``start``."""
+
+        window = self.window(start, stop)
+        window.positions = window.positions - start
+        return window
+
+    def window(self, start: int, stop: int) -> TimestampColumn:
+        """The entries for records ``start:stop``, keeping their dataset positions."""
+
+        low, high = np.searchsorted(self.positions, [start, stop])
+        return TimestampColumn(
+            self.field, self.positions[low:high], self.values[low:high], self.valid[low:high]
+        )
+
+    @classmethod
+    def concat(cls, columns: Sequence[TimestampColumn]) -> TimestampColumn:
+        """Join per-chunk columns (already holding global positions) in chunk order."""
+
+        return cls(
+            columns[0].field,
+            np.concatenate([c.positions for c in columns]),
+            np.concatenate([c.values for c in columns]),
+            np.concatenate([c.valid for c in columns]),
+        )
+
+
+def is_timestamp(value: Any) -> bool:
+    """Return True if a single value parses as an ISO-8601 timestamp."""
+
+    try:
+        datetime.fromisoformat(str(value))
+    except ValueError:
+        return False
+    return True
+
+
+def parse_timestamps(values: Sequence[Any]) -> tuple[np.ndarray, np.ndarray]:
+    """Parse values into a ``datetime64[ns]`` array and a validity mask.
+
+    Uniformly formatted ISO strings are converted in a single NumPy cast; anything else
+    falls back to ``datetime.fromisoformat`` per value so acceptance matches the schema
+    contract exactly. Timezone-aware values are normalised to naive UTC.
+    """
+
+    fast = _parse_uniform_iso(values)
+    if fast is not None:
+        return fast, np.ones(len(values), dtype=bool)
+
+    parsed = np.full(len(values), _NAT)
+    valid = np.zeros(len(values), dtype=bool)
+    for idx, value in enumerate(values):
+        try:
+            ts = datetime.fromisoformat(str(value))
+        except ValueError:
+            continue
+        valid[idx] = True
+        if ts.tzinfo is not None:
+            ts = ts.astimezone(UTC).replace(tzinfo=None)
+        if _NS_MIN_YEAR <= ts.year <= _NS_MAX_YEAR:
+            parsed[idx] = np.datetime64(ts, "ns")
+    return parsed, valid
+
+
+def _parse_uniform_iso(values: Sequence[Any]) -> np.ndarray | None:
+    """Return parsed values when every entry shares one canonical ISO layout, else None."""
+
+    if not len(values) or not all(type(value) is str for value in values):
+        return None
+    first = values[0]
+    unit = _ISO_UNITS.get(len(first))
+    if unit is None or not _ISO_PATTERN.fullmatch(first):
+        return None
+    raw = np.asarray(values, dtype=str)
+    if not (np.char.str_len(raw) == len(first)).all():
+        return None
+    try:
+        parsed = raw.astype(f"datetime64[{unit}]")
+    except ValueError:
+        return None
+    if not (np.datetime_as_string(parsed, unit=unit) == raw).all():
+        return None
+    if ((parsed < _NS_LOWER) | (parsed >= _NS_UPPER)).any():
+        return None
+    return parsed.astype("datetime64[ns]")
+
+
+def extract_timestamp_column(
+    records: Sequence[dict[str, Any]], field: str, offset: int = 0
+) -> TimestampColumn:
+    """Collect a field across records and parse it once.
+
+    ``offset`` is added to record positions when ``records`` is a chunk of a larger dataset.
+    """
+
+    if isinstance(records, ColumnarDataset) and records.has_column(field):
+        positions = records.present_positions(field)
+        if records.column(field).dtype.kind == "M":
+            values = records.column(field)[positions].astype("datetime64[ns]")
+            valid = ~np.isnat(values)
+        else:
+            values, valid = parse_timestamps(records.column_values(field))
+        return TimestampColumn(field, positions + offset, values, valid)
+
+    positions = [idx for idx, record in enumerate(records) if field in record]
+    values, valid = parse_timestamps([records[idx][field] for idx in positions])
+    return TimestampColumn(field, np.asarray(positions, dtype=np.int64) + offset, values, valid)
+
+
+def timestamp_validity(
+    records: Sequence[dict[str, Any]], field: str, column: TimestampColumn | None = None
+) -> np.ndarray:
+    """Return a per-record mask that is True where ``field`` holds a parseable timestamp.
+
+    ``column`` reuses an ``extract_timestamp_column`` result for ``records``.
+    """
+
+    if column is None:
+        column = extract_timestamp_column(records, field)
+    mask = np.zeros(len(records), dtype=bool)
+    mask[column.positions] = column.valid
+    return mask
+
+
+def find_timestamp_anomalies(column: TimestampColumn, now: datetime | None = None) -> list[str]:
+    """Detect invalid, out-of-order, duplicated, gapped, and future-dated timestamps.
+
+    Ordering, duplicate, and future checks run over the original record order so the
+    reported record indices point at the offending rows.
+    """
+
+    field = column.field
+    messages = [f"Invalid timestamp format in field {field}"] * column.invalid_count
+    usable = column.valid & ~np.isnat(column.values)
+    positions = column.positions[usable]
+    ticks = column.values[usable].astype(np.int64)
+    if ticks.size < 2:
+        return messages + _future_messages(field, positions, ticks, now)
+
+    backwards = np.diff(ticks) < 0
+    run_starts = backwards & ~np.concatenate(([False], backwards[:-1]))
+    if run_starts.any():
+        first = positions[np.flatnonzero(backwards)[0] + 1]
+        messages.append(
+            f"Timestamp order anomaly in field {field}: "
+            f"{int(run_starts.sum())} out-of-order run(s), first at record {first}"
+        )
+
+    unique, first_seen, inverse = np.unique(ticks, return_index=True, return_inverse=True)
+    repeated = first_seen[inverse] != np.arange(ticks.size)
+    if repeated.any():
+        messages.append(
+            f"Duplicate timestamps in field {field}: {int(repeated.sum())} repeated record(s), "
+            f"first at record {positions[np.flatnonzero(repeated)[0]]}"
+        )
+
+    intervals = np.diff(unique)
+    if intervals.size >= 3:
+        gaps = int((intervals > GAP_FACTOR * np.median(intervals)).sum())
+        if gaps:
+            messages.append(
+                f"Timestamp gap anomaly in field {field}: {gaps} gap(s) exceeding "
+                f"{GAP_FACTOR:g}x the median interval"
+            )
+
+    return messages + _future_messages(field, positions, ticks, now)
+
+
+def _future_messages(
+    field: str, positions: np.ndarray, ticks: np.ndarray, now: datetime | None
+) -> list[str]:
+    reference = now or datetime.now(UTC)
+    if reference.tzinfo is not None:
+        reference = reference.astimezone(UTC).replace(tzinfo=None)
+    future = ticks > np.datetime64(reference, "ns").astype(np.int64)
+    if not future.any():
+        return []
+    return [
+        f"Future-dated timestamps in field {field}: {int(future.sum())} record(s), "
+        f"first at record {positions[np.flatnonzero(future)[0]]}"
+    ]
@@ -5,6 +5,7 @@ from __future__ import annotations
 from pathlib import Path
 from typing import Any
 
+from backend.utils.audit import audit_writer
 from backend.utils.logger import get_logger
 
 logger = get_logger(__name__)
@@ -41,13 +42,7 @@ def training_gate(
 
 
 def _audit(entry: dict[str, Any]) -> None:
-    """Persist a minimal audit log for training decisions."""
-
-    AUDIT_LOG.parent.mkdir(parents=True, exist_ok=True)
-    try:
-        with AUDIT_LOG.open("a", encoding="utf-8") as f:
-            f.write(str(entry) + "\n")
-    except OSError as exc:
-        logger.error("Failed to write training audit entry: %s", exc)
-        return
+    """Queue a training decision for the batched, fsynced JSON-lines audit trail."""
+
+    audit_writer(AUDIT_LOG).submit(entry)
     logger.info("Training audit entry: %s", entry)
@@ -2,18 +2,51 @@
 
 from __future__ import annotations
 
-from collections.abc import AsyncIterator
+import asyncio
+import os
+import time
+from collections.abc import AsyncIterator, Awaitable, Callable
 from contextlib import asynccontextmanager
-from pathlib import Path
+from uuid import uuid4
 
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, Request, Response
 from fastapi.responses import PlainTextResponse
 
-from backend.api import bias, fingerprint, poison, tdie, train, validate
-from backend.utils.logger import get_logger
+from backend.api import (
+    admin,
+    bias,
+    blocklist,
+    datasets,
+    evidence,
+    fingerprint,
+    history,
+    logs,
+    metrics,
+    poison,
+    schemas,
+    tdie,
+    train,
+    validate,
+)
+from backend.engines.poison_detector import warm_up
+from backend.utils.audit import flush_audit_writers
+from backend.utils.evidence import flush_evidence_stores
+from backend.utils.logger import REQUEST_ID_PATTERN, get_logger, request_id_var
+from backend.utils.memory import rss_monitor
+from backend.utils.metrics import HTTP_BYTES_IN, HTTP_BYTES_OUT, HTTP_DURATION, REQUEST_PEAK_RSS
+from backend.utils.profiling import (
+    PROFILE_HEADER,
+    ProfileRequest,
+    profile_requested_var,
+    should_profile,
+)
+from backend.utils.scheduler import default_scheduler
 
 logger = get_logger(__name__)
 
+# Pre-load lazily imported engine dependencies at startup instead of on the first request.
+WARMUP = os.environ.get("TDIE_WARMUP", "0").lower() in {"1", "true", "yes"}
+
 
 @asynccontextmanager
 async def lifespan(_: FastAPI) -> AsyncIterator[None]:
@@ -24,7 +57,16 @@ async def lifespan(_: FastAPI) -> AsyncIterator[None]:
     """
 
     logger.info("TDIE API starting up")
+    if WARMUP:
+        started = time.perf_counter()
+        await asyncio.to_thread(warm_up)
+        logger.info("Engine warm-up finished in %.2fs", time.perf_counter() - started)
     yield
+    default_scheduler.shutdown()
+    if not flush_audit_writers():
+        logger.error("Timed out flushing audit entries during shutdown")
+    if not flush_evidence_stores():
+        logger.error("Timed out writing evidence bundles during shutdown")
     logger.info("TDIE API shutdown complete")
 
 
@@ -41,6 +83,79 @@ app.include_router(poison.router)
 app.include_router(bias.router)
 app.include_router(tdie.router)
 app.include_router(train.router)
+app.include_router(evidence.router)
+app.include_router(datasets.router)
+app.include_router(schemas.router)
+app.include_router(blocklist.router)
+app.include_router(logs.router)
+app.include_router(history.router)
+app.include_router(metrics.router)
+app.include_router(admin.router)
+
+
+@app.middleware("http")
+async def profiling_middleware(
+    request: Request, call_next: Callable[[Request], Awaitable[Response]]
+) -> Response:
+    """Mark requests for profiling by ``X-TDIE-Profile`` header or sampling rate."""
+
+    if not should_profile(request.headers.get(PROFILE_HEADER)):
+        return await call_next(request)
+    marker = ProfileRequest(request.url.path)
+    token = profile_requested_var.set(marker)
+    try:
+        response = await call_next(request)
+    finally:
+        profile_requested_var.reset(token)
+    if marker.stored:
+        response.headers["X-TDIE-Profile-Id"] = request_id_var.get()
+    return response
+
+
+@app.middleware("http")
+async def request_id_middleware(
+    request: Request, call_next: Callable[[Request], Awaitable[Response]]
+) -> Response:
+    """Tag every log line emitted while serving a request with its ``X-Request-ID``.
+
+    Ids that do not match ``REQUEST_ID_PATTERN`` are replaced with a generated one.
+    """
+
+    request_id = request.headers.get("x-request-id") or ""
+    if not REQUEST_ID_PATTERN.fullmatch(request_id):
+        request_id = uuid4().hex
+    token = request_id_var.set(request_id)
+    try:
+        response = await call_next(request)
+    finally:
+        request_id_var.reset(token)
+    response.headers["X-Request-ID"] = request_id
+    return response
+
+
+@app.middleware("http")
+async def metrics_middleware(
+    request: Request, call_next: Callable[[Request], Awaitable[Response]]
+) -> Response:
+    """Record latency, body sizes and peak RSS per route template (bounded label cardinality).
+
+    The peak resident set size sampled while the request was in flight is also returned in
+    ``X-TDIE-Peak-RSS``; it is process-wide, so concurrent requests share their peaks.
+    """
+
+    started = time.perf_counter()
+    with rss_monitor.track() as watch:
+        response = await call_next(request)
+    route = request.scope.get("route")
+    route_path = getattr(route, "path", "unmatched")
+    HTTP_DURATION.observe(
+        time.perf_counter() - started, request.method, route_path, str(response.status_code)
+    )
+    HTTP_BYTES_IN.inc(route_path, amount=int(request.headers.get("content-length") or 0))
+    HTTP_BYTES_OUT.inc(route_path, amount=int(response.headers.get("content-length") or 0))
+    REQUEST_PEAK_RSS.observe(watch.peak, route_path)
+    response.headers["X-TDIE-Peak-RSS"] = str(watch.peak)
+    return response
 
 
 @app.get("/health", response_class=PlainTextResponse)
@@ -48,20 +163,3 @@ def health() -> str:
     """Liveness probe for uptime monitoring and CI smoke checks."""
 
     return "ok"
-
-
-@app.get("/logs")
-def get_logs(lines: int = 200) -> list[str]:
-    """Return the most recent log entries for quick operational debugging."""
-
-    safe_line_limit = max(1, min(lines, 1000))
-    log_path = Path("logs/tdie.log")
-    if not log_path.exists():
-        return []
-    try:
-        with log_path.open("r", encoding="utf-8") as f:
-            content = f.readlines()
-    except OSError as exc:
-        logger.error("Unable to read log file: %s", exc)
-        raise HTTPException(status_code=500, detail="Unable to read logs") from exc
-    return content[-safe_line_limit:]
@@ -0,0 +1,135 @@
+"""Batched, fsync-grouped JSON-lines audit writer."""
+
+from __future__ import annotations
+
+import atexit
+import json
+import queue
+import threading
+import time
+from datetime import UTC, datetime
+from pathlib import Path
+from typing import Any
+
+from backend.utils.logger import get_logger
+from backend.utils.metrics import AUDIT_PENDING, AUDIT_WRITE_FAILURES
+from backend.utils.storage import append_lines
+
+logger = get_logger(__name__)
+
+AUDIT_BATCH_SIZE = 256
+# Backoff between retries of a failed write doubles from the first value up to the second.
+AUDIT_RETRY_SECONDS = 0.1
+AUDIT_RETRY_MAX_SECONDS = 30.0
+
+
+class AuditWriter:
+    """Append audit entries as JSON lines from a background thread.
+
+    Callers only enqueue. The writer drains whatever has accumulated (up to
+    ``AUDIT_BATCH_SIZE`` entries), writes the batch with one locked ``write`` call, and
+    fsyncs once per batch, so durability cost is shared across concurrent decisions. The
+    file lock keeps batches from other worker processes whole. The queue is unbounded:
+    audit entries are never dropped. A batch whose write fails is kept and retried with
+    exponential backoff, merged with entries submitted meanwhile; ``pending`` counts the
+    entries held. ``flush`` blocks until everything submitted so far is on disk and is
+    called on shutdown, so it times out while writes keep failing.
+    """
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        self._queue: queue.Queue[tuple[dict[str, Any] | None, threading.Event | None]] = (
+            queue.Queue()
+        )
+        self.pending = 0
+        self._thread = threading.Thread(target=self._run, name=f"audit-{path.name}", daemon=True)
+        self._thread.start()
+
+    def submit(self, entry: dict[str, Any]) -> None:
+        """Queue an entry for durable append without waiting on disk I/O."""
+
+        stamped = {"recorded_at": datetime.now(UTC).isoformat(), **entry}
+        self._queue.put((stamped, None))
+
+    def flush(self, timeout: float | None = 5.0) -> bool:
+        """Wait until all previously submitted entries are fsynced; False on timeout."""
+
+        if not self._thread.is_alive():
+            return self._queue.empty()
+        done = threading.Event()
+        self._queue.put((None, done))
+        return done.wait(timeout)
+
+    def _run(self) -> None:
+        entries: list[dict[str, Any]] = []
+        waiters: list[threading.Event] = []
+        delay, retry_at = 0.0, 0.0
+        while True:
+            try:
+                wait = max(retry_at - time.monotonic(), 0.001) if entries else None
+                batch = [self._queue.get(timeout=wait)]
+            except queue.Empty:
+                batch = []
+            while len(batch) < AUDIT_BATCH_SIZE:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            entries.extend(entry for entry, _ in batch if entry is not None)
+            waiters.extend(done for _, done in batch if done is not None)
+            if entries and time.monotonic() < retry_at:
+                continue  # still backing off after a failed write
+            if entries and not self._write(entries):
+                delay = min(max(delay * 2, AUDIT_RETRY_SECONDS), AUDIT_RETRY_MAX_SECONDS)
+                retry_at = time.monotonic() + delay
+                continue
+            entries, delay, retry_at = [], 0.0, 0.0
+            self._set_pending(0)
+            for done in waiters:
+                done.set()
+            waiters = []
+
+    def _set_pending(self, count: int) -> None:
+        self.pending = count
+        AUDIT_PENDING.set(count, self.path.name)
+
+    def _write(self, entries: list[dict[str, Any]]) -> bool:
+        lines = "".join(json.dumps(entry, default=str) + "\n" for entry in entries)
+        try:
+            append_lines(self.path, lines)
+        except OSError as exc:
+            AUDIT_WRITE_FAILURES.inc(self.path.name)
+            self._set_pending(len(entries))
+            logger.error(
+                "Failed to write %d audit entries to %s, will retry: %s",
+                len(entries),
+                self.path,
+                exc,
+            )
+            return False
+        return True
+
+
+_writers: dict[Path, AuditWriter] = {}
+_writers_lock = threading.Lock()
+
+
+def audit_writer(path: Path) -> AuditWriter:
+    """Return the process-wide writer for ``path``, starting it on first use."""
+
+    with _writers_lock:
+        if path not in _writers:
+            _writers[path] = AuditWriter(path)
+        return _writers[path]
+
+
+def flush_audit_writers(timeout: float | None = 5.0) -> bool:
+    """Flush every active audit writer; returns False if any timed out."""
+
+    with _writers_lock:
+        writers = list(_writers.values())
+    results = [writer.flush(timeout) for writer in writers]
+    return all(results)
+
+
+atexit.register(flush_audit_writers)
@@ -0,0 +1,247 @@
+"""Blocklist of known-bad dataset and row-block fingerprints.
+
+Entries are SHA-256 hex digests of whole datasets (``hash_dataset``) or of aligned
+``BLOCKLIST_BLOCK_ROWS``-row blocks (``hash_block``), stored with a reason in
+``BLOCKLIST_PATH``. Lookups go through an in-memory Bloom filter rebuilt whenever that file
+changes, so a batch of block digests is screened with a few vectorised bit probes each and
+the backing file is read only to confirm the rare candidates. The filter never misses an
+entry; its false positives are removed by the exact check.
+
+Blocks sit at fixed offsets from the first row, so a blocklisted block is recognised only
+when it reappears at a multiple of ``BLOCKLIST_BLOCK_ROWS``. Inserting or removing rows
+ahead of it shifts every later block boundary and hides the match; catching shifted
+content would need content-defined chunking. Sampled requests hash only a seeded random
+subset of whole blocks holding about as many rows as the sample, and skip the
+whole-dataset digest, so they may miss a blocklisted block that a full scan would catch.
+"""
+
+from __future__ import annotations
+
+import json
+import math
+import os
+import threading
+from collections.abc import Iterable, Sequence
+from datetime import UTC, datetime
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+
+from backend.utils.hash_utils import hash_block, hash_dataset_blocks, stable_json
+from backend.utils.logger import get_logger
+from backend.utils.metrics import timed
+from backend.utils.storage import update_json
+
+logger = get_logger(__name__)
+
+BLOCKLIST_PATH = Path(os.environ.get("TDIE_BLOCKLIST", "data/blocklist.json"))
+BLOCKLIST_FP_RATE = float(os.environ.get("TDIE_BLOCKLIST_FP_RATE", "0.001"))
+# Rows per fingerprinted block; matches the incremental engine's Merkle leaves.
+BLOCKLIST_BLOCK_ROWS = 1024
+# Smallest filter capacity, so a handful of additions does not force a rebuild each time.
+MIN_BLOOM_CAPACITY = 1024
+KINDS = ("datasets", "blocks")
+
+
+class KnownBadDataset(ValueError):
+    """Raised when a submitted dataset or one of its blocks is on the blocklist."""
+
+
+class BloomFilter:
+    """Bloom filter over SHA-256 hex digests, probed with double hashing in numpy."""
+
+    def __init__(self, capacity: int, fp_rate: float = BLOCKLIST_FP_RATE) -> None:
+        capacity = max(capacity, 1)
+        self.bits = max(64, math.ceil(-capacity * math.log(fp_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.bits / capacity * math.log(2)))
+        self.count = 0
+        self._words = np.zeros((self.bits + 63) // 64, dtype=np.uint64)
+
+    def _positions(self, digests: Sequence[str]) -> np.ndarray:
+        raw = np.frombuffer(bytes.fromhex("".join(digests)), dtype="<u8").reshape(-1, 4)
+        # The digests are already uniform, so two of their words serve as the base hashes.
+        steps = np.arange(self.hashes, dtype=np.uint64)
+        with np.errstate(over="ignore"):
+            mixed = raw[:, :1] + steps * (raw[:, 1:2] | np.uint64(1))
+        return mixed % np.uint64(self.bits)
+
+    def add(self, digests: Sequence[str]) -> None:
+        if not digests:
+            return
+        positions = self._positions(digests).ravel()
+        np.bitwise_or.at(
+            self._words, positions >> np.uint64(6), np.uint64(1) << (positions & np.uint64(63))
+        )
+        self.count += len(digests)
+
+    def contains(self, digests: Sequence[str]) -> np.ndarray:
+        """Mask of ``digests`` that may be present (no false negatives)."""
+
+        if not digests:
+            return np.zeros(0, dtype=bool)
+        positions = self._positions(digests)
+        words = self._words[positions >> np.uint64(6)]
+        hits = (words >> (positions & np.uint64(63))) & np.uint64(1)
+        return hits.all(axis=1)
+
+    def stats(self) -> dict[str, Any]:
+        fill = int(sum(int(word).bit_count() for word in self._words.tolist())) / self.bits
+        return {
+            "entries": self.count,
+            "bits": self.bits,
+            "hashes": self.hashes,
+            "estimated_fp_rate": fill**self.hashes,
+        }
+
+
+_filter_cache: tuple[tuple[str, int, int], BloomFilter] | None = None
+_filter_lock = threading.Lock()
+
+
+def _read_store() -> dict[str, dict[str, Any]]:
+    try:
+        return json.loads(BLOCKLIST_PATH.read_text() or "{}")
+    except FileNotFoundError:
+        return {}
+
+
+def _bloom() -> BloomFilter | None:
+    """Filter over every blocklisted digest, rebuilt when the backing file changes."""
+
+    global _filter_cache
+    try:
+        stat = BLOCKLIST_PATH.stat()
+    except FileNotFoundError:
+        return None
+    key = (str(BLOCKLIST_PATH), stat.st_mtime_ns, stat.st_size)
+    with _filter_lock:
+        if _filter_cache is None or _filter_cache[0] != key:
+            store = _read_store()
+            digests = [digest for kind in KINDS for digest in store.get(kind, {})]
+            bloom = BloomFilter(max(len(digests), MIN_BLOOM_CAPACITY))
+            bloom.add(digests)
+            _filter_cache = (key, bloom)
+            logger.info("Blocklist filter rebuilt with %d entries", len(digests))
+        return _filter_cache[1]
+
+
+def add_to_blocklist(
+    dataset_hashes: Iterable[str] = (), block_hashes: Iterable[str] = (), reason: str = ""
+) -> dict[str, int]:
+    """Record known-bad digests with ``reason``; returns how many of each kind were new."""
+
+    entry = {"reason": reason, "added_at": datetime.now(UTC).isoformat()}
+    additions = {"datasets": list(dataset_hashes), "blocks": list(block_hashes)}
+    for digests in additions.values():
+        for digest in digests:
+            if len(digest) != 64 or not all(c in "0123456789abcdef" for c in digest):
+                raise ValueError(f"Not a SHA-256 hex digest: {digest!r}")
+    added: dict[str, int] = {}
+
+    def update(store: dict[str, dict[str, Any]]) -> dict[str, dict[str, Any]]:
+        for kind, digests in additions.items():
+            current = dict(store.get(kind, {}))
+            fresh = [digest for digest in dict.fromkeys(digests) if digest not in current]
+            current.update(dict.fromkeys(fresh, entry))
+            store = {**store, kind: current}
+            added[kind] = len(fresh)
+        return store
+
+    update_json(BLOCKLIST_PATH, update, {})
+    logger.info("Blocklisted %d datasets and %d blocks", added["datasets"], added["blocks"])
+    return added
+
+
+def blocklist_stats() -> dict[str, Any]:
+    bloom = _bloom()
+    store = _read_store()
+    counts = {kind: len(store.get(kind, {})) for kind in KINDS}
+    return {**counts, "block_rows": BLOCKLIST_BLOCK_ROWS, "filter": bloom and bloom.stats()}
+
+
+def check_blocklist(
+    dataset_hash: str | None,
+    block_hashes: Sequence[str],
+    block_indices: Sequence[int] | None = None,
+) -> dict[str, Any]:
+    """Blocklist matches for a dataset digest and its block digests.
+
+    Returns ``known_bad``, the matching ``dataset`` entry (or None) and the indices and
+    entries of matching ``blocks``. ``block_indices`` gives the block number of each digest
+    when only some blocks were hashed; a None ``dataset_hash`` skips the dataset check.
+    """
+
+    result: dict[str, Any] = {"known_bad": False, "dataset": None, "blocks": []}
+    bloom = _bloom()
+    if bloom is None or not bloom.count:
+        return result
+    candidates = bloom.contains([*([] if dataset_hash is None else [dataset_hash]), *block_hashes])
+    if not candidates.any():
+        return result
+    store = _read_store()
+    if dataset_hash is not None:
+        if candidates[0]:
+            result["dataset"] = store.get("datasets", {}).get(dataset_hash)
+        candidates = candidates[1:]
+    known_blocks = store.get("blocks", {})
+    for index in np.flatnonzero(candidates).tolist():
+        match = known_blocks.get(block_hashes[index])
+        if match is not None:
+            number = index if block_indices is None else int(block_indices[index])
+            result["blocks"].append({"index": number, **match})
+    result["known_bad"] = result["dataset"] is not None or bool(result["blocks"])
+    return result
+
+
+def blocklist_active() -> bool:
+    bloom = _bloom()
+    return bloom is not None and bloom.count > 0
+
+
+def _sampled_blocks(
+    records: Sequence[dict[str, Any]], rows: int, sample_rows: int, seed: int
+) -> tuple[np.ndarray, list[str]]:
+    """Numbers and digests of a seeded random set of blocks covering ``sample_rows`` rows."""
+
+    total = math.ceil(rows / BLOCKLIST_BLOCK_ROWS)
+    wanted = min(total, math.ceil(sample_rows / BLOCKLIST_BLOCK_ROWS))
+    drawn = np.sort(np.random.default_rng(seed).choice(total, size=wanted, replace=False))
+    digests = []
+    for number in drawn.tolist():
+        start = number * BLOCKLIST_BLOCK_ROWS
+        block = records[start : start + BLOCKLIST_BLOCK_ROWS]
+        digests.append(hash_block([stable_json(record) for record in block]))
+    return drawn, digests
+
+
+def screen_dataset(
+    records: Sequence[dict[str, Any]],
+    rows: int,
+    sample_rows: int | None = None,
+    seed: int = 0,
+) -> None:
+    """Raise ``KnownBadDataset`` if ``records`` or one of their blocks is blocklisted.
+
+    Costs one stat call while the blocklist is empty; otherwise one hashing pass, or, for a
+    sampled request (``sample_rows`` below ``rows``), hashing ``sample_rows`` rows' worth of
+    blocks drawn with ``seed``.
+    """
+
+    if not blocklist_active():
+        return
+    sampled = sample_rows is not None and sample_rows < rows
+    with timed("blocklist_screen", sample_rows if sampled else rows):
+        if sampled:
+            drawn, block_hashes = _sampled_blocks(records, rows, sample_rows, seed)
+            matches = check_blocklist(None, block_hashes, drawn)
+        else:
+            dataset_hash, block_hashes = hash_dataset_blocks(records, BLOCKLIST_BLOCK_ROWS)
+            matches = check_blocklist(dataset_hash, block_hashes)
+    if matches["known_bad"]:
+        blocks = [block["index"] for block in matches["blocks"]]
+        logger.warning("Rejected blocklisted dataset (blocks %s)", blocks)
+        detail = "Dataset matches the known-bad blocklist"
+        if blocks:
+            detail += f" in blocks {blocks} of {BLOCKLIST_BLOCK_ROWS} rows"
+        raise KnownBadDataset(detail)
@@ -0,0 +1,259 @@
+"""Column-oriented dataset container that engines can also iterate as records."""
+
+from __future__ import annotations
+
+from collections import Counter
+from collections.abc import Iterator, Sequence
+from itertools import chain
+from operator import itemgetter, methodcaller
+from typing import Any, overload
+
+import numpy as np
+
+_ROW_BLOCK = 65_536
+_ABSENT = object()
+_NUMERIC_OR_NULL = frozenset({int, float, bool, type(None)})
+_KIND_TYPES: dict[str, frozenset[type]] = {
+    "b": frozenset({bool}),
+    "i": frozenset({int}),
+    "u": frozenset({int}),
+    "U": frozenset({str}),
+    "S": frozenset({bytes}),
+    "M": frozenset({str}),
+}
+
+
+class ColumnarDataset(Sequence[dict[str, Any]]):
+    """Named, equal-length column arrays exposed as a read-only sequence of record dicts.
+
+    Columns are kept as given (memory-mapped arrays stay memory-mapped), so engines with a
+    columnar fast path read them without copies while every other engine keeps working on
+    the row view. ``absent`` marks rows where a key was missing entirely; NaN in float
+    columns is surfaced as ``None`` in the row view, matching a JSON ``null``.
+    """
+
+    def __init__(
+        self,
+        columns: dict[str, np.ndarray],
+        absent: dict[str, np.ndarray] | None = None,
+        rows: Sequence[dict[str, Any]] | None = None,
+        value_types: dict[str, frozenset[type]] | None = None,
+    ) -> None:
+        lengths = {len(values) for values in columns.values()}
+        if rows is not None:
+            lengths.add(len(rows))
+        if len(lengths) > 1:
+            raise ValueError("Columns must have equal length")
+        self._columns = columns
+        self._absent = {name: mask for name, mask in (absent or {}).items() if mask.any()}
+        self._length = lengths.pop() if lengths else 0
+        self._rows = rows
+        self._value_types = dict(value_types or {})
+
+    @classmethod
+    def from_records(cls, records: Sequence[Any]) -> ColumnarDataset:
+        """Transpose decoded JSON records into typed columns with bulk type checks.
+
+        Keys are counted in one C-level pass that also rejects non-object records. Each
+        column becomes int64, float64, or bool when all present values share that exact
+        Python type, and an object array otherwise. The original records are kept as the
+        row view so row-wise engines see them unchanged.
+        """
+
+        try:
+            key_counts = Counter(chain.from_iterable(map(dict.keys, records)))
+        except TypeError as exc:
+            raise ValueError("Records must be objects") from exc
+        total = len(records)
+        columns: dict[str, np.ndarray] = {}
+        absent: dict[str, np.ndarray] = {}
+        value_types: dict[str, frozenset[type]] = {}
+        for name, count in key_counts.items():
+            if count == total:
+                values = list(map(itemgetter(name), records))
+                mask = None
+            else:
+                padded = list(map(methodcaller("get", name, _ABSENT), records))
+                mask = np.fromiter((value is _ABSENT for value in padded), bool, total)
+                absent[name] = mask
+                values = [value for value in padded if value is not _ABSENT]
+            types = frozenset(map(type, values))
+            columns[name] = _typed_array(values, types, mask)
+            value_types[name] = types
+        return cls(columns, absent, rows=records, value_types=value_types)
+
+    @property
+    def column_names(self) -> list[str]:
+        return list(self._columns)
+
+    def column(self, name: str) -> np.ndarray:
+        """Return the backing array for ``name`` without copying."""
+
+        return self._columns[name]
+
+    def has_column(self, name: str) -> bool:
+        return name in self._columns
+
+    def is_dense(self, name: str) -> bool:
+        """Return True when every row carries ``name``."""
+
+        return name in self._columns and name not in self._absent
+
+    def present_positions(self, name: str) -> np.ndarray:
+        """Return the row indices that carry ``name``."""
+
+        if name not in self._columns:
+            return np.empty(0, dtype=np.int64)
+        if name in self._absent:
+            return np.flatnonzero(~self._absent[name])
+        return np.arange(self._length, dtype=np.int64)
+
+    def column_values(self, name: str) -> list[Any]:
+        """Return the present values of ``name`` as Python scalars, as the row view shows them."""
+
+        values = self._columns[name]
+        if name in self._absent:
+            values = values[~self._absent[name]]
+        return _to_python(values)
+
+    def value_types(self, name: str) -> frozenset[type]:
+        """Return the Python types of the present values of ``name`` as the row view shows them."""
+
+        if name not in self._value_types:
+            values = self._columns[name]
+            types = _KIND_TYPES.get(values.dtype.kind)
+            if types is None:
+                types = frozenset(map(type, self.column_values(name)))
+            self._value_types[name] = types
+        return self._value_types[name]
+
+    def select(self, names: Sequence[str]) -> ColumnarDataset:
+        """Project onto the given columns, ignoring names the dataset does not have."""
+
+        keep = [name for name in names if name in self._columns]
+        return ColumnarDataset(
+            {name: self._columns[name] for name in keep},
+            {name: self._absent[name] for name in keep if name in self._absent},
+            value_types={
+                name: self._value_types[name] for name in keep if name in self._value_types
+            },
+        )
+
+    def take(self, indices: np.ndarray) -> ColumnarDataset:
+        """Return the rows at ``indices`` (in that order) as a new dataset.
+
+        Only the selected rows are read, so sampling a memory-mapped dataset stays cheap.
+        """
+
+        return ColumnarDataset(
+            {name: np.asarray(values[indices]) for name, values in self._columns.items()},
+            {name: mask[indices] for name, mask in self._absent.items()},
+            rows=[self._rows[i] for i in indices.tolist()] if self._rows is not None else None,
+        )
+
+    def numeric_column(self, name: str) -> np.ndarray | None:
+        """Return present, non-null values of a numeric column as float64, else None.
+
+        Mirrors the row-wise ``isinstance(value, int | float)`` filter engines apply, so
+        callers may fall back to the row view whenever this returns None.
+        """
+
+        values = self._columns.get(name)
+        if values is None:
+            return None
+        if values.dtype.kind == "O":
+            if not self.value_types(name) <= _NUMERIC_OR_NULL:
+                return None
+            present = [value for value in self.column_values(name) if value is not None]
+            return np.array(present, dtype=np.float64)
+        if values.dtype.kind not in "biuf":
+            return None
+        if name in self._absent:
+            values = values[~self._absent[name]]
+        floats = values.astype(np.float64, copy=False)
+        return floats[~np.isnan(floats)] if values.dtype.kind == "f" else floats
+
+    def __len__(self) -> int:
+        return self._length
+
+    @overload
+    def __getitem__(self, index: int) -> dict[str, Any]: ...
+
+    @overload
+    def __getitem__(self, index: slice) -> ColumnarDataset: ...
+
+    def __getitem__(self, index: int | slice) -> dict[str, Any] | ColumnarDataset:
+        if isinstance(index, slice):
+            return ColumnarDataset(
+                {name: values[index] for name, values in self._columns.items()},
+                {name: mask[index] for name, mask in self._absent.items()},
+                rows=self._rows[index] if self._rows is not None else None,
+            )
+        if index < 0:
+            index += self._length
+        if not 0 <= index < self._length:
+            raise IndexError("ColumnarDataset index out of range")
+        if self._rows is not None:
+            return self._rows[index]
+        return next(self._iter_rows(index, index + 1))
+
+    def __iter__(self) -> Iterator[dict[str, Any]]:
+        if self._rows is not None:
+            return iter(self._rows)
+        return self._iter_rows(0, self._length)
+
+    def _iter_rows(self, start: int, stop: int) -> Iterator[dict[str, Any]]:
+        names = list(self._columns)
+        for block_start in range(start, stop, _ROW_BLOCK):
+            block_stop = min(block_start + _ROW_BLOCK, stop)
+            block = [_to_python(self._columns[name][block_start:block_stop]) for name in names]
+            absent = {
+                names.index(name): mask[block_start:block_stop]
+                for name, mask in self._absent.items()
+            }
+            for offset, row in enumerate(zip(*block, strict=True)):
+                if absent:
+                    yield {
+                        names[i]: value
+                        for i, value in enumerate(row)
+                        if not (i in absent and absent[i][offset])
+                    }
+                else:
+                    yield dict(zip(names, row, strict=True))
+
+
+def _to_python(values: np.ndarray) -> list[Any]:
+    """Convert a column block to Python scalars, mapping float NaN to ``None``."""
+
+    if values.dtype.kind == "M":
+        return [None if text == "NaT" else text for text in np.datetime_as_string(values)]
+    items = values.tolist()
+    if values.dtype.kind == "f" and np.isnan(values).any():
+        return [None if item != item else item for item in items]
+    return items
+
+
+def _typed_array(
+    values: list[Any], types: frozenset[type], absent: np.ndarray | None
+) -> np.ndarray:
+    """Build the narrowest exact array for present ``values``, scattering around absent rows."""
+
+    dtype: Any = object
+    if types == {int}:
+        dtype = np.int64
+    elif types == {float}:
+        dtype = np.float64
+    elif types == {bool}:
+        dtype = bool
+    try:
+        present = np.array(values, dtype=dtype) if dtype is not object else None
+    except OverflowError:
+        present = None
+    if present is None:
+        present = np.empty(len(values), dtype=object)
+        present[:] = values
+    if absent is None:
+        return present
+    array = np.zeros(len(absent), dtype=present.dtype)
+    array[~absent] = present
+    return array
@@ -2,41 +2,189 @@
 
 from __future__ import annotations
 
-from typing import Any
+import json
+from collections.abc import AsyncIterator, Sequence
+from typing import Annotated, Any, Literal
 
-from pydantic import BaseModel, Field, ValidationError
+from fastapi import Depends, HTTPException, Request
+from pydantic import BaseModel, Field, ValidationError, parse_obj_as
 
 from backend.engines.schema_validator import DatasetSchema
+from backend.utils.blocklist import screen_dataset
+from backend.utils.columnar import ColumnarDataset
+from backend.utils.dataset_refs import DatasetReference, open_reference, reference_bytes
 from backend.utils.logger import get_logger
+from backend.utils.metrics import timed
+from backend.utils.scheduler import default_scheduler
+from backend.utils.schema_registry import SchemaRef, resolve_schema
+
+try:  # optional accelerator; the stdlib decoder is used when it is missing
+    import orjson
+except ImportError:  # pragma: no cover - exercised only without orjson installed
+    orjson = None
 
 logger = get_logger(__name__)
 
 
-class DatasetPayload(BaseModel):
-    """Expected payload for dataset submission."""
+class SampleSpec(BaseModel):
+    """Approximate-mode settings: evaluate a random sample and report confidence intervals."""
+
+    size: int = Field(1000, ge=10)
+    method: Literal["uniform", "stratified"] = "uniform"
+    stratify_by: str = "group"
+    seed: int = 0
+    confidence: float = Field(0.95, gt=0, lt=1)
+    escalate: bool = True
+    gate_threshold: float = 60.0
+
+
+class DatasetEnvelope(BaseModel):
+    """Everything in a dataset submission except the records themselves.
+
+    Only the envelope goes through pydantic; records are transposed into typed columns by
+    ``ColumnarDataset.from_records`` so they are never walked or copied per field.
+    """
 
-    dataset_schema: DatasetSchema = Field(..., alias="schema")
-    records: list[dict[str, Any]]
+    dataset_schema: DatasetSchema | None = Field(None, alias="schema")
+    schema_ref: SchemaRef | None = None
+    dataset: DatasetReference | None = None
     source: str = "synthetic"
     user: str = "system"
     transformation_steps: list[str] = Field(default_factory=list)
+    incremental_id: str | None = None
+    incremental_offset: int | None = None
+    sample: SampleSpec | None = None
+    short_circuit: bool = False
+    class_conditional: bool | None = None
 
     class Config:
         allow_population_by_field_name = True
 
 
-def load_dataset(payload: dict[str, Any]) -> tuple[DatasetSchema, list[dict[str, Any]]]:
-    """Validate incoming payload and return schema and records."""
+class DatasetPayload(DatasetEnvelope):
+    """Expected payload for dataset submission.
+
+    Records are sent inline or, for data already on the server's disk, replaced by a
+    ``dataset`` reference that is opened memory-mapped or column-projected.
+    """
+
+    records: list[dict[str, Any]] | None = None
+
+
+def decode_json(body: bytes) -> Any:
+    """Decode a JSON document with orjson when available."""
+
+    if orjson is not None:
+        return orjson.loads(body)
+    return json.loads(body)
+
+
+async def read_payload(request: Request) -> AsyncIterator[dict[str, Any]]:
+    """FastAPI dependency returning the raw JSON body as a dict.
+
+    Bypasses FastAPI's own body parsing so large record arrays are decoded exactly once.
+    Large bodies, then referenced datasets, are admitted by their size before they are
+    decoded or opened, so a busy server answers 429 without paying for either.
+    """
+
+    route = request.url.path.lstrip("/")
+    with default_scheduler.admit_body(route, _content_length(request)):
+        try:
+            payload = decode_json(await request.body())
+        except ValueError as exc:
+            raise HTTPException(status_code=400, detail="Malformed JSON body") from exc
+        if not isinstance(payload, dict):
+            raise HTTPException(status_code=400, detail="Request body must be a JSON object")
+        with default_scheduler.admit_body(route, _reference_bytes(payload)):
+            yield payload
+
+
+def _content_length(request: Request) -> int:
     try:
-        parsed = DatasetPayload(**payload)
-    except ValidationError as exc:
-        logger.error("Dataset payload validation failed: %s", exc)
-        raise
-
-    if not parsed.records:
-        raise ValueError("No records supplied")
-    if not all(isinstance(item, dict) for item in parsed.records):
-        raise ValueError("Records must be objects")
-
-    logger.info("Dataset payload received with %d records", len(parsed.records))
-    return parsed.dataset_schema, parsed.records
+        return int(request.headers.get("content-length") or 0)
+    except ValueError:
+        return 0
+
+
+def _reference_bytes(payload: dict[str, Any]) -> int:
+    """Size of the payload's dataset reference; invalid references are left to ``load_dataset``."""
+
+    if payload.get("dataset") is None:
+        return 0
+    try:
+        return reference_bytes(DatasetReference.parse_obj(payload["dataset"]))
+    except (ValueError, OSError):
+        return 0
+
+
+JsonPayload = Annotated[dict[str, Any], Depends(read_payload)]
+
+
+def sample_spec(payload: dict[str, Any]) -> SampleSpec | None:
+    """Return the payload's approximate-mode settings, or None for a full scan."""
+
+    raw = payload.get("sample")
+    return None if raw is None else SampleSpec.parse_obj(raw)
+
+
+def class_conditional(payload: dict[str, Any]) -> bool | None:
+    """Return the payload's per-class poisoning override, coerced as ``DatasetEnvelope`` does.
+
+    None leaves the choice to ``TDIE_POISON_CLASS_CONDITIONAL``.
+    """
+
+    return parse_obj_as(bool | None, payload.get("class_conditional"))
+
+
+def load_dataset(
+    payload: dict[str, Any], columns: Sequence[str] | None = None, screen: bool = True
+) -> tuple[DatasetSchema, Sequence[dict[str, Any]]]:
+    """Validate incoming payload and return schema and records.
+
+    Referenced datasets are projected onto ``columns`` (default: the schema's fields) so
+    only the data the calling engines need is read from disk. Unless ``screen`` is off,
+    full datasets are checked against the known-bad blocklist and rejected with
+    ``KnownBadDataset`` on a match; projected ones cannot match and are not checked.
+    Sampled requests check only a sample-sized set of blocks.
+    """
+    with timed("load_dataset") as stage:
+        envelope_fields = {key: value for key, value in payload.items() if key != "records"}
+        try:
+            envelope = DatasetEnvelope(**envelope_fields)
+        except ValidationError as exc:
+            logger.error("Dataset payload validation failed: %s", exc)
+            raise
+
+        if (envelope.dataset_schema is None) == (envelope.schema_ref is None):
+            raise ValueError("Supply exactly one of 'schema' or 'schema_ref'")
+        schema = envelope.dataset_schema
+        if envelope.schema_ref is not None:
+            try:
+                schema = resolve_schema(envelope.schema_ref)
+            except KeyError as exc:
+                raise ValueError(exc.args[0]) from None
+
+        raw_records = payload.get("records")
+        if (raw_records is None) == (envelope.dataset is None):
+            raise ValueError("Supply exactly one of 'records' or 'dataset'")
+
+        if envelope.dataset is not None:
+            wanted = columns or [field.name for field in schema.fields]
+            records: Sequence[dict[str, Any]] = open_reference(envelope.dataset, wanted)
+        else:
+            if not isinstance(raw_records, list):
+                raise ValueError("Records must be a list of objects")
+            records = ColumnarDataset.from_records(raw_records)
+
+        if not records:
+            raise ValueError("No records supplied")
+
+        stage.rows = len(records)
+        if screen and (columns is None or envelope.dataset is None):
+            spec = envelope.sample
+            if spec is None:
+                screen_dataset(records, len(records))
+            else:
+                screen_dataset(records, len(records), spec.size, spec.seed)
+        logger.info("Dataset payload received with %d records", len(records))
+    return schema, records
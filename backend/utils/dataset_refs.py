@@ -0,0 +1,225 @@
+"""Open on-disk datasets by reference as memory-mapped or column-projected arrays."""
+
+from __future__ import annotations
+
+import json
+import os
+from collections.abc import Sequence
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+from pydantic import BaseModel, root_validator
+
+from backend.utils.columnar import ColumnarDataset
+from backend.utils.logger import get_logger
+from backend.utils.metrics import record_cache
+from backend.utils.storage import update_json
+
+logger = get_logger(__name__)
+
+DATASET_ROOT = Path(os.environ.get("TDIE_DATASET_ROOT", "data"))
+DATASET_REGISTRY = Path("data/dataset_registry.json")
+SUFFIX_FORMATS = {
+    ".npy": "npy",
+    ".arrow": "arrow",
+    ".feather": "arrow",
+    ".ipc": "arrow",
+    ".parquet": "parquet",
+    ".csv": "csv",
+}
+SUPPORTED_FORMATS = {"npy", "arrow", "parquet", "csv"}
+
+
+class DatasetReference(BaseModel):
+    """Pointer to a dataset on local disk, either by path or by registered id."""
+
+    path: str | None = None
+    id: str | None = None
+    format: str | None = None
+
+    @root_validator(skip_on_failure=True)
+    def exactly_one_target(cls, values: dict[str, Any]) -> dict[str, Any]:  # noqa: N805
+        if bool(values.get("path")) == bool(values.get("id")):
+            raise ValueError("Dataset reference needs exactly one of 'path' or 'id'")
+        if values.get("format") and values["format"] not in SUPPORTED_FORMATS:
+            raise ValueError(f"Unsupported dataset format {values['format']}")
+        return values
+
+
+_registry_cache: tuple[tuple[str, int, int], dict[str, dict[str, Any]]] | None = None
+
+
+def _registry() -> dict[str, dict[str, Any]]:
+    """Return the registry, re-reading the file only when its path, mtime or size changed."""
+
+    global _registry_cache
+    try:
+        stat = DATASET_REGISTRY.stat()
+    except FileNotFoundError:
+        return {}
+    key = (str(DATASET_REGISTRY), stat.st_mtime_ns, stat.st_size)
+    hit = _registry_cache is not None and _registry_cache[0] == key
+    record_cache("dataset_registry", hit)
+    if not hit:
+        _registry_cache = (key, json.loads(DATASET_REGISTRY.read_text() or "{}"))
+    return dict(_registry_cache[1])
+
+
+def list_datasets() -> dict[str, dict[str, Any]]:
+    """Return every registered dataset id with its stored path and format."""
+
+    return _registry()
+
+
+def register_dataset(dataset_id: str, path: str, fmt: str | None = None) -> dict[str, Any]:
+    """Register a dataset id for a file or column directory under the dataset root."""
+
+    resolved = _resolve_path(path)
+    entry = {"path": str(resolved), "format": fmt or infer_format(resolved)}
+    update_json(DATASET_REGISTRY, lambda registry: {**registry, dataset_id: entry}, {})
+    logger.info("Registered dataset %s at %s", dataset_id, resolved)
+    return entry
+
+
+def _resolve_path(path: str) -> Path:
+    """Resolve ``path`` against the dataset root, refusing anything that escapes it."""
+
+    root = DATASET_ROOT.resolve()
+    candidate = (root / path).resolve()
+    if candidate != root and root not in candidate.parents:
+        raise ValueError("Dataset path must be inside the dataset root")
+    if not candidate.exists():
+        raise ValueError(f"Dataset path {path} does not exist")
+    return candidate
+
+
+def infer_format(path: Path) -> str:
+    """Infer a dataset format from its suffix; directories are ``npy`` column sets."""
+
+    if path.is_dir():
+        return "npy"
+    fmt = SUFFIX_FORMATS.get(path.suffix.lower())
+    if fmt is None:
+        raise ValueError(f"Cannot infer dataset format from {path.name}")
+    return fmt
+
+
+def open_reference(
+    reference: DatasetReference, columns: Sequence[str] | None = None
+) -> ColumnarDataset:
+    """Open a referenced dataset, reading only ``columns`` when given."""
+
+    path, fmt = _reference_target(reference)
+    return open_dataset(path, fmt, columns)
+
+
+def reference_bytes(reference: DatasetReference) -> int:
+    """Size on disk of a referenced dataset, summed over a column directory's files."""
+
+    path, _ = _reference_target(reference)
+    if path.is_dir():
+        return sum(child.stat().st_size for child in path.iterdir() if child.is_file())
+    return path.stat().st_size
+
+
+def _reference_target(reference: DatasetReference) -> tuple[Path, str]:
+    """Resolve a reference to its path under the dataset root and its format."""
+
+    if reference.id is not None:
+        entry = _registry().get(reference.id)
+        if entry is None:
+            raise ValueError(f"Unknown dataset id {reference.id}")
+        path = _resolve_path(entry["path"])
+        fmt = reference.format or entry.get("format")
+    else:
+        path = _resolve_path(reference.path or "")
+        fmt = reference.format
+    return path, fmt or infer_format(path)
+
+
+def open_dataset(path: Path, fmt: str, columns: Sequence[str] | None = None) -> ColumnarDataset:
+    """Open ``path`` as a columnar dataset without materialising unused columns."""
+
+    wanted = list(columns) if columns else None
+    if fmt == "npy":
+        dataset = _open_npy(path, wanted)
+    elif fmt == "arrow":
+        dataset = _open_arrow(path, wanted)
+    elif fmt == "parquet":
+        dataset = _open_parquet(path, wanted)
+    elif fmt == "csv":
+        dataset = _open_csv(path, wanted)
+    else:
+        raise ValueError(f"Unsupported dataset format {fmt}")
+    logger.info(
+        "Opened %s dataset %s with %d rows and columns %s",
+        fmt,
+        path.name,
+        len(dataset),
+        dataset.column_names,
+    )
+    return dataset
+
+
+def _open_npy(path: Path, columns: list[str] | None) -> ColumnarDataset:
+    """Memory-map a structured ``.npy`` file or a directory of one ``<column>.npy`` per field."""
+
+    if path.is_dir():
+        files = {file.stem: file for file in sorted(path.glob("*.npy"))}
+        names = [name for name in columns if name in files] if columns else list(files)
+        return ColumnarDataset({name: np.load(files[name], mmap_mode="r") for name in names})
+
+    array = np.load(path, mmap_mode="r")
+    if array.dtype.names is None:
+        raise ValueError("Single .npy datasets must use a structured dtype with named fields")
+    names = [name for name in columns if name in array.dtype.names] if columns else None
+    return ColumnarDataset({name: array[name] for name in names or array.dtype.names})
+
+
+def _table_to_columns(table: Any) -> ColumnarDataset:
+    """Convert a pyarrow table to NumPy, zero-copy wherever Arrow allows it."""
+
+    return ColumnarDataset(
+        {name: table.column(name).to_numpy(zero_copy_only=False) for name in table.column_names}
+    )
+
+
+def _open_arrow(path: Path, columns: list[str] | None) -> ColumnarDataset:
+    try:
+        import pyarrow as pa
+    except ImportError as exc:  # optional dependency
+        raise ValueError("Arrow IPC datasets require the optional 'pyarrow' package") from exc
+    source = pa.memory_map(str(path), "r")
+    table = pa.ipc.open_file(source).read_all()
+    if columns:
+        table = table.select([name for name in columns if name in table.column_names])
+    return _table_to_columns(table)
+
+
+def _open_parquet(path: Path, columns: list[str] | None) -> ColumnarDataset:
+    try:
+        import pyarrow.parquet as pq
+    except ImportError as exc:  # optional dependency
+        raise ValueError("Parquet datasets require the optional 'pyarrow' package") from exc
+    if columns:
+        available = pq.read_schema(str(path)).names
+        columns = [name for name in columns if name in available]
+    table = pq.read_table(str(path), columns=columns, memory_map=True)
+    return _table_to_columns(table)
+
+
+def _open_csv(path: Path, columns: list[str] | None) -> ColumnarDataset:
+    import pandas as pd
+
+    if columns:
+        header = pd.read_csv(path, nrows=0).columns
+        columns = [name for name in columns if name in header]
+    frame = pd.read_csv(path, usecols=columns)
+    data: dict[str, np.ndarray] = {}
+    for name in frame.columns:
+        values = frame[name].to_numpy()
+        if values.dtype.kind == "O":
+            values = np.where(pd.isna(values), None, values)
+        data[str(name)] = values
+    return ColumnarDataset(data)
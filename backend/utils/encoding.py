@@ -0,0 +1,272 @@
+"""Content negotiation and compact binary encoding for large result documents.
+
+JSON stays the default. A client sending ``Accept: application/vnd.tdie.compact+json``, or
+``application/msgpack`` where msgpack is installed, receives long per-sample lists in binary
+form:
+
+- strictly increasing index lists (suspected samples, detector hits) become index sets,
+  stored as uint32 ``(start, length)`` runs or a packed bitmap, whichever is smaller;
+- lists of floats become little-endian float64 arrays.
+
+In compact JSON these appear as ``{"$indices": {"encoding": ..., "data": <base64>}}`` and
+``{"$float64": <base64>}``; msgpack carries them as ext types 1 and 2. Lists shorter than
+``COMPACT_MIN_ITEMS`` are left as they are. Compact bodies are compressed with zstd (when
+zstandard is installed) or gzip according to ``Accept-Encoding``. ``decode_compact`` turns a
+compact body back into the JSON document.
+"""
+
+from __future__ import annotations
+
+import base64
+import gzip
+import json
+from typing import Any
+
+import numpy as np
+from fastapi import Request, Response
+from fastapi.encoders import jsonable_encoder
+
+from backend.utils.data_loader import decode_json
+from backend.utils.metrics import timed
+
+try:  # optional accelerator; the stdlib encoder is used when it is missing
+    import orjson
+except ImportError:  # pragma: no cover - exercised only without orjson installed
+    orjson = None
+
+try:  # optional binary container
+    import msgpack
+except ImportError:
+    msgpack = None
+
+try:  # optional compression codec
+    import zstandard
+except ImportError:
+    zstandard = None
+
+JSON_MEDIA_TYPE = "application/json"
+COMPACT_JSON_MEDIA_TYPE = "application/vnd.tdie.compact+json"
+MSGPACK_MEDIA_TYPE = "application/msgpack"
+COMPACT_MIN_ITEMS = 32
+# Fast level: the packed payload is already dense, so higher levels gain little.
+GZIP_LEVEL = 1
+INDEX_SET_EXT = 1
+FLOAT64_EXT = 2
+_INDEX_ENCODINGS = ("runs", "bitmap")
+
+
+class IndexSet:
+    """Strictly increasing non-negative integers packed as runs or a bitmap."""
+
+    def __init__(self, encoding: str, data: bytes) -> None:
+        self.encoding = encoding
+        self.data = data
+
+    @classmethod
+    def pack(cls, values: list[Any]) -> IndexSet | None:
+        """Pack ``values`` if they are increasing uint32 indices, else return None."""
+
+        if type(values[0]) is not int:
+            return None
+        try:
+            indices = np.asarray(values)
+        except (ValueError, OverflowError):
+            return None
+        if indices.dtype.kind not in "iu" or indices.ndim != 1:
+            return None
+        steps = np.diff(indices)
+        if indices[0] < 0 or indices[-1] >= 2**32 or (steps <= 0).any():
+            return None
+        breaks = np.flatnonzero(steps != 1) + 1
+        starts = indices[np.r_[0, breaks]]
+        lengths = np.diff(np.r_[0, breaks, len(indices)])
+        runs = np.column_stack([starts, lengths]).astype("<u4").tobytes()
+        if len(runs) <= (int(indices[-1]) + 8) // 8:
+            return cls("runs", runs)
+        mask = np.zeros(int(indices[-1]) + 1, dtype=bool)
+        mask[indices] = True
+        return cls("bitmap", np.packbits(mask, bitorder="little").tobytes())
+
+    def unpack(self) -> list[int]:
+        if self.encoding == "runs":
+            runs = np.frombuffer(self.data, dtype="<u4").reshape(-1, 2).astype(np.int64)
+            if not len(runs):
+                return []
+            offsets = np.repeat(runs[:, 0] - np.r_[0, np.cumsum(runs[:-1, 1])], runs[:, 1])
+            return (offsets + np.arange(len(offsets))).tolist()
+        bits = np.unpackbits(np.frombuffer(self.data, dtype=np.uint8), bitorder="little")
+        return np.flatnonzero(bits).tolist()
+
+
+class FloatArray:
+    """A list of floats stored as little-endian float64."""
+
+    def __init__(self, data: bytes) -> None:
+        self.data = data
+
+    @classmethod
+    def pack(cls, values: list[Any]) -> FloatArray | None:
+        """Pack ``values`` when every item is a float; ints would come back as floats."""
+
+        if not all(type(value) is float for value in values):
+            return None
+        return cls(np.asarray(values, dtype="<f8").tobytes())
+
+    def unpack(self) -> list[float]:
+        return np.frombuffer(self.data, dtype="<f8").tolist()
+
+
+def available_media_types() -> list[str]:
+    """Response media types this server can produce, JSON first."""
+
+    types = [JSON_MEDIA_TYPE, COMPACT_JSON_MEDIA_TYPE]
+    if msgpack is not None:
+        types.append(MSGPACK_MEDIA_TYPE)
+    return types
+
+
+def _accepted(header: str | None) -> list[tuple[str, float]]:
+    """Parse an ``Accept``-style header into ``(value, q)`` pairs, highest q first."""
+
+    ranges: list[tuple[str, float]] = []
+    for part in (header or "").split(","):
+        value, *params = (item.strip() for item in part.split(";"))
+        if not value:
+            continue
+        quality = 1.0
+        for param in params:
+            name, _, raw = param.partition("=")
+            if name.strip() == "q":
+                try:
+                    quality = float(raw)
+                except ValueError:
+                    quality = 0.0
+        ranges.append((value.lower(), quality))
+    return sorted(ranges, key=lambda item: -item[1])
+
+
+def negotiate_media_type(accept: str | None) -> str:
+    """Pick the response media type for an ``Accept`` header, falling back to JSON."""
+
+    supported = available_media_types()
+    for media_type, quality in _accepted(accept):
+        if quality <= 0:
+            break
+        if media_type in supported:
+            return media_type
+        if media_type in ("*/*", "application/*"):
+            return JSON_MEDIA_TYPE
+    return JSON_MEDIA_TYPE
+
+
+def negotiate_encoding(accept_encoding: str | None) -> str | None:
+    """Pick ``zstd`` or ``gzip`` for an ``Accept-Encoding`` header, or None for identity."""
+
+    offered = dict(_accepted(accept_encoding))
+    for coding in ("zstd", "gzip") if zstandard is not None else ("gzip",):
+        if offered.get(coding, offered.get("*", 0.0)) > 0:
+            return coding
+    return None
+
+
+def compact(value: Any) -> Any:
+    """Replace long index and float lists in ``value`` with ``IndexSet``/``FloatArray``."""
+
+    if isinstance(value, dict):
+        return {key: compact(item) for key, item in value.items()}
+    if not isinstance(value, list) or not value:
+        return value
+    if len(value) >= COMPACT_MIN_ITEMS:
+        packed = IndexSet.pack(value) or FloatArray.pack(value)
+        if packed is not None:
+            return packed
+    if isinstance(value[0], dict | list):
+        return [compact(item) for item in value]
+    return value
+
+
+def _json_default(value: Any) -> Any:
+    if isinstance(value, IndexSet):
+        data = base64.b64encode(value.data).decode("ascii")
+        return {"$indices": {"encoding": value.encoding, "data": data}}
+    if isinstance(value, FloatArray):
+        return {"$float64": base64.b64encode(value.data).decode("ascii")}
+    if isinstance(value, np.generic):
+        return value.item()
+    # Anything else is encoded as FastAPI's JSON responses would encode it.
+    return jsonable_encoder(value)
+
+
+def _msgpack_default(value: Any) -> Any:
+    if isinstance(value, IndexSet):
+        tag = bytes([_INDEX_ENCODINGS.index(value.encoding)])
+        return msgpack.ExtType(INDEX_SET_EXT, tag + value.data)
+    if isinstance(value, FloatArray):
+        return msgpack.ExtType(FLOAT64_EXT, value.data)
+    return _json_default(value)
+
+
+def encode_compact(content: Any, media_type: str) -> bytes:
+    """Serialise ``content`` in one of the compact media types."""
+
+    tree = compact(content)
+    if media_type == MSGPACK_MEDIA_TYPE:
+        return msgpack.packb(tree, default=_msgpack_default)
+    if orjson is not None:
+        return orjson.dumps(tree, default=_json_default)
+    return json.dumps(tree, default=_json_default, separators=(",", ":")).encode("utf-8")
+
+
+def compress(body: bytes, coding: str) -> bytes:
+    if coding == "zstd":
+        return zstandard.ZstdCompressor().compress(body)
+    return gzip.compress(body, compresslevel=GZIP_LEVEL)
+
+
+def _expand(value: Any) -> Any:
+    if isinstance(value, dict):
+        if len(value) == 1 and "$indices" in value:
+            packed = value["$indices"]
+            return IndexSet(packed["encoding"], base64.b64decode(packed["data"])).unpack()
+        if len(value) == 1 and "$float64" in value:
+            return FloatArray(base64.b64decode(value["$float64"])).unpack()
+        return {key: _expand(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [_expand(item) for item in value]
+    return value
+
+
+def _msgpack_ext(code: int, data: bytes) -> Any:
+    if code == INDEX_SET_EXT:
+        return IndexSet(_INDEX_ENCODINGS[data[0]], data[1:]).unpack()
+    if code == FLOAT64_EXT:
+        return FloatArray(data).unpack()
+    return msgpack.ExtType(code, data)
+
+
+def decode_compact(body: bytes, media_type: str, content_encoding: str | None = None) -> Any:
+    """Inverse of a negotiated compact response: the document as JSON would have carried it."""
+
+    if content_encoding == "zstd":
+        body = zstandard.ZstdDecompressor().decompress(body)
+    elif content_encoding == "gzip":
+        body = gzip.decompress(body)
+    if media_type == MSGPACK_MEDIA_TYPE:
+        return msgpack.unpackb(body, ext_hook=_msgpack_ext, strict_map_key=False)
+    return _expand(decode_json(body))
+
+
+def negotiated(request: Request, content: Any) -> Any:
+    """Return ``content`` for FastAPI's JSON encoding, or a compact ``Response`` if asked for."""
+
+    media_type = negotiate_media_type(request.headers.get("accept"))
+    if media_type == JSON_MEDIA_TYPE:
+        return content
+    with timed("encode_response"):
+        body = encode_compact(content, media_type)
+        headers = {"Vary": "Accept, Accept-Encoding"}
+        coding = negotiate_encoding(request.headers.get("accept-encoding"))
+        if coding is not None:
+            body = compress(body, coding)
+            headers["Content-Encoding"] = coding
+    return Response(content=body, media_type=media_type, headers=headers)
@@ -0,0 +1,188 @@
+"""Content-addressed, deduplicated store for training evidence bundles.
+
+A bundle is addressed by the SHA-256 of its rendered text, so an identical report maps to the
+file already stored. Bundles are gzip-compressed under ``EVIDENCE_DIR/<aa>/<digest>.gz`` by
+a background thread: ``submit`` only renders, hashes and enqueues, so gating decisions never
+wait on disk, and ``read`` serves a bundle from memory until its write lands. Every reference
+refreshes a bundle's modification time; the writer periodically removes bundles unreferenced
+for ``EVIDENCE_RETENTION_DAYS`` and the least recently referenced beyond ``EVIDENCE_MAX_BUNDLES``.
+"""
+
+from __future__ import annotations
+
+import atexit
+import gzip
+import hashlib
+import os
+import queue
+import re
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Any
+
+from backend.utils.hash_utils import stable_json
+from backend.utils.logger import get_logger
+from backend.utils.pdf_export import render_evidence
+
+logger = get_logger(__name__)
+
+EVIDENCE_DIR = Path(os.environ.get("TDIE_EVIDENCE_DIR", "logs/evidence"))
+EVIDENCE_RETENTION_DAYS = float(os.environ.get("TDIE_EVIDENCE_RETENTION_DAYS", "365"))
+EVIDENCE_MAX_BUNDLES = int(os.environ.get("TDIE_EVIDENCE_MAX_BUNDLES", "10000"))
+# Garbage collection runs after this many bundle writes.
+EVIDENCE_GC_EVERY = 100
+DIGEST_PATTERN = re.compile(r"^[0-9a-f]{64}$")
+
+
+def link_evidence(
+    report: dict[str, Any], dataset_hash: str | None, provenance: dict[str, Any] | None
+) -> dict[str, Any]:
+    """Add the dataset fingerprint and provenance entry (with its digest) to ``report``."""
+
+    linked = dict(report)
+    if dataset_hash:
+        linked["dataset_hash"] = dataset_hash
+    if provenance is not None:
+        entry = stable_json(provenance)
+        linked["provenance_digest"] = hashlib.sha256(entry.encode("utf-8")).hexdigest()
+        linked["provenance"] = entry
+    return linked
+
+
+class EvidenceStore:
+    """Writes bundles under ``root`` from a background thread and serves them by digest."""
+
+    def __init__(
+        self,
+        root: Path,
+        retention_days: float = EVIDENCE_RETENTION_DAYS,
+        max_bundles: int = EVIDENCE_MAX_BUNDLES,
+        gc_every: int = EVIDENCE_GC_EVERY,
+    ) -> None:
+        self.root = root
+        self.retention_days = retention_days
+        self.max_bundles = max_bundles
+        self.gc_every = gc_every
+        self._pending: dict[str, bytes] = {}
+        self._lock = threading.Lock()
+        self._writes = 0
+        self._queue: queue.Queue[tuple[str | None, threading.Event | None]] = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name=f"evidence-{root.name}", daemon=True)
+        self._thread.start()
+
+    def path_for(self, digest: str) -> Path:
+        return self.root / digest[:2] / f"{digest}.gz"
+
+    def submit(self, report: dict[str, Any]) -> str:
+        """Queue ``report`` for storage and return its content digest."""
+
+        body = render_evidence(report).encode("utf-8")
+        digest = hashlib.sha256(body).hexdigest()
+        with self._lock:
+            if digest in self._pending:
+                return digest
+            self._pending[digest] = body
+        self._queue.put((digest, None))
+        return digest
+
+    def read(self, digest: str) -> bytes | None:
+        """Return the gzip-compressed bundle for ``digest``, or None if it is not stored."""
+
+        if not DIGEST_PATTERN.match(digest):
+            return None
+        with self._lock:
+            body = self._pending.get(digest)
+        if body is not None:
+            return gzip.compress(body, mtime=0)
+        try:
+            return self.path_for(digest).read_bytes()
+        except FileNotFoundError:
+            return None
+
+    def flush(self, timeout: float | None = 5.0) -> bool:
+        """Wait until all previously submitted bundles are on disk; False on timeout."""
+
+        if not self._thread.is_alive():
+            return self._queue.empty()
+        done = threading.Event()
+        self._queue.put((None, done))
+        return done.wait(timeout)
+
+    def collect_garbage(self, now: float | None = None) -> int:
+        """Remove expired bundles and the oldest beyond ``max_bundles``; returns the count."""
+
+        cutoff = (time.time() if now is None else now) - self.retention_days * 86400
+        bundles: list[tuple[float, Path]] = []
+        for path in self.root.glob("*/*.gz"):
+            try:
+                bundles.append((path.stat().st_mtime, path))
+            except FileNotFoundError:
+                continue
+        bundles.sort(reverse=True)
+        removed = 0
+        for rank, (modified, path) in enumerate(bundles):
+            if rank >= self.max_bundles or modified < cutoff:
+                path.unlink(missing_ok=True)
+                removed += 1
+        if removed:
+            logger.info("Evidence retention removed %d bundles from %s", removed, self.root)
+        return removed
+
+    def _run(self) -> None:
+        while True:
+            digest, done = self._queue.get()
+            if digest is not None:
+                self._store(digest)
+            if done is not None:
+                done.set()
+
+    def _store(self, digest: str) -> None:
+        path = self.path_for(digest)
+        with self._lock:
+            body = self._pending[digest]
+        try:
+            if path.exists():
+                os.utime(path)  # duplicate report: refresh its retention clock
+            else:
+                path.parent.mkdir(parents=True, exist_ok=True)
+                handle, temp = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+                with os.fdopen(handle, "wb") as stream:
+                    stream.write(gzip.compress(body, mtime=0))
+                os.replace(temp, path)
+                logger.info("Evidence bundle %s written to %s", digest, path)
+                self._writes += 1
+                if self._writes % self.gc_every == 0:
+                    self.collect_garbage()
+        except OSError as exc:
+            logger.error("Failed to store evidence bundle %s: %s", digest, exc)
+        finally:
+            with self._lock:
+                self._pending.pop(digest, None)
+
+
+_stores: dict[Path, EvidenceStore] = {}
+_stores_lock = threading.Lock()
+
+
+def evidence_store(root: Path | None = None) -> EvidenceStore:
+    """Return the process-wide store for ``root`` (default ``EVIDENCE_DIR``)."""
+
+    root = EVIDENCE_DIR if root is None else root
+    with _stores_lock:
+        if root not in _stores:
+            _stores[root] = EvidenceStore(root)
+        return _stores[root]
+
+
+def flush_evidence_stores(timeout: float | None = 5.0) -> bool:
+    """Flush every active evidence store; returns False if any timed out."""
+
+    with _stores_lock:
+        stores = list(_stores.values())
+    results = [store.flush(timeout) for store in stores]
+    return all(results)
+
+
+atexit.register(flush_evidence_stores)
@@ -4,43 +4,122 @@ from __future__ import annotations
 
 import hashlib
 import json
-from collections.abc import Iterable
+from collections.abc import Iterable, Iterator, Sequence
+from itertools import islice
 from pathlib import Path
 from typing import Any
 
+from backend.utils.storage import list_store
 
-def _stable_json(obj: Any) -> str:
+# Records serialised per step when hashing, so no full copy of the dataset is built.
+HASH_BLOCK_ROWS = 4096
+
+
+def stable_json(obj: Any) -> str:
+    """Serialise ``obj`` deterministically (sorted keys) for hashing."""
     return json.dumps(obj, sort_keys=True, default=str)
 
 
 def hash_record(record: dict[str, Any]) -> str:
     """Return SHA-256 hash for a single record."""
-    stable = _stable_json(record).encode("utf-8")
+    stable = stable_json(record).encode("utf-8")
     return hashlib.sha256(stable).hexdigest()
 
 
+def record_digest(record: dict[str, Any]) -> bytes:
+    """Return a compact 16-byte digest used as a duplicate-detection key."""
+    return hashlib.blake2b(stable_json(record).encode("utf-8"), digest_size=16).digest()
+
+
+def _blocks(items: Iterable[Any], size: int = HASH_BLOCK_ROWS) -> Iterator[list[Any]]:
+    iterator = iter(items)
+    while block := list(islice(iterator, size)):
+        yield block
+
+
+def _update_json_list(hasher: Any, block: list[Any], first: bool) -> None:
+    """Feed ``block`` to ``hasher`` as the next items of a ``stable_json`` list."""
+    if not first:
+        hasher.update(b", ")
+    hasher.update(stable_json(block)[1:-1].encode("utf-8"))
+
+
 def hash_dataset(records: Iterable[dict[str, Any]]) -> str:
-    """Return SHA-256 hash for an entire dataset."""
-    aggregate = _stable_json(list(records)).encode("utf-8")
-    return hashlib.sha256(aggregate).hexdigest()
+    """Return SHA-256 hash for an entire dataset.
+
+    Streams the records through the hasher block by block; the digest is that of
+    ``stable_json(list(records))``.
+    """
+    hasher = hashlib.sha256(b"[")
+    for index, block in enumerate(_blocks(records)):
+        _update_json_list(hasher, block, index == 0)
+    hasher.update(b"]")
+    return hasher.hexdigest()
+
+
+def hash_dataset_blocks(
+    records: Iterable[dict[str, Any]], block_rows: int
+) -> tuple[str, list[str]]:
+    """Return ``hash_dataset(records)`` and the ``hash_block`` of each ``block_rows`` rows.
+
+    Both come from a single serialisation pass over the records.
+    """
+    hasher = hashlib.sha256(b"[")
+    block_hashes = []
+    for index, block in enumerate(_blocks(records, block_rows)):
+        rows_json = [stable_json(record) for record in block]
+        if index:
+            hasher.update(b", ")
+        hasher.update(", ".join(rows_json).encode("utf-8"))
+        block_hashes.append(hash_block(rows_json))
+    hasher.update(b"]")
+    return hasher.hexdigest(), block_hashes
+
+
+def hash_block(rows_json: Sequence[str]) -> str:
+    """Return ``hash_dataset`` of a block of records given each record's ``stable_json``."""
+    return hashlib.sha256(("[" + ", ".join(rows_json) + "]").encode("utf-8")).hexdigest()
+
+
+def merkle_root(leaves: Sequence[str]) -> str:
+    """Return the root of a binary SHA-256 Merkle tree over hex leaf digests.
+
+    An odd node at any level is paired with itself; an empty tree hashes the empty string.
+    """
+    if not leaves:
+        return hashlib.sha256(b"").hexdigest()
+    level = list(leaves)
+    while len(level) > 1:
+        if len(level) % 2:
+            level.append(level[-1])
+        level = [
+            hashlib.sha256(bytes.fromhex(left) + bytes.fromhex(right)).hexdigest()
+            for left, right in zip(level[::2], level[1::2], strict=True)
+        ]
+    return level[0]
 
 
 def hash_features(records: Iterable[dict[str, Any]]) -> dict[str, str]:
-    """Compute per-feature hashes based on column-wise values."""
-    feature_values: dict[str, list[Any]] = {}
-    for record in records:
-        for key, value in record.items():
-            feature_values.setdefault(key, []).append(value)
+    """Compute per-feature hashes based on column-wise values.
 
-    return {
-        key: hashlib.sha256(_stable_json(values).encode("utf-8")).hexdigest()
-        for key, values in feature_values.items()
-    }
+    Each feature hashes the JSON list of its values, streamed one block of records at a time.
+    """
+    hashers: dict[str, Any] = {}
+    for block in _blocks(records):
+        block_values: dict[str, list[Any]] = {}
+        for record in block:
+            for key, value in record.items():
+                block_values.setdefault(key, []).append(value)
+        for key, values in block_values.items():
+            first = key not in hashers
+            if first:
+                hashers[key] = hashlib.sha256(b"[")
+            _update_json_list(hashers[key], values, first)
+    for hasher in hashers.values():
+        hasher.update(b"]")
+    return {key: hasher.hexdigest() for key, hasher in hashers.items()}
 
 
 def persist_hash(path: Path, data: dict[str, Any]) -> None:
-    """Persist hash metadata to disk, appending to a JSON log."""
-    path.parent.mkdir(parents=True, exist_ok=True)
-    existing = json.loads(path.read_text()) if path.exists() else []
-    existing.append(data)
-    path.write_text(json.dumps(existing, indent=2))
+    """Append hash metadata to the checksum history store for ``path``."""
+    list_store(path).append(data)
@@ -0,0 +1,278 @@
+"""Append-only, columnar time series of integrity metrics per schema.
+
+Each scored run appends one row to ``HISTORY_DIR/<schema>/<YYYY-MM>/``, a monthly segment
+holding one little-endian binary file per column (see ``COLUMNS``). Queries open only the
+segments overlapping the requested range and only the columns asked for, so charting
+months of history never touches raw data or parses JSON. A run that fails part-way through
+an append leaves some columns one row longer than others; readers use the shortest column
+and the next append trims the rest.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import math
+import os
+import re
+import time
+from collections.abc import Mapping, Sequence
+from datetime import UTC, datetime
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+
+from backend.utils.logger import get_logger
+from backend.utils.metrics import timed
+from backend.utils.storage import file_lock
+
+logger = get_logger(__name__)
+
+HISTORY_DIR = Path(os.environ.get("TDIE_HISTORY_DIR", "logs/history"))
+# Column name -> on-disk dtype. ``timestamp`` is milliseconds since the epoch (UTC).
+COLUMNS: dict[str, str] = {
+    "timestamp": "<i8",
+    "rows": "<i8",
+    "sampled": "<i1",
+    "decision": "<i1",
+    "tdie_score": "<f8",
+    "quality_score": "<f8",
+    "poisoning_risk_score": "<f8",
+    "embedding_drift": "<f8",
+    "bias_integrity_score": "<f8",
+    "demographic_parity_gap": "<f8",
+    "equal_opportunity_gap": "<f8",
+    "sensitive_feature_imbalance": "<f8",
+    "provenance_completeness": "<f8",
+    "schema_violations": "<i8",
+    "suspected_poison_samples": "<i8",
+}
+METRICS = [name for name, dtype in COLUMNS.items() if dtype == "<f8"]
+DECISIONS = ("PASS", "REVIEW", "BLOCK")
+_SCHEMA_NAME = re.compile(r"[A-Za-z0-9_-][A-Za-z0-9_.-]{0,127}")
+
+
+def _schema_dir(schema_name: str) -> Path:
+    if _SCHEMA_NAME.fullmatch(schema_name):
+        return HISTORY_DIR / schema_name
+    return HISTORY_DIR / ("_" + hashlib.sha256(schema_name.encode("utf-8")).hexdigest()[:32])
+
+
+def run_row(report: Mapping[str, Any], rows: int, sampled: bool = False) -> dict[str, Any]:
+    """Extract one history row from a ``/tdie_score`` report; missing metrics become NaN.
+
+    A short-circuited report has no ``tdie_score``, so its runs never enter score trends.
+    """
+
+    signals = report.get("signals") or {}
+    decision = report.get("decision")
+    row: dict[str, Any] = {
+        "rows": rows,
+        "sampled": int(sampled),
+        "decision": DECISIONS.index(decision) if decision in DECISIONS else -1,
+        "schema_violations": len(report.get("schema_violations") or []),
+        "suspected_poison_samples": len(report.get("suspected_poison_samples") or []),
+    }
+    for name in METRICS:
+        value = signals.get(name) if name == "embedding_drift" else report.get(name)
+        row[name] = math.nan if value is None else float(value)
+    return row
+
+
+def record_run(
+    schema_name: str,
+    report: Mapping[str, Any],
+    rows: int,
+    at: datetime | None = None,
+    sampled: bool = False,
+) -> None:
+    """Append the metrics of one scored run to the schema's monthly segment.
+
+    ``rows`` is the size of the scored dataset; ``sampled`` marks point estimates from a
+    sample of it. ``at`` backfills a run at an earlier time; by default the run is stamped now.
+    """
+
+    row = run_row(report, rows, sampled)
+    directory = _schema_dir(schema_name)
+    try:
+        with timed("record_history"), file_lock(directory / "append"):
+            row["timestamp"] = _epoch_ms(at, time.time_ns() // 1_000_000)
+            month = datetime.fromtimestamp(row["timestamp"] / 1000, UTC).strftime("%Y-%m")
+            segment = directory / month
+            segment.mkdir(exist_ok=True)
+            _repair(segment)
+            for name, dtype in COLUMNS.items():
+                with (segment / f"{name}.bin").open("ab") as handle:
+                    handle.write(np.array([row[name]], dtype=dtype).tobytes())
+    except OSError as exc:  # monitoring must not fail the scored request
+        logger.error("Failed to record history for %s: %s", schema_name, exc)
+
+
+def _repair(segment: Path) -> None:
+    """Trim columns left longer than the others by an interrupted append.
+
+    A column added to ``COLUMNS`` after the segment was started is created zero-filled.
+    """
+
+    sizes = {}
+    for name, dtype in COLUMNS.items():
+        path = segment / f"{name}.bin"
+        if path.exists():
+            sizes[path] = path.stat().st_size // np.dtype(dtype).itemsize
+    complete = min(sizes.values(), default=0)
+    for name, dtype in COLUMNS.items():
+        path = segment / f"{name}.bin"
+        if path not in sizes:
+            np.zeros(complete, dtype=dtype).tofile(path)
+    for path, length in sizes.items():
+        if length > complete:
+            logger.warning("Trimming %s to %d rows after an interrupted append", path, complete)
+            os.truncate(path, complete * np.dtype(COLUMNS[path.stem]).itemsize)
+
+
+def list_histories() -> list[str]:
+    """Schemas with recorded history."""
+
+    if not HISTORY_DIR.exists():
+        return []
+    return sorted(path.name for path in HISTORY_DIR.iterdir() if path.is_dir())
+
+
+def _epoch_ms(moment: datetime | None, default: int) -> int:
+    if moment is None:
+        return default
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=UTC)
+    return int(moment.timestamp() * 1000)
+
+
+def load_range(
+    schema_name: str,
+    start: datetime | None = None,
+    end: datetime | None = None,
+    metrics: Sequence[str] | None = None,
+) -> dict[str, np.ndarray]:
+    """Columns of the runs with ``start <= timestamp < end``, sorted by timestamp.
+
+    Always includes ``timestamp``; ``metrics`` defaults to every column.
+    """
+
+    wanted = list(COLUMNS) if metrics is None else ["timestamp", *metrics]
+    unknown = [name for name in wanted if name not in COLUMNS]
+    if unknown:
+        raise ValueError(f"Unknown history columns {unknown}")
+    wanted = list(dict.fromkeys(wanted))
+    low, high = _epoch_ms(start, -(2**62)), _epoch_ms(end, 2**62)
+    first = datetime.fromtimestamp(max(low, 0) / 1000, UTC).strftime("%Y-%m") if start else ""
+    last = datetime.fromtimestamp(high / 1000, UTC).strftime("%Y-%m") if end else "9999-99"
+    directory = _schema_dir(schema_name)
+    parts: dict[str, list[np.ndarray]] = {name: [] for name in wanted}
+    segments = sorted(directory.glob("[0-9][0-9][0-9][0-9]-[0-9][0-9]"))
+    for segment in segments:
+        if not first <= segment.name <= last:
+            continue
+        stored = {
+            name: np.fromfile(segment / f"{name}.bin", dtype=COLUMNS[name])
+            for name in wanted
+            if (segment / f"{name}.bin").exists()
+        }
+        complete = min((len(column) for column in stored.values()), default=0)
+        # Columns the segment predates read as zeros.
+        columns = {name: stored.get(name, np.zeros(complete, COLUMNS[name])) for name in wanted}
+        timestamps = columns["timestamp"][:complete]
+        selected = (timestamps >= low) & (timestamps < high)
+        for name, column in columns.items():
+            parts[name].append(column[:complete][selected])
+    result = {
+        name: np.concatenate(chunks) if chunks else np.empty(0, dtype=COLUMNS[name])
+        for name, chunks in parts.items()
+    }
+    if (np.diff(result["timestamp"]) < 0).any():  # backfilled runs land out of order
+        order = np.argsort(result["timestamp"], kind="stable")
+        result = {name: values[order] for name, values in result.items()}
+    return result
+
+
+def _json_column(values: np.ndarray) -> list[Any]:
+    if values.dtype.kind == "f":
+        return [None if math.isnan(value) else value for value in values.tolist()]
+    return values.tolist()
+
+
+def query_history(
+    schema_name: str,
+    start: datetime | None = None,
+    end: datetime | None = None,
+    metrics: Sequence[str] | None = None,
+    limit: int | None = None,
+) -> dict[str, Any]:
+    """Raw runs in the range as parallel column lists; ``limit`` keeps the latest runs."""
+
+    with timed("history_query"):
+        columns = load_range(schema_name, start, end, metrics)
+        if limit is not None:
+            columns = {name: values[-limit:] for name, values in columns.items()}
+        result: dict[str, Any] = {name: _json_column(values) for name, values in columns.items()}
+        if "decision" in result:
+            result["decision"] = [
+                DECISIONS[code] if 0 <= code < len(DECISIONS) else None
+                for code in result["decision"]
+            ]
+    return {"schema": schema_name, "runs": len(columns["timestamp"]), "columns": result}
+
+
+def downsample_history(
+    schema_name: str,
+    bucket_seconds: float,
+    start: datetime | None = None,
+    end: datetime | None = None,
+    metrics: Sequence[str] | None = None,
+) -> dict[str, Any]:
+    """Runs aggregated into ``bucket_seconds``-wide buckets aligned to the epoch.
+
+    Each float metric gets per-bucket ``mean``, ``min`` and ``max`` (ignoring missing
+    values); decisions are counted per bucket. Empty buckets are omitted.
+    """
+
+    if bucket_seconds <= 0:
+        raise ValueError("bucket_seconds must be positive")
+    metrics = METRICS if metrics is None else list(metrics)
+    numeric = [name for name in metrics if name != "decision"]
+    with timed("history_downsample"):
+        columns = load_range(schema_name, start, end, [*numeric, "decision"])
+        bucket_ms = max(1, int(bucket_seconds * 1000))
+        ids = columns["timestamp"] // bucket_ms
+        bounds = np.flatnonzero(np.r_[True, np.diff(ids) != 0]) if len(ids) else np.empty(0, int)
+        counts = np.diff(np.r_[bounds, len(ids)])
+        aggregates: dict[str, Any] = {}
+        for name in numeric:
+            values = columns[name].astype(np.float64)
+            if not len(bounds):
+                aggregates[name] = {"mean": [], "min": [], "max": []}
+                continue
+            present = ~np.isnan(values)
+            totals = np.add.reduceat(np.where(present, values, 0.0), bounds)
+            seen = np.add.reduceat(present.astype(np.int64), bounds)
+            with np.errstate(invalid="ignore", divide="ignore"):
+                means = totals / seen
+            aggregates[name] = {
+                "mean": _json_column(means),
+                "min": _json_column(np.fmin.reduceat(values, bounds)),
+                "max": _json_column(np.fmax.reduceat(values, bounds)),
+            }
+        decisions = {
+            label: (
+                np.add.reduceat((columns["decision"] == code).astype(np.int64), bounds).tolist()
+                if len(bounds)
+                else []
+            )
+            for code, label in enumerate(DECISIONS)
+        }
+    return {
+        "schema": schema_name,
+        "bucket_seconds": bucket_seconds,
+        "bucket_start": (ids[bounds] * bucket_ms).tolist(),
+        "count": counts.tolist(),
+        "metrics": aggregates,
+        "decisions": decisions,
+    }
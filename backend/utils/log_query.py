@@ -0,0 +1,194 @@
+"""Tail-seeking log queries across the active and rotated log files."""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+import re
+from collections.abc import AsyncIterator, Iterator
+from datetime import datetime
+from pathlib import Path
+
+from backend.utils.logger import LOG_FILE, REQUEST_ID_PATTERN
+
+BLOCK_SIZE = 64 * 1024
+_TIMESTAMP_FORMAT = "%Y-%m-%d %H:%M:%S"
+_LEVELS = {logging.DEBUG, logging.INFO, logging.WARNING, logging.ERROR, logging.CRITICAL}
+# asctime | name | level | request id | message; lines written before request ids were
+# logged have no request id field.
+_HEADER = re.compile(
+    r"(\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2},\d{3}) \| (\S+) \| ([A-Z]+) \| "
+    rf"(?:({REQUEST_ID_PATTERN.pattern}) \| )?(.*)",
+    re.DOTALL,
+)
+
+
+class LogQuery:
+    """Filters applied to log entries; every criterion is optional."""
+
+    def __init__(
+        self,
+        level: str | None = None,
+        logger_name: str | None = None,
+        since: datetime | None = None,
+        until: datetime | None = None,
+        request_id: str | None = None,
+    ) -> None:
+        self.min_level = logging.getLevelName(level.upper()) if level else None
+        if self.min_level is not None and not isinstance(self.min_level, int):
+            raise ValueError(f"Unknown log level {level}")
+        self.logger_name = logger_name
+        self.since = _as_log_time(since)
+        self.until = _as_log_time(until)
+        self.request_id = request_id
+
+    def matches(self, header: list[str]) -> bool:
+        """Return True if a parsed entry header satisfies every criterion."""
+
+        asctime, name, level = header[0], header[1], header[2]
+        request_id = header[3] if len(header) == 5 else "-"
+        if self.min_level is not None and logging.getLevelName(level) < self.min_level:
+            return False
+        if self.logger_name and not (
+            name == self.logger_name or name.startswith(self.logger_name + ".")
+        ):
+            return False
+        if self.since and asctime < self.since:
+            return False
+        if self.until and asctime > self.until:
+            return False
+        return not (self.request_id and request_id != self.request_id)
+
+    def before_window(self, header: list[str]) -> bool:
+        """True once entries are older than ``since``; backward scans can stop there."""
+
+        return bool(self.since) and header[0] < self.since
+
+
+def _as_log_time(value: datetime | None) -> str | None:
+    """Render a datetime in the sortable ``asctime`` layout used by the log formatter."""
+
+    if value is None:
+        return None
+    if value.tzinfo is not None:
+        value = value.astimezone().replace(tzinfo=None)
+    return value.strftime(_TIMESTAMP_FORMAT) + f",{value.microsecond // 1000:03d}"
+
+
+def _parse_header(line: str) -> list[str] | None:
+    """Split an entry's first line into its formatter fields, or None for continuations."""
+
+    match = _HEADER.fullmatch(line)
+    if match is None or logging.getLevelName(match[3]) not in _LEVELS:
+        return None
+    return [field for field in match.groups() if field is not None]
+
+
+def log_files(base: Path = LOG_FILE) -> list[Path]:
+    """Return the active log followed by its rotated backups, newest first."""
+
+    files = [base] if base.exists() else []
+    index = 1
+    while (rotated := base.with_name(f"{base.name}.{index}")).exists():
+        files.append(rotated)
+        index += 1
+    return files
+
+
+def read_lines_reversed(path: Path, block_size: int = BLOCK_SIZE) -> Iterator[str]:
+    """Yield lines from the end of ``path`` backwards, reading fixed-size blocks."""
+
+    with path.open("rb") as f:
+        position = f.seek(0, os.SEEK_END)
+        remainder = b""
+        while position > 0:
+            step = min(block_size, position)
+            position -= step
+            f.seek(position)
+            chunk = f.read(step) + remainder
+            lines = chunk.split(b"\n")
+            remainder = lines[0]
+            for raw in reversed(lines[1:]):
+                if raw:
+                    yield raw.decode("utf-8", errors="replace")
+        if remainder:
+            yield remainder.decode("utf-8", errors="replace")
+
+
+def iter_entries_reversed(files: list[Path]) -> Iterator[tuple[list[str] | None, str]]:
+    """Yield ``(header, entry_text)`` newest first, gluing continuation lines to their entry."""
+
+    pending: list[str] = []
+    for path in files:
+        for line in read_lines_reversed(path):
+            header = _parse_header(line)
+            if header is None:
+                pending.append(line)
+                continue
+            yield header, "\n".join([line, *reversed(pending)]) + "\n"
+            pending = []
+    if pending:
+        yield None, "\n".join(reversed(pending)) + "\n"
+
+
+def query_logs(query: LogQuery, limit: int, files: list[Path] | None = None) -> list[str]:
+    """Return up to ``limit`` most recent matching entries in chronological order.
+
+    Work is proportional to the entries scanned from the end, not to total file size, and
+    the scan stops as soon as entries fall before ``query.since``.
+    """
+
+    found: list[str] = []
+    for header, text in iter_entries_reversed(log_files() if files is None else files):
+        if header is None:
+            continue
+        if query.before_window(header):
+            break
+        if query.matches(header):
+            found.append(text)
+            if len(found) >= limit:
+                break
+    found.reverse()
+    return found
+
+
+async def follow_logs(
+    query: LogQuery, path: Path = LOG_FILE, poll_interval: float = 0.5
+) -> AsyncIterator[str]:
+    """Yield matching lines appended to ``path`` from now on, following rotations."""
+
+    handle = None
+    inode = None
+    skip_existing = path.exists()
+    buffer = b""
+    try:
+        while True:
+            if handle is None and path.exists():
+                handle = path.open("rb")
+                inode = os.fstat(handle.fileno()).st_ino
+                if skip_existing:
+                    handle.seek(0, os.SEEK_END)
+                    skip_existing = False
+            if handle is not None:
+                chunk = handle.read()
+                if chunk:
+                    *lines, buffer = (buffer + chunk).split(b"\n")
+                    for raw in lines:
+                        line = raw.decode("utf-8", errors="replace")
+                        header = _parse_header(line)
+                        if header is not None and query.matches(header):
+                            yield line + "\n"
+                    continue
+                try:
+                    rotated = os.stat(path).st_ino != inode
+                except FileNotFoundError:
+                    rotated = True
+                if rotated:
+                    handle.close()
+                    handle, buffer = None, b""
+                    continue
+            await asyncio.sleep(poll_interval)
+    finally:
+        if handle is not None:
+            handle.close()
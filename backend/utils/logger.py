@@ -1,27 +1,118 @@
-"""Centralized logging utilities for TDIE."""
+"""Centralized logging utilities for TDIE.
+
+Loggers hand records to a bounded in-memory queue; a single background listener owns the
+rotating file and console handlers, so request threads never wait on log I/O. The listener,
+log directory and file handle are created when the first record is emitted, not at import.
+"""
 
 from __future__ import annotations
 
+import atexit
+import contextlib
+import contextvars
 import logging
-from logging.handlers import RotatingFileHandler
+import os
+import queue
+import re
+import threading
+from collections.abc import Callable
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
 from pathlib import Path
 
 LOG_DIR = Path("logs")
-LOG_DIR.mkdir(parents=True, exist_ok=True)
 LOG_FILE = LOG_DIR / "tdie.log"
+LOG_FORMAT = "%(asctime)s | %(name)s | %(levelname)s | %(request_id)s | %(message)s"
+# Shape of the request id field; other ``X-Request-ID`` values are replaced, so log headers
+# stay unambiguous to parse.
+REQUEST_ID_PATTERN = re.compile(r"[A-Za-z0-9._:-]{1,128}")
+LOG_QUEUE_SIZE = int(os.environ.get("TDIE_LOG_QUEUE_SIZE", "10000"))
+# "drop" discards records when the queue is full; "block" waits up to LOG_BLOCK_TIMEOUT first.
+LOG_QUEUE_POLICY = os.environ.get("TDIE_LOG_QUEUE_POLICY", "drop")
+LOG_BLOCK_TIMEOUT = 0.5
+
+request_id_var: contextvars.ContextVar[str] = contextvars.ContextVar("request_id", default="-")
+
+
+class RequestIdFilter(logging.Filter):
+    """Stamp records with the current request id while still on the caller's thread."""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.request_id = request_id_var.get()
+        return True
+
+
+class BoundedQueueHandler(QueueHandler):
+    """Queue handler that applies a drop or bounded-block policy when the queue is full."""
+
+    def __init__(
+        self,
+        log_queue: queue.Queue,
+        policy: str = "drop",
+        on_first_record: Callable[[], None] | None = None,
+    ) -> None:
+        super().__init__(log_queue)
+        self.policy = policy
+        self.dropped = 0
+        self._lock = threading.Lock()
+        self._on_first_record = on_first_record
+        # Set once the listener has stopped: records then go straight to these handlers.
+        self.direct: list[logging.Handler] | None = None
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        if self.direct is not None:
+            for handler in self.direct:
+                if record.levelno >= handler.level:
+                    handler.handle(record)
+            return
+        if self._on_first_record is not None:
+            start, self._on_first_record = self._on_first_record, None
+            start()
+        try:
+            if self.policy == "block":
+                self.queue.put(record, timeout=LOG_BLOCK_TIMEOUT)
+            else:
+                self.queue.put_nowait(record)
+        except queue.Full:
+            with self._lock:
+                self.dropped += 1
+
+
+class DrainingQueueListener(QueueListener):
+    """Queue listener whose stop waits for room in a full queue instead of raising."""
+
+    def enqueue_sentinel(self) -> None:
+        self.queue.put(self._sentinel)
 
 
 class LoggerFactory:
     """Factory for application-wide loggers with sane defaults."""
 
-    @staticmethod
-    def create_logger(name: str = "tdie", level: int = logging.INFO) -> logging.Logger:
-        """Return a configured logger that writes to file and console."""
-        logger = logging.getLogger(name)
-        logger.setLevel(level)
+    _handler: BoundedQueueHandler | None = None
+    _listener: DrainingQueueListener | None = None
+    _lock = threading.Lock()
 
-        if not logger.handlers:
-            formatter = logging.Formatter("%(asctime)s | %(name)s | %(levelname)s | %(message)s")
+    @classmethod
+    def queue_handler(cls) -> BoundedQueueHandler:
+        """Return the shared queue handler; its listener starts with the first record."""
+
+        with cls._lock:
+            if cls._handler is None:
+                log_queue: queue.Queue = queue.Queue(maxsize=LOG_QUEUE_SIZE)
+                cls._handler = BoundedQueueHandler(
+                    log_queue, LOG_QUEUE_POLICY, on_first_record=cls.start_listener
+                )
+                cls._handler.addFilter(RequestIdFilter())
+            return cls._handler
+
+    @classmethod
+    def start_listener(cls) -> None:
+        """Open the log file and console handlers and start draining the queue."""
+
+        with cls._lock:
+            if cls._listener is not None or cls._handler is None:
+                return
+            LOG_DIR.mkdir(parents=True, exist_ok=True)
+            formatter = logging.Formatter(LOG_FORMAT)
 
             file_handler = RotatingFileHandler(LOG_FILE, maxBytes=1_000_000, backupCount=3)
             file_handler.setFormatter(formatter)
@@ -29,8 +120,40 @@ class LoggerFactory:
             stream_handler = logging.StreamHandler()
             stream_handler.setFormatter(formatter)
 
-            logger.addHandler(file_handler)
-            logger.addHandler(stream_handler)
+            cls._listener = DrainingQueueListener(
+                cls._handler.queue, file_handler, stream_handler, respect_handler_level=True
+            )
+            cls._listener.start()
+            cls._handler.direct = None
+            atexit.register(cls.shutdown)
+
+    @classmethod
+    def shutdown(cls) -> None:
+        """Drain queued records to their handlers and stop the listener.
+
+        Records logged afterwards (e.g. by other exit hooks) are written synchronously.
+        """
+
+        with cls._lock:
+            listener, cls._listener = cls._listener, None
+            if listener is None:
+                return
+            listener.stop()
+            for handler in listener.handlers:
+                # A console stream may already be closed by the time exit hooks run.
+                with contextlib.suppress(OSError, ValueError):
+                    handler.flush()
+            if cls._handler is not None:
+                cls._handler.direct = list(listener.handlers)
+
+    @staticmethod
+    def create_logger(name: str = "tdie", level: int = logging.INFO) -> logging.Logger:
+        """Return a configured logger that writes to file and console."""
+        logger = logging.getLogger(name)
+        logger.setLevel(level)
+
+        if not logger.handlers:
+            logger.addHandler(LoggerFactory.queue_handler())
         return logger
 
 
@@ -0,0 +1,237 @@
+"""Memory budget for engine intermediates, spill-to-disk helpers, and peak RSS tracking.
+
+An intermediate whose estimated size exceeds ``STAGE_MEMORY_MB`` is built in a memory-mapped
+temporary file under ``SPILL_DIR`` instead of RAM, and the engine consuming it switches to a
+chunked algorithm: scans run chunk by chunk, duplicate keys are counted per hash partition,
+and percentiles are found by histogram selection rather than a full sort. Temporary files
+are unlinked on creation, so the OS reclaims them when the array is dropped.
+
+``rss_monitor`` samples the process's resident set size while requests are in flight so
+each request can report the peak it saw.
+"""
+
+from __future__ import annotations
+
+import math
+import os
+import tempfile
+import threading
+import time
+from collections.abc import Iterable, Iterator, Sequence
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+
+from backend.utils.logger import get_logger
+from backend.utils.metrics import SPILL_BYTES
+
+logger = get_logger(__name__)
+
+STAGE_MEMORY_MB = float(os.environ.get("TDIE_STAGE_MEMORY_MB", "1024"))
+SPILL_DIR = os.environ.get("TDIE_SPILL_DIR") or None
+# Working memory of a whole-dataset scan per row (Python objects built along the way).
+ROW_WORKING_BYTES = 512
+# Rows handled per step by the chunked algorithms.
+SPILL_CHUNK_ROWS = 1 << 16
+# Bins per histogram pass when selecting order statistics out of core.
+SELECTION_BINS = 4096
+RSS_SAMPLE_SECONDS = 0.01
+
+
+def stage_budget() -> float:
+    """Largest intermediate, in bytes, an engine may hold in RAM."""
+
+    return STAGE_MEMORY_MB * 1024 * 1024
+
+
+def over_budget(nbytes: float) -> bool:
+    """True when an intermediate of ``nbytes`` should be spilled to disk."""
+
+    return nbytes > stage_budget()
+
+
+def allocate(shape: tuple[int, ...], dtype: Any, label: str) -> np.ndarray:
+    """Return an uninitialised array, memory-mapped from a temporary file if over budget."""
+
+    dtype = np.dtype(dtype)
+    nbytes = math.prod(shape) * dtype.itemsize
+    if not over_budget(nbytes):
+        return np.empty(shape, dtype=dtype)
+    logger.info("Spilling %s (%.0f MB) to disk", label, nbytes / 1024 / 1024)
+    SPILL_BYTES.inc(label, amount=nbytes)
+    with tempfile.TemporaryFile(dir=SPILL_DIR) as handle:
+        # The mapping keeps the unlinked file alive after the handle is closed.
+        return np.memmap(handle, dtype=dtype, mode="w+", shape=shape)
+
+
+def chunk_bounds(rows: int, chunk_rows: int = SPILL_CHUNK_ROWS) -> Iterator[tuple[int, int]]:
+    for start in range(0, rows, chunk_rows):
+        yield start, min(start + chunk_rows, rows)
+
+
+def count_repeated(chunks: Iterable[np.ndarray], total: int) -> int:
+    """Number of distinct keys occurring more than once across fixed-width ``chunks``.
+
+    Keys are routed by their first byte into partition files sized to fit the budget, and
+    each partition is then counted in memory on its own.
+    """
+
+    itemsize = 0
+    # np.unique sorts a copy, so leave room for about four times the partition size.
+    partitions = 1
+    with tempfile.TemporaryDirectory(dir=SPILL_DIR) as directory:
+        handles: list[Any] = []
+        try:
+            for chunk in chunks:
+                if not handles:
+                    itemsize = chunk.dtype.itemsize
+                    partitions = min(256, max(1, math.ceil(4 * total * itemsize / stage_budget())))
+                    handles = [
+                        open(Path(directory) / f"part-{index}", "wb")  # noqa: SIM115
+                        for index in range(partitions)
+                    ]
+                    dtype = chunk.dtype
+                first_bytes = chunk.view(np.uint8).reshape(len(chunk), itemsize)[:, 0]
+                routes = first_bytes.astype(np.int64) * partitions // 256
+                for index in np.unique(routes).tolist():
+                    chunk[routes == index].tofile(handles[index])
+        finally:
+            for handle in handles:
+                handle.close()
+        if itemsize:
+            SPILL_BYTES.inc("duplicate_keys", amount=total * itemsize)
+        repeated = 0
+        for index in range(len(handles)):
+            keys = np.fromfile(Path(directory) / f"part-{index}", dtype=dtype)
+            if len(keys):
+                _, counts = np.unique(keys, return_counts=True)
+                repeated += int((counts > 1).sum())
+    return repeated
+
+
+def order_statistics(values: np.ndarray, ranks: Sequence[int]) -> list[float]:
+    """Exact ``sorted(values)[k]`` for each rank without sorting ``values`` in memory.
+
+    Each pass histograms the current value range in chunks and narrows it to the bin that
+    holds rank ``k``; once that bin's values fit the budget they are sorted directly.
+    """
+
+    n = len(values)
+    low = min(float(values[start:stop].min()) for start, stop in chunk_bounds(n))
+    high = max(float(values[start:stop].max()) for start, stop in chunk_bounds(n))
+    fit = max(1, int(stage_budget() // (4 * values.dtype.itemsize)))
+    return [_select(values, rank, low, high, fit) for rank in ranks]
+
+
+def _select(values: np.ndarray, rank: int, low: float, high: float, fit: int) -> float:
+    below = 0  # values smaller than ``low``; ``low`` and ``high`` are values themselves
+    while low < high:
+        edges = np.linspace(low, high, SELECTION_BINS + 1)
+        counts = np.zeros(SELECTION_BINS, dtype=np.int64)
+        for chunk in _chunks(values):
+            counts += np.histogram(chunk[(chunk >= low) & (chunk <= high)], bins=edges)[0]
+        cumulative = below + np.cumsum(counts)
+        index = int(np.searchsorted(cumulative, rank, side="right"))
+        below = int(cumulative[index - 1]) if index else below
+        # Histogram bins are half-open except the last, which includes ``high``.
+        bin_low, bin_high = edges[index], edges[index + 1]
+        closed = index == SELECTION_BINS - 1
+        in_bin = (
+            chunk[(chunk >= bin_low) & ((chunk <= bin_high) if closed else (chunk < bin_high))]
+            for chunk in _chunks(values)
+        )
+        if counts[index] <= fit:
+            return float(np.sort(np.concatenate(list(in_bin)))[rank - below])
+        # Too many to sort: narrow to the values actually in the bin, so ties end the search.
+        low, high = math.inf, -math.inf
+        for part in in_bin:
+            if len(part):
+                low, high = min(low, float(part.min())), max(high, float(part.max()))
+    return low
+
+
+def _chunks(values: np.ndarray) -> Iterator[np.ndarray]:
+    for start, stop in chunk_bounds(len(values)):
+        yield values[start:stop]
+
+
+def percentiles(values: np.ndarray, percentile_values: Sequence[float]) -> list[float]:
+    """Linearly interpolated percentiles of ``values``, matching a sort-based computation."""
+
+    n = len(values)
+    positions = [(n - 1) * (p / 100) for p in percentile_values]
+    ranks = sorted({math.floor(k) for k in positions} | {math.ceil(k) for k in positions})
+    stats = dict(zip(ranks, order_statistics(values, ranks), strict=True))
+    result = []
+    for k in positions:
+        f, c = math.floor(k), math.ceil(k)
+        result.append(stats[f] if f == c else stats[f] * (c - k) + stats[c] * (k - f))
+    return result
+
+
+def current_rss() -> int:
+    """Resident set size of this process in bytes (peak size where /proc is unavailable)."""
+
+    try:
+        with open("/proc/self/statm") as handle:
+            return int(handle.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError):
+        import resource
+
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if os.uname().sysname == "Darwin" else peak * 1024
+
+
+class RssWatch:
+    """Largest resident set size seen while one request was in flight."""
+
+    def __init__(self, rss: int) -> None:
+        self.peak = rss
+
+    def observe(self, rss: int) -> None:
+        if rss > self.peak:
+            self.peak = rss
+
+
+class RssMonitor:
+    """Samples RSS on a background thread for as long as any watch is open."""
+
+    def __init__(self, interval: float = RSS_SAMPLE_SECONDS) -> None:
+        self.interval = interval
+        self._lock = threading.Lock()
+        self._watches: list[RssWatch] = []
+        self._thread: threading.Thread | None = None
+
+    @contextmanager
+    def track(self) -> Iterator[RssWatch]:
+        watch = RssWatch(current_rss())
+        with self._lock:
+            self._watches.append(watch)
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._sample, name="rss-monitor", daemon=True
+                )
+                self._thread.start()
+        try:
+            yield watch
+        finally:
+            watch.observe(current_rss())
+            with self._lock:
+                self._watches.remove(watch)
+
+    def _sample(self) -> None:
+        while True:
+            with self._lock:
+                if not self._watches:
+                    self._thread = None
+                    return
+                watches = list(self._watches)
+            rss = current_rss()
+            for watch in watches:
+                watch.observe(rss)
+            time.sleep(self.interval)
+
+
+rss_monitor = RssMonitor()
@@ -0,0 +1,254 @@
+"""In-process metrics with Prometheus text exposition.
+
+Counters and histograms keep plain Python numbers behind one lock per metric; an
+observation is a dict lookup, a bisect and a few additions, which is cheap enough to leave
+on for every request. Rows per second is derived at query time as
+``rate(tdie_stage_rows_total) / rate(tdie_stage_duration_seconds_sum)``.
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+from bisect import bisect_left
+from collections.abc import Iterator
+from contextlib import contextmanager
+from typing import TypeVar
+
+from backend.utils.profiling import active_profile
+
+LATENCY_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+# Resident memory buckets in bytes, 64 MiB to 32 GiB.
+MEMORY_BUCKETS = tuple(float(2**power) for power in range(26, 36))
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _format_labels(names: tuple[str, ...], values: tuple[str, ...], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values, strict=True)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class Counter:
+    """Monotonic counter keyed by label values."""
+
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple[str, ...] = ()) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self._values: dict[tuple[str, ...], float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *labels: str, amount: float = 1.0) -> None:
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0.0) + amount
+
+    def value(self, *labels: str) -> float:
+        return self._values.get(labels, 0.0)
+
+    def samples(self) -> Iterator[str]:
+        with self._lock:
+            items = sorted(self._values.items())
+        for labels, value in items:
+            yield f"{self.name}{_format_labels(self.labelnames, labels)} {_format_value(value)}"
+
+
+class Gauge(Counter):
+    """Last-written value keyed by label values."""
+
+    kind = "gauge"
+
+    def set(self, value: float, *labels: str) -> None:
+        with self._lock:
+            self._values[labels] = value
+
+
+class Histogram:
+    """Cumulative-bucket histogram keyed by label values."""
+
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: tuple[str, ...] = (),
+        buckets: tuple[float, ...] = LATENCY_BUCKETS,
+    ) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self.buckets = tuple(sorted(buckets))
+        # Per label set: [per-bucket counts..., overflow count, sum]
+        self._values: dict[tuple[str, ...], list[float]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *labels: str) -> None:
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(labels)
+            if state is None:
+                state = self._values[labels] = [0.0] * (len(self.buckets) + 2)
+            state[index] += 1
+            state[-1] += value
+
+    def count(self, *labels: str) -> int:
+        state = self._values.get(labels)
+        return int(sum(state[:-1])) if state else 0
+
+    def samples(self) -> Iterator[str]:
+        with self._lock:
+            items = sorted((labels, list(state)) for labels, state in self._values.items())
+        for labels, state in items:
+            cumulative = 0.0
+            for bound, bucket_count in zip((*self.buckets, float("inf")), state[:-1], strict=True):
+                cumulative += bucket_count
+                le = f'le="{_format_value(bound)}"'
+                label_text = _format_labels(self.labelnames, labels, le)
+                yield f"{self.name}_bucket{label_text} {_format_value(cumulative)}"
+            label_text = _format_labels(self.labelnames, labels)
+            yield f"{self.name}_sum{label_text} {_format_value(state[-1])}"
+            yield f"{self.name}_count{label_text} {_format_value(cumulative)}"
+
+
+_Metric = TypeVar("_Metric", bound="Counter | Histogram")
+
+
+class MetricsRegistry:
+    """Ordered collection of metrics rendered together."""
+
+    def __init__(self) -> None:
+        self._metrics: list[Counter | Histogram] = []
+
+    def register(self, metric: _Metric) -> _Metric:
+        self._metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        """Return every metric in the Prometheus text exposition format."""
+
+        lines: list[str] = []
+        for metric in self._metrics:
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.samples())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = MetricsRegistry()
+STAGE_DURATION = REGISTRY.register(
+    Histogram("tdie_stage_duration_seconds", "Wall time per pipeline stage.", ("stage",))
+)
+STAGE_ROWS = REGISTRY.register(
+    Counter("tdie_stage_rows_total", "Rows processed per pipeline stage.", ("stage",))
+)
+STAGE_THROUGHPUT = REGISTRY.register(
+    Gauge("tdie_stage_rows_per_second", "Throughput of the latest run of each stage.", ("stage",))
+)
+STAGE_ERRORS = REGISTRY.register(
+    Counter("tdie_stage_errors_total", "Stage runs that raised an exception.", ("stage",))
+)
+HTTP_DURATION = REGISTRY.register(
+    Histogram(
+        "tdie_http_request_duration_seconds",
+        "HTTP request latency by route.",
+        ("method", "route", "status"),
+    )
+)
+HTTP_BYTES_IN = REGISTRY.register(
+    Counter("tdie_http_request_bytes_total", "Request body bytes received.", ("route",))
+)
+HTTP_BYTES_OUT = REGISTRY.register(
+    Counter("tdie_http_response_bytes_total", "Response body bytes sent.", ("route",))
+)
+CACHE_REQUESTS = REGISTRY.register(
+    Counter("tdie_cache_requests_total", "Cache lookups by cache and result.", ("cache", "result"))
+)
+SCHEDULER_INFLIGHT = REGISTRY.register(
+    Gauge("tdie_scheduler_inflight_jobs", "Admitted jobs currently running per lane.", ("lane",))
+)
+SCHEDULER_REJECTED = REGISTRY.register(
+    Counter("tdie_scheduler_rejections_total", "Requests rejected with 429 per lane.", ("lane",))
+)
+SCHEDULER_RESERVED = REGISTRY.register(
+    Gauge("tdie_scheduler_reserved_bytes", "Estimated peak memory of running heavy jobs.")
+)
+REQUEST_PEAK_RSS = REGISTRY.register(
+    Histogram(
+        "tdie_request_peak_rss_bytes",
+        "Peak process resident memory observed while serving a request.",
+        ("route",),
+        buckets=MEMORY_BUCKETS,
+    )
+)
+AUDIT_WRITE_FAILURES = REGISTRY.register(
+    Counter("tdie_audit_write_failures_total", "Failed audit log writes per file.", ("log",))
+)
+AUDIT_PENDING = REGISTRY.register(
+    Gauge("tdie_audit_pending_entries", "Audit entries held for retry per file.", ("log",))
+)
+SPILL_BYTES = REGISTRY.register(
+    Counter(
+        "tdie_spill_bytes_total",
+        "Bytes of intermediates written to disk because they exceeded the stage budget.",
+        ("intermediate",),
+    )
+)
+
+
+class StageTimer:
+    """Handle yielded by ``timed``; set ``rows`` once the row count is known."""
+
+    def __init__(self, rows: int | None) -> None:
+        self.rows = rows
+
+
+@contextmanager
+def timed(stage: str, rows: int | None = None) -> Iterator[StageTimer]:
+    """Record the duration, row count and throughput of the enclosed block as ``stage``.
+
+    When the current request is being profiled, the stage is also annotated on its profile.
+    """
+
+    timer = StageTimer(rows)
+    started = time.perf_counter()
+    try:
+        yield timer
+    except BaseException:
+        STAGE_ERRORS.inc(stage)
+        raise
+    finally:
+        elapsed = time.perf_counter() - started
+        STAGE_DURATION.observe(elapsed, stage)
+        if timer.rows is not None:
+            STAGE_ROWS.inc(stage, amount=timer.rows)
+            if elapsed > 0:
+                STAGE_THROUGHPUT.set(timer.rows / elapsed, stage)
+        session = active_profile()
+        if session is not None:
+            session.annotate(stage, started, elapsed, timer.rows)
+
+
+def record_cache(cache: str, hit: bool) -> None:
+    """Count a cache lookup; hit rate is ``hit / (hit + miss)`` per cache."""
+
+    CACHE_REQUESTS.inc(cache, "hit" if hit else "miss")
+
+
+def render_metrics() -> str:
+    """Render the process-wide registry for the ``/metrics`` endpoint."""
+
+    return REGISTRY.render()
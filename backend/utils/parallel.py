@@ -0,0 +1,130 @@
+"""Process-pool helpers for chunked, order-preserving engine execution."""
+
+from __future__ import annotations
+
+import os
+import pickle
+from collections.abc import Callable, Sequence
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing.shared_memory import SharedMemory
+from typing import Any
+
+from backend.utils.logger import get_logger
+from backend.utils.memory import ROW_WORKING_BYTES, over_budget
+
+logger = get_logger(__name__)
+
+DEFAULT_CHUNK_SIZE = 50_000
+WORKERS_ENV = "TDIE_WORKERS"
+
+
+def resolve_workers(workers: int | None = None) -> int:
+    """Return the worker count to use; ``None`` reads ``TDIE_WORKERS`` and ``0`` means all cores."""
+
+    if workers is None:
+        try:
+            workers = int(os.environ.get(WORKERS_ENV, "1"))
+        except ValueError:
+            workers = 1
+    if workers <= 0:
+        workers = os.cpu_count() or 1
+    return workers
+
+
+class SharedChunks:
+    """Row chunks pickled back-to-back into one shared-memory block.
+
+    Workers attach by name and unpickle only their own span, so the dataset is
+    serialised once in the parent instead of once per task through a pipe.
+    """
+
+    def __init__(self, records: Sequence[Any], chunk_size: int) -> None:
+        payloads = [
+            pickle.dumps(list(records[start : start + chunk_size]), pickle.HIGHEST_PROTOCOL)
+            for start in range(0, len(records), chunk_size)
+        ]
+        self._shm = SharedMemory(create=True, size=max(1, sum(len(p) for p in payloads)))
+        self.spans: list[tuple[int, int, int]] = []
+        offset = 0
+        for index, payload in enumerate(payloads):
+            self._shm.buf[offset : offset + len(payload)] = payload
+            self.spans.append((offset, len(payload), index * chunk_size))
+            offset += len(payload)
+
+    @property
+    def name(self) -> str:
+        return self._shm.name
+
+    def close(self) -> None:
+        self._shm.close()
+        self._shm.unlink()
+
+
+def _run_shared_chunk(
+    func: Callable[..., Any], name: str, span: tuple[int, int, int], args: tuple[Any, ...]
+) -> Any:
+    """Worker entrypoint: load one chunk from shared memory and apply ``func``."""
+
+    offset, length, start_row = span
+    shm = SharedMemory(name=name)
+    try:
+        with shm.buf[offset : offset + length] as view:
+            chunk = pickle.loads(view)
+    finally:
+        shm.close()
+    return func(chunk, start_row, *args)
+
+
+def map_chunks(
+    func: Callable[..., Any],
+    records: Sequence[Any],
+    *args: Any,
+    workers: int | None = None,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    chunk_args: Callable[[int, int], tuple[Any, ...]] | None = None,
+) -> list[Any]:
+    """Apply ``func(chunk, start_row, *args)`` over row chunks and return partials in order.
+
+    ``func`` must be a module-level callable so it can be sent to worker processes. With a
+    single worker, or when the data fits in one chunk, it runs inline on the whole input;
+    a single worker over the memory budget runs it inline one chunk at a time instead.
+    ``chunk_args(start, stop)``, when given, returns further arguments for the chunk of rows
+    ``start:stop``, so each task carries only its share of a whole-dataset structure.
+    """
+
+    def call_args(start: int, stop: int) -> tuple[Any, ...]:
+        return args if chunk_args is None else (*args, *chunk_args(start, stop))
+
+    workers = resolve_workers(workers)
+    if len(records) <= chunk_size:
+        return [func(records, 0, *call_args(0, len(records)))]
+    if workers <= 1:
+        if not over_budget(len(records) * ROW_WORKING_BYTES):
+            return [func(records, 0, *call_args(0, len(records)))]
+        return [
+            func(records[start : start + chunk_size], start, *call_args(start, start + chunk_size))
+            for start in range(0, len(records), chunk_size)
+        ]
+
+    shared = SharedChunks(records, chunk_size)
+    logger.info(
+        "Partitioned %d records into %d chunks across %d workers",
+        len(records),
+        len(shared.spans),
+        workers,
+    )
+    try:
+        with ProcessPoolExecutor(max_workers=min(workers, len(shared.spans))) as pool:
+            futures = [
+                pool.submit(
+                    _run_shared_chunk,
+                    func,
+                    shared.name,
+                    span,
+                    call_args(span[2], span[2] + chunk_size),
+                )
+                for span in shared.spans
+            ]
+            return [future.result() for future in futures]
+    finally:
+        shared.close()
@@ -0,0 +1,237 @@
+"""Opt-in per-request profiling with stage annotations.
+
+A request is profiled when it carries ``X-TDIE-Profile: 1`` or is picked by the
+``TDIE_PROFILE_SAMPLE_RATE`` sampler. The middleware only marks the request; the
+``profiled`` decorator runs the endpoint under ``cProfile`` and ``tracemalloc`` in the worker
+thread that executes it. Both are process-wide (``cProfile`` sits on ``sys.monitoring`` from
+Python 3.12), so one request is profiled at a time and a marked request arriving meanwhile
+is served unprofiled. Stages timed with ``backend.utils.metrics.timed`` are annotated onto
+the active profile. Each profile is stored under ``PROFILE_DIR`` as a JSON summary plus a
+raw ``pstats`` file keyed by the request id.
+"""
+
+from __future__ import annotations
+
+import contextvars
+import cProfile
+import functools
+import inspect
+import io
+import json
+import os
+import pstats
+import random
+import re
+import threading
+import time
+import tracemalloc
+from collections.abc import Callable
+from datetime import UTC, datetime
+from pathlib import Path
+from typing import Any, TypeVar
+
+from backend.utils.logger import get_logger, request_id_var
+
+logger = get_logger(__name__)
+
+PROFILE_DIR = Path(os.environ.get("TDIE_PROFILE_DIR", "logs/profiles"))
+PROFILE_SAMPLE_RATE = float(os.environ.get("TDIE_PROFILE_SAMPLE_RATE", "0"))
+PROFILE_KEEP = int(os.environ.get("TDIE_PROFILE_KEEP", "50"))
+PROFILE_HEADER = "x-tdie-profile"
+TOP_FUNCTIONS = 30
+TOP_ALLOCATIONS = 15
+_SAFE_ID = re.compile(r"[^A-Za-z0-9_.-]")
+
+
+class ProfileRequest:
+    """Marks a request for profiling; ``stored`` is set once its profile has been written."""
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self.stored = False
+
+
+# Set by the middleware when the current request should be profiled.
+profile_requested_var: contextvars.ContextVar[ProfileRequest | None] = contextvars.ContextVar(
+    "profile_requested", default=None
+)
+_active_profile_var: contextvars.ContextVar[ProfileSession | None] = contextvars.ContextVar(
+    "active_profile", default=None
+)
+# Held by the one request currently running under the profiler.
+_profiler_lock = threading.Lock()
+
+_F = TypeVar("_F", bound=Callable[..., Any])
+
+
+def should_profile(header_value: str | None, sample_rate: float | None = None) -> bool:
+    """Decide whether a request is profiled from its header or the sampling rate."""
+
+    if header_value is not None:
+        return header_value.strip().lower() in {"1", "true", "yes", "on"}
+    rate = PROFILE_SAMPLE_RATE if sample_rate is None else sample_rate
+    return rate > 0 and random.random() < rate
+
+
+class ProfileSession:
+    """Collects stage annotations while a profiled endpoint runs."""
+
+    def __init__(self, request_id: str, path: str, track_allocations: bool) -> None:
+        self.request_id = request_id
+        self.path = path
+        self.track_allocations = track_allocations
+        self.started = time.perf_counter()
+        self.stages: list[dict[str, Any]] = []
+
+    def annotate(self, stage: str, started: float, elapsed: float, rows: int | None) -> None:
+        entry: dict[str, Any] = {
+            "stage": stage,
+            "offset_seconds": round(started - self.started, 6),
+            "duration_seconds": round(elapsed, 6),
+            "rows": rows,
+        }
+        if self.track_allocations and tracemalloc.is_tracing():
+            current, peak = tracemalloc.get_traced_memory()
+            entry["traced_bytes"] = current
+            entry["traced_peak_bytes"] = peak
+        self.stages.append(entry)
+
+
+def active_profile() -> ProfileSession | None:
+    """Return the profile session of the current request, if it is being profiled."""
+
+    return _active_profile_var.get()
+
+
+def profiled(func: _F) -> _F:
+    """Run a sync endpoint under the profiler when its request was marked for profiling."""
+
+    @functools.wraps(func)
+    def wrapper(*args: Any, **kwargs: Any) -> Any:
+        request = profile_requested_var.get()
+        if request is None:
+            return func(*args, **kwargs)
+        if not _profiler_lock.acquire(blocking=False):
+            logger.info("Profiler busy; serving %s unprofiled", request.path)
+            return func(*args, **kwargs)
+        try:
+            # Leave tracing started outside the app (e.g. PYTHONTRACEMALLOC) alone.
+            track_allocations = not tracemalloc.is_tracing()
+            session = ProfileSession(request_id_var.get(), request.path, track_allocations)
+            token = _active_profile_var.set(session)
+            profiler = cProfile.Profile()
+            if track_allocations:
+                tracemalloc.start()
+            try:
+                return profiler.runcall(func, *args, **kwargs)
+            finally:
+                snapshot = tracemalloc.take_snapshot() if track_allocations else None
+                peak = tracemalloc.get_traced_memory()[1] if track_allocations else None
+                if track_allocations:
+                    tracemalloc.stop()
+                _active_profile_var.reset(token)
+                try:
+                    store_profile(session, profiler, snapshot, peak)
+                    request.stored = True
+                except OSError as exc:
+                    logger.error(
+                        "Failed to store profile for request %s: %s", session.request_id, exc
+                    )
+        finally:
+            _profiler_lock.release()
+
+    # FastAPI resolves string annotations against the wrapper's module; hand it real types.
+    wrapper.__signature__ = inspect.signature(func, eval_str=True)  # type: ignore[attr-defined]
+    return wrapper  # type: ignore[return-value]
+
+
+def _top_functions(profiler: cProfile.Profile) -> list[dict[str, Any]]:
+    stats = pstats.Stats(profiler, stream=io.StringIO())
+    rows = []
+    entries = stats.stats.items()  # type: ignore[attr-defined]
+    for (filename, line, name), (_, calls, tottime, cumtime, _) in entries:
+        rows.append(
+            {
+                "function": f"{filename}:{line}({name})",
+                "calls": calls,
+                "total_seconds": round(tottime, 6),
+                "cumulative_seconds": round(cumtime, 6),
+            }
+        )
+    rows.sort(key=lambda row: row["cumulative_seconds"], reverse=True)
+    return rows[:TOP_FUNCTIONS]
+
+
+def _top_allocations(snapshot: tracemalloc.Snapshot) -> list[dict[str, Any]]:
+    return [
+        {"location": str(stat.traceback), "bytes": stat.size, "blocks": stat.count}
+        for stat in snapshot.statistics("lineno")[:TOP_ALLOCATIONS]
+    ]
+
+
+def _profile_path(request_id: str, suffix: str) -> Path:
+    return PROFILE_DIR / f"{_SAFE_ID.sub('_', request_id)}{suffix}"
+
+
+def store_profile(
+    session: ProfileSession,
+    profiler: cProfile.Profile,
+    snapshot: tracemalloc.Snapshot | None,
+    peak_bytes: int | None,
+) -> dict[str, Any]:
+    """Write the JSON summary and raw pstats for ``session``, pruning old profiles."""
+
+    summary = {
+        "request_id": session.request_id,
+        "path": session.path,
+        "created_at": datetime.now(UTC).isoformat(),
+        "duration_seconds": round(time.perf_counter() - session.started, 6),
+        "stages": session.stages,
+        "top_functions": _top_functions(profiler),
+        "allocations": (
+            {"peak_bytes": peak_bytes, "top": _top_allocations(snapshot)}
+            if snapshot is not None
+            else None
+        ),
+    }
+    PROFILE_DIR.mkdir(parents=True, exist_ok=True)
+    profiler.dump_stats(str(_profile_path(session.request_id, ".prof")))
+    _profile_path(session.request_id, ".json").write_text(json.dumps(summary, indent=2))
+    _prune_profiles()
+    logger.info("Stored profile for %s request %s", session.path, session.request_id)
+    return summary
+
+
+def _prune_profiles() -> None:
+    summaries = sorted(PROFILE_DIR.glob("*.json"), key=lambda path: path.stat().st_mtime)
+    for stale in summaries[: max(0, len(summaries) - PROFILE_KEEP)]:
+        stale.unlink(missing_ok=True)
+        stale.with_suffix(".prof").unlink(missing_ok=True)
+
+
+def list_profiles() -> list[dict[str, Any]]:
+    """Return summary headers for stored profiles, newest first."""
+
+    if not PROFILE_DIR.exists():
+        return []
+    headers = []
+    for path in sorted(PROFILE_DIR.glob("*.json"), key=lambda p: p.stat().st_mtime, reverse=True):
+        summary = json.loads(path.read_text())
+        headers.append(
+            {key: summary[key] for key in ("request_id", "path", "created_at", "duration_seconds")}
+        )
+    return headers
+
+
+def load_profile(request_id: str) -> dict[str, Any] | None:
+    """Return the stored summary for ``request_id``, or None when there is none."""
+
+    path = _profile_path(request_id, ".json")
+    return json.loads(path.read_text()) if path.exists() else None
+
+
+def raw_profile_path(request_id: str) -> Path | None:
+    """Return the raw ``pstats`` file for ``request_id`` when it exists."""
+
+    path = _profile_path(request_id, ".prof")
+    return path if path.exists() else None
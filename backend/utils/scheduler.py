@@ -0,0 +1,269 @@
+"""Admission control for dataset requests, split into cheap and heavy lanes.
+
+Each request's cost is estimated from its rows, fields and the engines it runs. Cheap jobs
+take one of ``CHEAP_SLOTS`` slots. Heavy jobs also reserve their estimated peak memory, and
+run only while the heavy lane stays within ``MEMORY_BUDGET_MB`` and ``MAX_HEAVY_JOBS``. A
+request that does not fit is rejected at once with 429 and a ``Retry-After`` estimated from
+the heavy jobs still running, rather than queueing on the server's thread pool. When
+``OFFLOAD_WORKERS`` is set, heavy engine passes run in a process pool so they do not hold
+the GIL while ``/health`` and small requests are served.
+
+Large request bodies and referenced datasets are admitted by their size in bytes before they
+are decoded or opened (``admit_body``), so a request that cannot run is rejected before it
+costs any memory. The route's own admission takes over that reservation once the rows and
+engines are known.
+"""
+
+from __future__ import annotations
+
+import math
+import multiprocessing
+import os
+import threading
+import time
+from collections.abc import Callable, Iterable, Iterator
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import TYPE_CHECKING, Any
+
+from fastapi import HTTPException
+
+from backend.utils.logger import get_logger
+from backend.utils.metrics import SCHEDULER_INFLIGHT, SCHEDULER_REJECTED, SCHEDULER_RESERVED
+from backend.utils.profiling import profile_requested_var
+
+if TYPE_CHECKING:
+    from backend.utils.data_loader import SampleSpec
+
+logger = get_logger(__name__)
+
+MEMORY_BUDGET_MB = float(os.environ.get("TDIE_MEMORY_BUDGET_MB", "2048"))
+MAX_HEAVY_JOBS = int(os.environ.get("TDIE_MAX_HEAVY_JOBS", str(os.cpu_count() or 1)))
+CHEAP_SLOTS = int(os.environ.get("TDIE_CHEAP_SLOTS", "32"))
+# Jobs estimated to take at least this many seconds go to the heavy lane.
+HEAVY_SECONDS = float(os.environ.get("TDIE_HEAVY_SECONDS", "0.25"))
+OFFLOAD_WORKERS = int(os.environ.get("TDIE_OFFLOAD_WORKERS", "0"))
+
+# Peak bytes and seconds per cell (row x field) of each engine, measured on synthetic
+# columnar data. Engines run one after another, so a job's memory is the largest peak.
+ENGINE_COSTS: dict[str, tuple[float, float]] = {
+    "schema_validate": (60.0, 0.4e-6),
+    "quality_report": (70.0, 2.5e-6),
+    "bias_checks": (20.0, 0.05e-6),
+    "poisoning_risk": (100.0, 1.0e-6),
+}
+DEFAULT_ENGINE_COST = (100.0, 2.5e-6)
+# Peak bytes and seconds per body byte to read, decode and build the columnar dataset.
+BODY_MEMORY_PER_BYTE = 5.5
+BODY_SECONDS_PER_BYTE = 25e-9
+
+# The body admission held by the current request, taken over by its engine admission.
+_request_job_var: ContextVar[Job | None] = ContextVar("request_job", default=None)
+
+
+def scan_rows(records: Any, spec: SampleSpec | None, escalates: bool = False) -> int:
+    """Rows a request will scan: the sample size for sampled requests that cannot escalate."""
+
+    if spec is None or (escalates and spec.escalate):
+        return len(records)
+    return min(spec.size, len(records))
+
+
+class JobCost:
+    """Estimated peak memory and run time of one request."""
+
+    def __init__(self, rows: int, width: int, engines: Iterable[str]) -> None:
+        self.rows = rows
+        self.cells = rows * max(width, 1)
+        costs = [ENGINE_COSTS.get(engine, DEFAULT_ENGINE_COST) for engine in engines]
+        self.memory_bytes = self.cells * max((memory for memory, _ in costs), default=0.0)
+        self.seconds = self.cells * sum(seconds for _, seconds in costs)
+
+    @classmethod
+    def for_body(cls, body_bytes: int) -> JobCost:
+        """Cost of reading and decoding a request body of ``body_bytes``."""
+
+        cost = cls(0, 0, ())
+        cost.memory_bytes = body_bytes * BODY_MEMORY_PER_BYTE
+        cost.seconds = body_bytes * BODY_SECONDS_PER_BYTE
+        return cost
+
+
+class SchedulerBusy(HTTPException):
+    """429 raised when a lane is full; ``Retry-After`` says when to try again."""
+
+    def __init__(self, detail: str, retry_after: int) -> None:
+        super().__init__(status_code=429, detail=detail, headers={"Retry-After": str(retry_after)})
+        self.retry_after = retry_after
+
+
+class Job:
+    """An admitted request; ``run`` executes its engine pass in the right place."""
+
+    def __init__(self, route: str, cost: JobCost, heavy: bool, pool: ProcessPoolExecutor | None):
+        self.route = route
+        self.cost = cost
+        self.heavy = heavy
+        self.started = time.monotonic()
+        self.released = False
+        self._pool = pool
+
+    def run(self, func: Callable[..., Any], *args: Any) -> Any:
+        """Call ``func(*args)``, in the process pool for heavy jobs when one is configured.
+
+        Profiled requests stay in-process so their profile covers the engines.
+        """
+
+        if self._pool is None or not self.heavy or profile_requested_var.get() is not None:
+            return func(*args)
+        return self._pool.submit(func, *args).result()
+
+
+class Scheduler:
+    """Tracks admitted jobs per lane and decides whether a new one fits."""
+
+    def __init__(
+        self,
+        memory_budget_mb: float = MEMORY_BUDGET_MB,
+        max_heavy: int = MAX_HEAVY_JOBS,
+        cheap_slots: int = CHEAP_SLOTS,
+        heavy_seconds: float = HEAVY_SECONDS,
+        offload_workers: int = OFFLOAD_WORKERS,
+    ) -> None:
+        self.memory_budget = memory_budget_mb * 1024 * 1024
+        self.max_heavy = max_heavy
+        self.cheap_slots = cheap_slots
+        self.heavy_seconds = heavy_seconds
+        self.offload_workers = offload_workers
+        self._lock = threading.Lock()
+        self._heavy: list[Job] = []
+        self._cheap = 0
+        self._pool: ProcessPoolExecutor | None = None
+        # Observed/estimated run time of finished heavy jobs, smoothed; scales Retry-After.
+        self._calibration = 1.0
+
+    @contextmanager
+    def admit(self, route: str, rows: int, width: int, engines: Iterable[str]) -> Iterator[Job]:
+        """Hold a lane slot for the enclosed block or raise ``SchedulerBusy``.
+
+        A body admission held by the same request is replaced by this one.
+        """
+
+        job = self._acquire(route, JobCost(rows, width, engines), _request_job_var.get())
+        try:
+            yield job
+        finally:
+            self._release(job)
+
+    @contextmanager
+    def admit_body(self, route: str, body_bytes: int) -> Iterator[Job | None]:
+        """Hold the heavy lane for ``body_bytes`` of input to decode, or raise ``SchedulerBusy``.
+
+        Inputs too small for the heavy lane are not held; the route's admission covers them.
+        A body admission already held by the request is replaced by this one.
+        """
+
+        cost = JobCost.for_body(body_bytes)
+        if cost.seconds < self.heavy_seconds:
+            yield None
+            return
+        job = self._acquire(route, cost, _request_job_var.get())
+        token = _request_job_var.set(job)
+        try:
+            yield job
+        finally:
+            _request_job_var.reset(token)
+            self._release(job)
+
+    def shutdown(self) -> None:
+        """Stop the offload pool, if one was started."""
+
+        if self._pool is not None:
+            self._pool.shutdown(cancel_futures=True)
+            self._pool = None
+
+    def _acquire(self, route: str, cost: JobCost, held: Job | None = None) -> Job:
+        if held is not None and held.released:
+            held = None
+        if held is not None:
+            # The decoded body stays in memory while the engines run.
+            cost.memory_bytes = max(cost.memory_bytes, held.cost.memory_bytes)
+        heavy = cost.seconds >= self.heavy_seconds or (held is not None and held.heavy)
+        lane = "heavy" if heavy else "cheap"
+        with self._lock:
+            if heavy:
+                others = [job for job in self._heavy if job is not held]
+                reserved = sum(job.cost.memory_bytes for job in others)
+                # An idle lane always takes the job, or one over budget could never run.
+                fits = not others or (
+                    len(others) < self.max_heavy
+                    and reserved + cost.memory_bytes <= self.memory_budget
+                )
+                if not fits:
+                    retry_after = self._retry_after()
+                    SCHEDULER_REJECTED.inc(lane)
+                    logger.warning(
+                        "Rejected %s: heavy lane full (%d jobs, %.0f MB reserved)",
+                        route,
+                        len(others),
+                        reserved / 1024 / 1024,
+                    )
+                    raise SchedulerBusy("Heavy job capacity exhausted", retry_after)
+                if held is not None:
+                    self._release_locked(held, calibrate=False)
+                job = Job(route, cost, heavy, self._offload_pool())
+                self._heavy.append(job)
+                SCHEDULER_RESERVED.set(reserved + cost.memory_bytes)
+                SCHEDULER_INFLIGHT.set(len(self._heavy), lane)
+            else:
+                if self._cheap >= self.cheap_slots:
+                    SCHEDULER_REJECTED.inc(lane)
+                    raise SchedulerBusy("Request capacity exhausted", 1)
+                if held is not None:
+                    self._release_locked(held, calibrate=False)
+                self._cheap += 1
+                job = Job(route, cost, heavy, None)
+                SCHEDULER_INFLIGHT.set(self._cheap, lane)
+        return job
+
+    def _release(self, job: Job) -> None:
+        with self._lock:
+            self._release_locked(job)
+
+    def _release_locked(self, job: Job, calibrate: bool = True) -> None:
+        if job.released:
+            return
+        job.released = True
+        if job.heavy:
+            self._heavy.remove(job)
+            if calibrate and job.cost.seconds > 0:
+                elapsed = time.monotonic() - job.started
+                ratio = min(max(elapsed / job.cost.seconds, 0.1), 10.0)
+                self._calibration = 0.8 * self._calibration + 0.2 * ratio
+            SCHEDULER_RESERVED.set(sum(j.cost.memory_bytes for j in self._heavy))
+            SCHEDULER_INFLIGHT.set(len(self._heavy), "heavy")
+        else:
+            self._cheap -= 1
+            SCHEDULER_INFLIGHT.set(self._cheap, "cheap")
+
+    def _retry_after(self) -> int:
+        """Seconds until the first running heavy job is expected to finish (at least 1)."""
+
+        now = time.monotonic()
+        remaining = [
+            job.cost.seconds * self._calibration - (now - job.started) for job in self._heavy
+        ]
+        return max(1, math.ceil(min(remaining, default=1.0)))
+
+    def _offload_pool(self) -> ProcessPoolExecutor | None:
+        if self.offload_workers <= 0:
+            return None
+        if self._pool is None:
+            # Spawned workers start clean: no inherited log listener or audit writer threads.
+            context = multiprocessing.get_context("spawn")
+            self._pool = ProcessPoolExecutor(self.offload_workers, mp_context=context)
+        return self._pool
+
+
+default_scheduler = Scheduler()
@@ -0,0 +1,227 @@
+"""Registry of dataset contracts keyed by (name, version), with compiled-validator caching.
+
+Contracts are registered once and stored in ``SCHEMA_REGISTRY``. A registered version is
+immutable: registering it again with the same content is a no-op and with different content
+is rejected. Requests may then send ``schema_ref: {"name": ..., "version": ...}`` instead of
+the full schema. Resolved contracts are kept, parsed and compiled into a ``SchemaValidator``,
+in an LRU cache of ``SCHEMA_CACHE_SIZE`` entries, so a hot contract is never re-parsed.
+
+Registering a new version reports its compatibility with the previous one: changes that
+can make a dataset valid under the old contract fail the new one are ``breaking``.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+from datetime import UTC, datetime
+from pathlib import Path
+from typing import Any
+
+from pydantic import BaseModel
+
+from backend.engines.schema_validator import DatasetSchema, SchemaValidator
+from backend.utils.hash_utils import stable_json
+from backend.utils.logger import get_logger
+from backend.utils.metrics import record_cache
+from backend.utils.storage import update_json
+
+logger = get_logger(__name__)
+
+SCHEMA_REGISTRY = Path(os.environ.get("TDIE_SCHEMA_REGISTRY", "data/schema_registry.json"))
+SCHEMA_CACHE_SIZE = int(os.environ.get("TDIE_SCHEMA_CACHE_SIZE", "64"))
+
+
+class SchemaRef(BaseModel):
+    """Reference to a registered contract."""
+
+    name: str
+    version: str
+
+
+class SchemaConflict(ValueError):
+    """A (name, version) is already registered with different content, or breaks compatibility."""
+
+
+class CompiledSchema:
+    """A registered contract parsed once, with its validator."""
+
+    def __init__(self, schema: DatasetSchema) -> None:
+        self.schema = schema
+        self.validator = SchemaValidator(schema)
+
+
+_compiled: OrderedDict[tuple[str, str], CompiledSchema] = OrderedDict()
+_compiled_lock = threading.Lock()
+_registry_cache: tuple[tuple[str, int, int], dict[str, dict[str, Any]]] | None = None
+
+
+def _registry() -> dict[str, dict[str, Any]]:
+    """Return the registry, re-reading the file only when its path, mtime or size changed."""
+
+    global _registry_cache
+    try:
+        stat = SCHEMA_REGISTRY.stat()
+    except FileNotFoundError:
+        return {}
+    key = (str(SCHEMA_REGISTRY), stat.st_mtime_ns, stat.st_size)
+    hit = _registry_cache is not None and _registry_cache[0] == key
+    record_cache("schema_registry_file", hit)
+    if not hit:
+        _registry_cache = (key, json.loads(SCHEMA_REGISTRY.read_text() or "{}"))
+    return _registry_cache[1]
+
+
+def schema_digest(schema: DatasetSchema) -> str:
+    """SHA-256 of the contract's canonical JSON."""
+
+    return hashlib.sha256(stable_json(schema.dict()).encode("utf-8")).hexdigest()
+
+
+def list_schemas() -> dict[str, list[str]]:
+    """Registered versions per contract name, in registration order."""
+
+    return {name: list(versions) for name, versions in _registry().items()}
+
+
+def get_schema_entry(name: str, version: str) -> dict[str, Any]:
+    """Stored entry (schema, digest, registration time) for a contract version."""
+
+    try:
+        return _registry()[name][version]
+    except KeyError:
+        raise KeyError(f"Schema {name} {version} is not registered") from None
+
+
+def register_schema(schema: DatasetSchema, require_compatible: bool = False) -> dict[str, Any]:
+    """Store ``schema`` under (name, version) and report compatibility with the prior version.
+
+    Raises ``SchemaConflict`` if that version already holds a different contract, or if
+    ``require_compatible`` is set and the change is breaking.
+    """
+
+    digest = schema_digest(schema)
+    outcome: dict[str, Any] = {}
+
+    def update(registry: dict[str, dict[str, Any]]) -> dict[str, dict[str, Any]]:
+        versions = registry.get(schema.name, {})
+        existing = versions.get(schema.version)
+        if existing is not None:
+            if existing["digest"] != digest:
+                raise SchemaConflict(
+                    f"Schema {schema.name} {schema.version} is already registered "
+                    "with different content"
+                )
+            outcome.update(existing, created=False)
+            return registry
+        previous = next(reversed(versions), None)
+        compatibility = None
+        if previous is not None:
+            old = DatasetSchema.parse_obj(versions[previous]["schema"])
+            compatibility = {"against": previous, **compare_schemas(old, schema)}
+            if require_compatible and compatibility["breaking"]:
+                raise SchemaConflict(
+                    f"Schema {schema.name} {schema.version} breaks {previous}: "
+                    + "; ".join(compatibility["breaking"])
+                )
+        entry = {
+            "schema": schema.dict(),
+            "digest": digest,
+            "registered_at": datetime.now(UTC).isoformat(),
+            "compatibility": compatibility,
+        }
+        outcome.update(entry, created=True)
+        return {**registry, schema.name: {**versions, schema.version: entry}}
+
+    update_json(SCHEMA_REGISTRY, update, {})
+    if outcome["created"]:
+        logger.info("Registered schema %s %s (%s)", schema.name, schema.version, digest[:12])
+    return outcome
+
+
+def compiled_schema(ref: SchemaRef) -> CompiledSchema:
+    """Return the parsed and compiled contract for ``ref`` from the LRU cache."""
+
+    key = (ref.name, ref.version)
+    with _compiled_lock:
+        compiled = _compiled.get(key)
+        if compiled is not None:
+            _compiled.move_to_end(key)
+    record_cache("schema_registry", compiled is not None)
+    if compiled is None:
+        entry = get_schema_entry(ref.name, ref.version)
+        compiled = CompiledSchema(DatasetSchema.parse_obj(entry["schema"]))
+        with _compiled_lock:
+            _compiled[key] = compiled
+            while len(_compiled) > SCHEMA_CACHE_SIZE:
+                _compiled.popitem(last=False)
+    return compiled
+
+
+def resolve_schema(ref: SchemaRef) -> DatasetSchema:
+    """Registered contract for ``ref``; raises ``KeyError`` if it is not registered."""
+
+    return compiled_schema(ref).schema
+
+
+def validator_for(schema: DatasetSchema) -> SchemaValidator:
+    """Cached validator for a schema resolved from the registry, else a new one."""
+
+    with _compiled_lock:
+        compiled = _compiled.get((schema.name, schema.version))
+    if compiled is not None and compiled.schema is schema:
+        return compiled.validator
+    return SchemaValidator(schema)
+
+
+def compare_schemas(old: DatasetSchema, new: DatasetSchema) -> dict[str, Any]:
+    """List the differences between two contract versions.
+
+    ``breaking`` changes can make data valid under ``old`` fail ``new``; the rest are
+    reported under ``changes``.
+    """
+
+    breaking: list[str] = []
+    changes: list[str] = []
+    old_fields = {field.name: field for field in old.fields}
+    new_fields = {field.name: field for field in new.fields}
+    for name in old_fields.keys() - new_fields.keys():
+        changes.append(f"{name}: removed")
+    for name, field in new_fields.items():
+        before = old_fields.get(name)
+        if before is None:
+            (breaking if field.required else changes).append(
+                f"{name}: added as {'required' if field.required else 'optional'}"
+            )
+            continue
+        if field.dtype != before.dtype:
+            widened = (before.dtype, field.dtype) == ("int", "float")
+            (changes if widened else breaking).append(
+                f"{name}: dtype {before.dtype} -> {field.dtype}"
+            )
+        if field.required and not before.required:
+            breaking.append(f"{name}: now required")
+        elif before.required and not field.required:
+            changes.append(f"{name}: now optional")
+        if field.allowed_values is not None:
+            dropped = [
+                value for value in before.allowed_values or [] if value not in field.allowed_values
+            ]
+            if before.allowed_values is None or dropped:
+                breaking.append(f"{name}: allowed values narrowed")
+        elif before.allowed_values is not None:
+            changes.append(f"{name}: allowed values removed")
+        if field.min_value is not None and (
+            before.min_value is None or field.min_value > before.min_value
+        ):
+            breaking.append(f"{name}: min raised to {field.min_value}")
+        if field.max_value is not None and (
+            before.max_value is None or field.max_value < before.max_value
+        ):
+            breaking.append(f"{name}: max lowered to {field.max_value}")
+    if new.expected_records != old.expected_records:
+        changes.append(f"expected_records: {old.expected_records} -> {new.expected_records}")
+    return {"compatible": not breaking, "breaking": sorted(breaking), "changes": sorted(changes)}
@@ -0,0 +1,161 @@
+"""Multi-process-safe storage for shared state files.
+
+Several API workers (``uvicorn --workers N``) or batch processes may update the checksum
+history, provenance log, audit trail, and dataset registry at once. Every update here
+holds an exclusive ``fcntl`` lock on a sidecar ``.lock`` file. Whole-file rewrites go to a
+temporary file in the same directory that is fsynced and then ``os.replace``-d over the
+original, so readers see the old or the new file and never a torn one, even across crashes.
+
+``TDIE_STATE_BACKEND=sqlite`` moves append-only collections into one WAL-mode SQLite
+database (``TDIE_STATE_DB``), which makes appends O(1) instead of a full rewrite.
+"""
+
+from __future__ import annotations
+
+import fcntl
+import json
+import os
+import sqlite3
+import tempfile
+import threading
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any
+
+STATE_BACKEND = os.environ.get("TDIE_STATE_BACKEND", "json")
+STATE_DB = Path(os.environ.get("TDIE_STATE_DB", "provenance/state.sqlite3"))
+
+
+@contextmanager
+def file_lock(path: Path) -> Iterator[None]:
+    """Hold an exclusive advisory lock for ``path`` (via ``<path>.lock``) across processes."""
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    lock_path = path.with_name(path.name + ".lock")
+    with lock_path.open("a") as handle:
+        fcntl.flock(handle.fileno(), fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(handle.fileno(), fcntl.LOCK_UN)
+
+
+def atomic_write_text(path: Path, text: str) -> None:
+    """Replace ``path`` with ``text`` via an fsynced temporary file and ``os.replace``."""
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, temp_name = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            f.write(text)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_name, path)
+    except BaseException:
+        Path(temp_name).unlink(missing_ok=True)
+        raise
+    dir_fd = os.open(path.parent, os.O_RDONLY)
+    try:
+        os.fsync(dir_fd)
+    finally:
+        os.close(dir_fd)
+
+
+def update_json(path: Path, update: Callable[[Any], Any], default: Any) -> Any:
+    """Apply ``update`` to the JSON document at ``path`` under the lock and save the result."""
+
+    with file_lock(path):
+        current = json.loads(path.read_text() or "null") if path.exists() else None
+        updated = update(default if current is None else current)
+        atomic_write_text(path, json.dumps(updated, indent=2))
+        return updated
+
+
+def append_lines(path: Path, text: str) -> None:
+    """Append pre-formatted lines with one locked, fsynced write."""
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with file_lock(path), path.open("a", encoding="utf-8") as f:
+        f.write(text)
+        f.flush()
+        os.fsync(f.fileno())
+
+
+class JsonListStore:
+    """Append-only collection kept as a JSON array file (the historical on-disk format)."""
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+
+    def append(self, entry: dict[str, Any]) -> None:
+        update_json(self.path, lambda entries: [*entries, entry], [])
+
+    def read(self) -> list[dict[str, Any]]:
+        if not self.path.exists():
+            return []
+        raw = self.path.read_text()
+        return json.loads(raw) if raw.strip() else []
+
+    def last(self) -> dict[str, Any] | None:
+        entries = self.read()
+        return entries[-1] if entries else None
+
+
+class SqliteListStore:
+    """Append-only collection stored as rows of one table in a WAL-mode SQLite database."""
+
+    _local = threading.local()
+
+    def __init__(self, db_path: Path, collection: str) -> None:
+        self.db_path = db_path
+        self.collection = collection
+
+    def _connection(self) -> sqlite3.Connection:
+        connections = self._local.__dict__.setdefault("connections", {})
+        key = (os.getpid(), str(self.db_path))  # never reuse a connection across fork
+        if key not in connections:
+            self.db_path.parent.mkdir(parents=True, exist_ok=True)
+            connection = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=FULL")
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS entries ("
+                "id INTEGER PRIMARY KEY AUTOINCREMENT, collection TEXT NOT NULL, body TEXT NOT NULL)"
+            )
+            connection.execute(
+                "CREATE INDEX IF NOT EXISTS entries_collection ON entries (collection, id)"
+            )
+            connections[key] = connection
+        return connections[key]
+
+    def append(self, entry: dict[str, Any]) -> None:
+        self._connection().execute(
+            "INSERT INTO entries (collection, body) VALUES (?, ?)",
+            (self.collection, json.dumps(entry, default=str)),
+        )
+
+    def read(self) -> list[dict[str, Any]]:
+        rows = self._connection().execute(
+            "SELECT body FROM entries WHERE collection = ? ORDER BY id", (self.collection,)
+        )
+        return [json.loads(body) for (body,) in rows]
+
+    def last(self) -> dict[str, Any] | None:
+        row = (
+            self._connection()
+            .execute(
+                "SELECT body FROM entries WHERE collection = ? ORDER BY id DESC LIMIT 1",
+                (self.collection,),
+            )
+            .fetchone()
+        )
+        return json.loads(row[0]) if row else None
+
+
+def list_store(path: Path) -> JsonListStore | SqliteListStore:
+    """Return the configured store for the append-only collection historically at ``path``."""
+
+    if STATE_BACKEND == "sqlite":
+        return SqliteListStore(STATE_DB, path.stem)
+    return JsonListStore(path)
@@ -0,0 +1,358 @@
+"""Vectorized synthetic dataset generation with controlled defect injection.
+
+Usage::
+
+    python -m backend.utils.synthetic --schema schema.json --rows 1e8 --format ndjson \
+        --output data/soak.ndjson --null-rate 0.01 --label-flip-rate 0.001
+
+Rows are produced in fixed-size chunks, each drawn from its own seeded generator, so output
+is reproducible, independent of how it is consumed, and memory stays bounded by the chunk
+size whatever the row count.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+from collections.abc import Iterator
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+from pydantic import BaseModel, Field
+
+from backend.engines.schema_validator import DatasetSchema, FieldSchema
+from backend.utils.logger import get_logger
+
+try:  # optional accelerator; the stdlib encoder is used when it is missing
+    import orjson
+except ImportError:  # pragma: no cover - exercised only without orjson installed
+    orjson = None
+
+logger = get_logger(__name__)
+
+DEFAULT_CHUNK_ROWS = 100_000
+OUTPUT_FORMATS = ("ndjson", "json", "npy")
+TRIGGER_PREFIX = "trigger_"
+START_TIME = np.datetime64("2024-01-01T00:00:00", "s")
+# Spread multiples used for injected outliers; far outside any sampled value.
+OUTLIER_SCALE = 25.0
+
+
+class DefectProfile(BaseModel):
+    """Fractions of rows receiving each defect; all default to a clean dataset.
+
+    ``imbalance`` moves that share of the group distribution onto the first group, and
+    ``drift`` shifts float fields by up to that many spreads, growing linearly with row
+    position. Nulls are injected into float fields only, so every output format can
+    represent them (NaN in columnar output, ``null`` in JSON).
+    """
+
+    null_rate: float = Field(0.0, ge=0, le=1)
+    outlier_rate: float = Field(0.0, ge=0, le=1)
+    duplicate_rate: float = Field(0.0, ge=0, le=1)
+    label_flip_rate: float = Field(0.0, ge=0, le=1)
+    trigger_rate: float = Field(0.0, ge=0, le=1)
+    imbalance: float = Field(0.0, ge=0, lt=1)
+    drift: float = 0.0
+
+
+class SyntheticGenerator:
+    """Sample schema-conformant columns chunk by chunk and inject requested defects."""
+
+    def __init__(
+        self,
+        schema: DatasetSchema,
+        defects: DefectProfile | None = None,
+        seed: int = 0,
+        cardinality: int = 4,
+        id_field: str = "id",
+        label_field: str = "label",
+        group_field: str = "group",
+        interval_seconds: int = 60,
+    ) -> None:
+        self.schema = schema
+        self.defects = defects or DefectProfile()
+        self.seed = seed
+        self.cardinality = cardinality
+        self.id_field = id_field
+        self.label_field = label_field
+        self.group_field = group_field
+        self.interval_seconds = interval_seconds
+        self.trigger_field = self._trigger_field()
+        self.injected: dict[str, int] = dict.fromkeys(
+            ("nulls", "outliers", "duplicates", "label_flips", "triggers"), 0
+        )
+
+    def _trigger_field(self) -> str | None:
+        names = [field.name for field in self.schema.fields if field.dtype == "str"]
+        preferred = [name for name in names if name not in (self.label_field, self.group_field)]
+        field = (preferred or names or [None])[0]
+        if field is None and self.defects.trigger_rate:
+            raise ValueError("Trigger tokens need at least one str field in the schema")
+        return field
+
+    def vocabulary(self, field: FieldSchema) -> np.ndarray | None:
+        """Return the finite value set sampled for ``field``, or None for continuous fields."""
+
+        if field.allowed_values:
+            return np.asarray(field.allowed_values)
+        if field.dtype == "str":
+            return np.asarray([f"{field.name}_{i}" for i in range(self.cardinality)])
+        unbounded = field.min_value is None and field.max_value is None
+        if field.dtype == "int" and field.name == self.label_field and unbounded:
+            return np.arange(2)
+        return None
+
+    def string_width(self, field: FieldSchema) -> int:
+        """Widest string ``field`` can take, including injected prefixes."""
+
+        values = self.vocabulary(field)
+        width = max((len(str(value)) for value in values), default=1) if values is not None else 1
+        return width + len(TRIGGER_PREFIX)
+
+    def chunks(
+        self, rows: int, chunk_rows: int = DEFAULT_CHUNK_ROWS
+    ) -> Iterator[dict[str, np.ndarray]]:
+        """Yield column dicts covering ``rows`` rows in order, ``chunk_rows`` at a time."""
+
+        for index, start in enumerate(range(0, rows, chunk_rows)):
+            yield self.chunk(index, start, min(chunk_rows, rows - start), rows)
+
+    def chunk(self, index: int, start: int, size: int, total: int) -> dict[str, np.ndarray]:
+        """Generate rows ``start`` to ``start + size`` using the generator for chunk ``index``."""
+
+        rng = np.random.default_rng([self.seed, index])
+        position = np.arange(start, start + size)
+        columns = {field.name: self._sample(field, rng, position) for field in self.schema.fields}
+        self._inject(columns, rng, position, total)
+        return columns
+
+    def _sample(
+        self, field: FieldSchema, rng: np.random.Generator, position: np.ndarray
+    ) -> np.ndarray:
+        size = len(position)
+        if field.name == self.id_field and field.dtype == "int":
+            return position.astype(np.int64)
+        if field.dtype == "datetime":
+            jitter = rng.integers(0, self.interval_seconds, size=size)
+            seconds = position * self.interval_seconds + jitter
+            return START_TIME + seconds.astype("timedelta64[s]")
+        if field.dtype == "bool":
+            return rng.random(size) < 0.5
+        values = self.vocabulary(field)
+        if values is not None:
+            probabilities = None
+            if field.name == self.group_field and self.defects.imbalance:
+                share = (1 - self.defects.imbalance) / len(values)
+                probabilities = np.full(len(values), share)
+                probabilities[0] += self.defects.imbalance
+            return rng.choice(values, size=size, p=probabilities)
+        low = field.min_value if field.min_value is not None else -100.0
+        high = field.max_value if field.max_value is not None else 100.0
+        if field.dtype == "int":
+            return rng.integers(int(np.ceil(low)), int(np.floor(high)) + 1, size=size)
+        center, spread = (low + high) / 2, (high - low) / 8
+        return np.clip(rng.normal(center, spread, size=size), low, high).round(4)
+
+    def _float_fields(self) -> list[FieldSchema]:
+        return [field for field in self.schema.fields if field.dtype == "float"]
+
+    def _mask(self, rng: np.random.Generator, size: int, rate: float) -> np.ndarray:
+        return rng.random(size) < rate if rate else np.zeros(size, bool)
+
+    def _inject(
+        self,
+        columns: dict[str, np.ndarray],
+        rng: np.random.Generator,
+        position: np.ndarray,
+        total: int,
+    ) -> None:
+        defects, size = self.defects, len(position)
+        for field in self._float_fields():
+            values = columns[field.name].astype(float)
+            low = field.min_value if field.min_value is not None else -100.0
+            high = field.max_value if field.max_value is not None else 100.0
+            spread = (high - low) / 8
+            if defects.drift:
+                shift = defects.drift * spread * position / max(total - 1, 1)
+                values = (values + shift).round(4)
+            outliers = self._mask(rng, size, defects.outlier_rate)
+            signs = rng.choice([-1.0, 1.0], size=int(outliers.sum()))
+            values[outliers] = (low + high) / 2 + signs * OUTLIER_SCALE * spread
+            nulls = self._mask(rng, size, defects.null_rate)
+            values[nulls] = np.nan
+            columns[field.name] = values
+            self.injected["outliers"] += int(outliers.sum())
+            self.injected["nulls"] += int(nulls.sum())
+
+        if defects.label_flip_rate and self.label_field in columns:
+            flips = self._mask(rng, size, defects.label_flip_rate)
+            labels = columns[self.label_field]
+            labels[flips] = self._flipped(labels[flips], rng)
+            self.injected["label_flips"] += int(flips.sum())
+
+        if defects.trigger_rate and self.trigger_field:
+            triggers = self._mask(rng, size, defects.trigger_rate)
+            tokens = columns[self.trigger_field]
+            width = self.string_width(self._field(self.trigger_field))
+            tokens = tokens.astype(f"U{width}") if tokens.dtype.kind == "U" else tokens
+            tokens[triggers] = np.char.add(TRIGGER_PREFIX, tokens[triggers].astype(str))
+            columns[self.trigger_field] = tokens
+            self.injected["triggers"] += int(triggers.sum())
+
+        if defects.duplicate_rate and size > 1:
+            duplicates = self._mask(rng, size, defects.duplicate_rate)
+            duplicates[0] = False
+            targets = np.flatnonzero(duplicates)
+            # Copy from earlier rows that are not themselves overwritten, so every injected
+            # duplicate is an exact copy of a row in the output.
+            originals = np.flatnonzero(~duplicates)
+            earlier = np.searchsorted(originals, targets)
+            sources = originals[(rng.random(len(targets)) * earlier).astype(np.int64)]
+            for values in columns.values():
+                values[targets] = values[sources]
+            self.injected["duplicates"] += len(targets)
+
+    def _flipped(self, labels: np.ndarray, rng: np.random.Generator) -> np.ndarray:
+        """Move each label to a different value of the label's vocabulary, keeping its dtype.
+
+        Two-valued labels swap (``1 - label`` for 0/1); labels without a finite vocabulary take
+        the value of another flipped row.
+        """
+
+        if labels.dtype == bool:
+            return ~labels
+        vocabulary = self.vocabulary(self._field(self.label_field))
+        if vocabulary is None or len(vocabulary) < 2:
+            return rng.permutation(labels)
+        order = np.argsort(vocabulary)
+        current = order[np.searchsorted(vocabulary, labels, sorter=order)]
+        offsets = rng.integers(1, len(vocabulary), size=len(labels))
+        return vocabulary[(current + offsets) % len(vocabulary)].astype(labels.dtype)
+
+    def _field(self, name: str) -> FieldSchema:
+        return next(field for field in self.schema.fields if field.name == name)
+
+
+def chunk_records(columns: dict[str, np.ndarray]) -> list[dict[str, Any]]:
+    """Convert a generated chunk to JSON-ready records (NaN becomes None)."""
+
+    lists: dict[str, list[Any]] = {}
+    for name, values in columns.items():
+        if values.dtype.kind == "M":
+            lists[name] = np.datetime_as_string(values, unit="s").tolist()
+        elif values.dtype.kind == "f" and np.isnan(values).any():
+            lists[name] = np.where(np.isnan(values), None, values.astype(object)).tolist()
+        else:
+            lists[name] = values.tolist()
+    names = list(lists)
+    return [dict(zip(names, row, strict=True)) for row in zip(*lists.values(), strict=True)]
+
+
+def generate_records(
+    schema: DatasetSchema, rows: int, defects: DefectProfile | None = None, **options: Any
+) -> list[dict[str, Any]]:
+    """Return ``rows`` generated records in memory; use ``write_dataset`` for large outputs."""
+
+    generator = SyntheticGenerator(schema, defects, **options)
+    records: list[dict[str, Any]] = []
+    for columns in generator.chunks(rows):
+        records.extend(chunk_records(columns))
+    return records
+
+
+def _dumps(obj: Any) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(obj)
+    return json.dumps(obj, separators=(",", ":")).encode()
+
+
+def write_dataset(
+    generator: SyntheticGenerator,
+    rows: int,
+    output: Path,
+    fmt: str = "ndjson",
+    chunk_rows: int = DEFAULT_CHUNK_ROWS,
+) -> dict[str, Any]:
+    """Stream ``rows`` generated rows to ``output`` and return a summary of what was written.
+
+    ``ndjson`` writes one record per line; ``json`` writes a ``/tdie_score`` payload with the
+    schema envelope; ``npy`` writes a directory of ``<column>.npy`` arrays filled through
+    memory maps, which ``DatasetReference`` can open without loading them.
+    """
+
+    if fmt not in OUTPUT_FORMATS:
+        raise ValueError(f"Unsupported output format {fmt}")
+    if fmt == "npy":
+        _write_npy(generator, rows, output, chunk_rows)
+    else:
+        output.parent.mkdir(parents=True, exist_ok=True)
+        with output.open("wb") as f:
+            if fmt == "json":
+                envelope = {"schema": json.loads(generator.schema.json()), "source": "synthetic"}
+                f.write(_dumps(envelope)[:-1] + b',"records":[')
+            first = True
+            for columns in generator.chunks(rows, chunk_rows):
+                records = chunk_records(columns)
+                if fmt == "ndjson":
+                    f.write(b"".join(_dumps(record) + b"\n" for record in records))
+                elif records:
+                    f.write((b"" if first else b",") + b",".join(map(_dumps, records)))
+                    first = False
+            if fmt == "json":
+                f.write(b"]}")
+    summary = {"rows": rows, "format": fmt, "output": str(output), "injected": generator.injected}
+    logger.info("Generated %d synthetic rows to %s (%s)", rows, output, fmt)
+    return summary
+
+
+def _write_npy(generator: SyntheticGenerator, rows: int, output: Path, chunk_rows: int) -> None:
+    output.mkdir(parents=True, exist_ok=True)
+    arrays: dict[str, np.ndarray] = {}
+    start = 0
+    for columns in generator.chunks(rows, chunk_rows):
+        for name, values in columns.items():
+            if values.dtype == object:
+                raise ValueError(f"Column {name} mixes value types; write it as ndjson or json")
+            if name not in arrays:
+                dtype = values.dtype
+                if dtype.kind == "U":
+                    dtype = np.dtype(f"U{generator.string_width(generator._field(name))}")
+                arrays[name] = np.lib.format.open_memmap(
+                    output / f"{name}.npy", mode="w+", dtype=dtype, shape=(rows,)
+                )
+            arrays[name][start : start + len(values)] = values
+        start += len(next(iter(columns.values())))
+    for array in arrays.values():
+        array.flush()
+
+
+def _rows(text: str) -> int:
+    return int(float(text))
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Generate a synthetic dataset from a schema.")
+    parser.add_argument("--schema", type=Path, required=True, help="DatasetSchema JSON file")
+    parser.add_argument("--rows", type=_rows, required=True, help="row count, e.g. 1e6")
+    parser.add_argument("--output", type=Path, required=True)
+    parser.add_argument("--format", choices=OUTPUT_FORMATS, default="ndjson")
+    parser.add_argument("--chunk-rows", type=_rows, default=DEFAULT_CHUNK_ROWS)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--cardinality", type=int, default=4, help="values per str field")
+    for name in DefectProfile.__fields__:
+        parser.add_argument(f"--{name.replace('_', '-')}", type=float, default=0.0)
+    args = parser.parse_args(argv)
+
+    schema = DatasetSchema.parse_file(args.schema)
+    defects = DefectProfile(**{name: getattr(args, name) for name in DefectProfile.__fields__})
+    generator = SyntheticGenerator(schema, defects, seed=args.seed, cardinality=args.cardinality)
+    summary = write_dataset(generator, args.rows, args.output, args.format, args.chunk_rows)
+    print(json.dumps(summary))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
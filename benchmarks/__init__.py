@@ -0,0 +1 @@
+"""Benchmark harness for TDIE engines."""
@@ -0,0 +1,266 @@
+"""Benchmark TDIE engines over generated datasets and compare against a stored baseline.
+
+Usage::
+
+    python -m benchmarks.run --rows 1000,100000 --widths 4,16 --cardinalities 2,50
+    python -m benchmarks.run --baseline benchmarks/results/baseline.json --threshold 0.25
+
+Each (case, rows, width, cardinality) combination runs in a fresh child process inside a
+scratch directory, so peak RSS is per case and provenance/checksum writes never touch the
+repository. Everything runs offline.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import logging
+import multiprocessing
+import os
+import platform
+import resource
+import sys
+import tempfile
+import time
+import tracemalloc
+from collections.abc import Callable
+from datetime import UTC, datetime
+from pathlib import Path
+from typing import Any
+
+from backend.engines.schema_validator import DatasetSchema, FieldSchema
+from backend.utils.synthetic import generate_records
+
+DEFAULT_OUTPUT = Path("benchmarks/results/latest.json")
+DEFAULT_THRESHOLD = 0.2
+CASES = (
+    "schema_validate",
+    "quality_report",
+    "poisoning_risk",
+    "bias_checks",
+    "hash_dataset",
+    "tdie_score_http",
+)
+
+
+def benchmark_schema(width: int) -> DatasetSchema:
+    """Return the benchmark contract with ``width`` bounded float features."""
+
+    fields = [FieldSchema(name="id", dtype="int")]
+    fields += [
+        FieldSchema(name=f"value_{i}", dtype="float", min_value=-50, max_value=50)
+        for i in range(width)
+    ]
+    fields += [
+        FieldSchema(name="group", dtype="str"),
+        FieldSchema(name="label", dtype="int"),
+        FieldSchema(name="timestamp", dtype="datetime"),
+    ]
+    return DatasetSchema(name="benchmark", version="1.0", fields=fields)
+
+
+def _case_callable(case: str, rows: int, width: int, cardinality: int) -> Callable[[], Any]:
+    """Prepare inputs for ``case`` and return the zero-argument callable to time."""
+
+    from backend.engines.bias_engine import run_bias_checks
+    from backend.engines.poison_detector import compute_poisoning_risk
+    from backend.engines.quality_checker import generate_quality_report
+    from backend.engines.schema_validator import SchemaValidator
+    from backend.utils.hash_utils import hash_dataset
+
+    schema = benchmark_schema(width)
+    records = generate_records(schema, rows, seed=7, cardinality=cardinality)
+    if case == "schema_validate":
+        validator = SchemaValidator(schema)
+        return lambda: validator.validate(records)
+    if case == "quality_report":
+        return lambda: generate_quality_report(records, [])
+    if case == "poisoning_risk":
+        return lambda: compute_poisoning_risk(records)
+    if case == "bias_checks":
+        return lambda: run_bias_checks(records)
+    if case == "hash_dataset":
+        return lambda: hash_dataset(records)
+    if case == "tdie_score_http":
+        return _http_callable(schema, records)
+    raise ValueError(f"Unknown benchmark case {case}")
+
+
+def _http_callable(schema: Any, records: list[dict[str, Any]]) -> Callable[[], Any]:
+    """Time ``/tdie_score`` end to end: serialisation, ASGI dispatch, parsing, and engines."""
+
+    import httpx
+
+    from backend.main import app
+
+    payload = {"schema": json.loads(schema.json()), "records": records, "user": "bench"}
+
+    async def post() -> None:
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            response = await client.post("/tdie_score", json=payload, timeout=None)
+            response.raise_for_status()
+
+    return lambda: asyncio.run(post())
+
+
+def _measure(
+    case: str, rows: int, width: int, cardinality: int, repeat: int, allocations: bool
+) -> dict[str, Any]:
+    """Child-process body: build inputs, time ``repeat`` runs, then trace allocations once."""
+
+    logging.disable(logging.INFO)
+    os.chdir(tempfile.mkdtemp(prefix="tdie-bench-"))
+    func = _case_callable(case, rows, width, cardinality)
+    rss_before = _max_rss_bytes()
+
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - started)
+    result: dict[str, Any] = {
+        "case": case,
+        "rows": rows,
+        "width": width,
+        "cardinality": cardinality,
+        "wall_seconds": min(timings),
+        "mean_seconds": sum(timings) / len(timings),
+        "rows_per_second": rows / min(timings) if min(timings) else None,
+        "rss_before_bytes": rss_before,
+        "peak_rss_bytes": _max_rss_bytes(),
+    }
+    if allocations:
+        tracemalloc.start()
+        func()
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        result["alloc_peak_bytes"] = peak
+    return result
+
+
+def _max_rss_bytes() -> int:
+    usage = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return usage if sys.platform == "darwin" else usage * 1024
+
+
+def _child(conn: Any, *args: Any) -> None:
+    try:
+        conn.send(("ok", _measure(*args)))
+    except Exception as exc:  # report any failure back to the parent
+        conn.send(("error", f"{type(exc).__name__}: {exc}"))
+    finally:
+        conn.close()
+
+
+def run_case(
+    case: str, rows: int, width: int, cardinality: int, repeat: int = 3, allocations: bool = True
+) -> dict[str, Any]:
+    """Run one benchmark combination in an isolated child process."""
+
+    ctx = multiprocessing.get_context("fork" if sys.platform.startswith("linux") else "spawn")
+    parent, child = ctx.Pipe(duplex=False)
+    process = ctx.Process(
+        target=_child, args=(child, case, rows, width, cardinality, repeat, allocations)
+    )
+    process.start()
+    child.close()
+    status, payload = parent.recv()
+    process.join()
+    if status != "ok":
+        raise RuntimeError(f"{case} rows={rows} failed: {payload}")
+    return payload
+
+
+def _key(result: dict[str, Any]) -> tuple[Any, ...]:
+    return (result["case"], result["rows"], result["width"], result["cardinality"])
+
+
+def compare(
+    results: list[dict[str, Any]], baseline: list[dict[str, Any]], threshold: float
+) -> list[str]:
+    """Return a message for every result slower (or larger) than baseline by ``threshold``."""
+
+    reference = {_key(item): item for item in baseline}
+    regressions: list[str] = []
+    for result in results:
+        base = reference.get(_key(result))
+        if base is None:
+            continue
+        for metric in ("wall_seconds", "peak_rss_bytes", "alloc_peak_bytes"):
+            current, previous = result.get(metric), base.get(metric)
+            if not current or not previous:
+                continue
+            ratio = current / previous
+            if ratio > 1 + threshold:
+                regressions.append(
+                    f"{result['case']} rows={result['rows']} width={result['width']} "
+                    f"cardinality={result['cardinality']}: {metric} {ratio:.2f}x baseline"
+                )
+    return regressions
+
+
+def _int_list(text: str) -> list[int]:
+    return [int(float(item)) for item in text.split(",") if item]
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--cases", default=",".join(CASES), help="comma-separated case names")
+    parser.add_argument("--rows", default="1000,10000", help="row counts, e.g. 1e3,1e5,1e7")
+    parser.add_argument("--widths", default="4", help="numeric feature counts")
+    parser.add_argument("--cardinalities", default="4", help="distinct sensitive groups")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--no-allocations", action="store_true", help="skip tracemalloc run")
+    parser.add_argument("--output", type=Path, default=DEFAULT_OUTPUT)
+    parser.add_argument("--baseline", type=Path, help="results file to compare against")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD)
+    parser.add_argument("--save-baseline", type=Path, help="also write results here")
+    args = parser.parse_args(argv)
+
+    cases = [case for case in args.cases.split(",") if case]
+    unknown = set(cases) - set(CASES)
+    if unknown:
+        parser.error(f"unknown cases: {', '.join(sorted(unknown))}")
+
+    results = []
+    for case in cases:
+        for rows in _int_list(args.rows):
+            for width in _int_list(args.widths):
+                for cardinality in _int_list(args.cardinalities):
+                    result = run_case(
+                        case, rows, width, cardinality, args.repeat, not args.no_allocations
+                    )
+                    results.append(result)
+                    print(
+                        f"{case:<16} rows={rows:<9} width={width:<3} card={cardinality:<4} "
+                        f"{result['wall_seconds']:.4f}s "
+                        f"rss={result['peak_rss_bytes'] / 2**20:.1f}MiB",
+                        flush=True,
+                    )
+
+    document = {
+        "meta": {
+            "created_at": datetime.now(UTC).isoformat(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+        },
+        "results": results,
+    }
+    for path in filter(None, (args.output, args.save_baseline)):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps(document, indent=2))
+
+    if args.baseline:
+        baseline = json.loads(args.baseline.read_text())["results"]
+        regressions = compare(results, baseline, args.threshold)
+        for message in regressions:
+            print(f"REGRESSION {message}", file=sys.stderr)
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
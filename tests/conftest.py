@@ -0,0 +1,23 @@
+from __future__ import annotations
+
+from collections.abc import Iterator
+
+import pytest
+
+
+@pytest.fixture(scope="session", autouse=True)
+def runtime_state(tmp_path_factory: pytest.TempPathFactory) -> Iterator[None]:
+    """Keep audit, provenance, evidence and metrics history files out of the repository."""
+
+    # Imported here, after test modules have patched typing for pydantic during collection.
+    from backend.engines import fingerprint_engine, provenance, training_gate
+    from backend.utils import evidence, history
+
+    root = tmp_path_factory.mktemp("runtime")
+    with pytest.MonkeyPatch.context() as patch:
+        patch.setattr(training_gate, "AUDIT_LOG", root / "training_audit.log")
+        patch.setattr(provenance, "PROVENANCE_LOG", root / "provenance_log.json")
+        patch.setattr(fingerprint_engine, "CHECKSUM_HISTORY", root / "checksum_history.json")
+        patch.setattr(evidence, "EVIDENCE_DIR", root / "evidence")
+        patch.setattr(history, "HISTORY_DIR", root / "history")
+        yield
@@ -5,9 +5,101 @@ import sys
 
 sys.path.append(str(pathlib.Path(__file__).resolve().parents[1]))
 
+import gzip
+import hashlib
+import json
+import math
+import multiprocessing
+import os
+import subprocess
+import time
+from datetime import UTC, datetime
+
+import numpy as np
+import pytest
+
+from backend.cli import main as cli_main
+from backend.engines import incremental, registry, sampling
+from backend.engines.bias_engine import run_bias_checks
+from backend.engines.pipeline import assemble_report, evaluate_dataset, evaluate_short_circuit
+from backend.engines.poison_detector import (
+    _vectorise,
+    class_partitions,
+    detect_class_anomalies,
+    detect_cluster_anomalies,
+)
+from backend.engines.quality_checker import (
+    QualityPartial,
+    detect_duplicates,
+    generate_quality_report,
+    numeric_values,
+    percentile,
+    scan_quality,
+)
 from backend.engines.schema_validator import DatasetSchema, FieldSchema, SchemaValidator
 from backend.engines.tdie_scorer import compute_tdie_score
+from backend.engines.timestamp_engine import (
+    extract_timestamp_column,
+    find_timestamp_anomalies,
+    parse_timestamps,
+)
 from backend.engines.training_gate import GuardrailLevel, training_gate
+from backend.utils import data_loader, encoding, memory
+from backend.utils.audit import AuditWriter
+from backend.utils.blocklist import (
+    BloomFilter,
+    KnownBadDataset,
+    add_to_blocklist,
+    check_blocklist,
+    screen_dataset,
+)
+from backend.utils.columnar import ColumnarDataset
+from backend.utils.data_loader import SampleSpec, decode_json
+from backend.utils.dataset_refs import open_dataset
+from backend.utils.encoding import (
+    COMPACT_JSON_MEDIA_TYPE,
+    JSON_MEDIA_TYPE,
+    compress,
+    decode_compact,
+    encode_compact,
+    negotiate_encoding,
+    negotiate_media_type,
+)
+from backend.utils.evidence import EvidenceStore, link_evidence
+from backend.utils.hash_utils import (
+    hash_block,
+    hash_dataset,
+    hash_dataset_blocks,
+    hash_features,
+    merkle_root,
+    stable_json,
+)
+from backend.utils.history import (
+    downsample_history,
+    load_range,
+    query_history,
+    record_run,
+    run_row,
+)
+from backend.utils.log_query import LogQuery, _parse_header, log_files, query_logs
+from backend.utils.metrics import Counter, Histogram, MetricsRegistry
+from backend.utils.scheduler import JobCost, Scheduler, SchedulerBusy
+from backend.utils.schema_registry import (
+    SchemaRef,
+    compare_schemas,
+    register_schema,
+    resolve_schema,
+    validator_for,
+)
+from backend.utils.storage import JsonListStore, SqliteListStore
+from backend.utils.synthetic import (
+    DefectProfile,
+    SyntheticGenerator,
+    chunk_records,
+    generate_records,
+    write_dataset,
+)
+from benchmarks.run import compare, run_case
 
 
 def test_schema_validator_detects_missing_required_field() -> None:
@@ -44,3 +136,878 @@ def test_training_gate_respects_guardrail_levels() -> None:
     assert strict["training_decision"] == "BLOCK"
     assert moderate["training_decision"] == "REVIEW"
     assert permissive["training_decision"] == "PASS"
+
+
+def test_timestamp_fast_path_matches_per_value_parsing() -> None:
+    uniform = ["2024-01-01T00:00:00", "2024-01-02T12:30:00", "2024-03-01T00:00:00"]
+    mixed = uniform + ["2024-03-02", "2024-03-03T00:00:00+02:00", "not-a-date"]
+
+    fast_values, fast_valid = parse_timestamps(uniform)
+    slow_values, slow_valid = parse_timestamps(mixed)
+
+    assert fast_valid.all()
+    assert np.array_equal(fast_values, slow_values[:3])
+    assert slow_valid.tolist() == [True, True, True, True, True, False]
+    assert slow_values[4] == np.datetime64("2024-03-02T22:00:00", "ns")
+
+
+def test_timestamp_anomalies_use_original_row_order() -> None:
+    records = [
+        {"timestamp": "2024-01-01T00:00:00"},
+        {"timestamp": "2024-01-03T00:00:00"},
+        {"timestamp": "2024-01-02T00:00:00"},
+        {"timestamp": "2024-01-02T00:00:00"},
+        {"timestamp": "2030-01-01T00:00:00"},
+        {"timestamp": "bad"},
+    ]
+
+    column = extract_timestamp_column(records, "timestamp")
+    messages = find_timestamp_anomalies(column, now=datetime(2025, 1, 1, tzinfo=UTC))
+
+    assert "Invalid timestamp format in field timestamp" in messages
+    assert any("1 out-of-order run(s), first at record 2" in m for m in messages)
+    assert any("1 repeated record(s), first at record 3" in m for m in messages)
+    assert any("Future-dated timestamps" in m and "record 4" in m for m in messages)
+
+
+def test_schema_validator_flags_unparseable_datetimes() -> None:
+    schema = DatasetSchema(
+        name="demo", version="1.0", fields=[FieldSchema(name="ts", dtype="datetime")]
+    )
+    records = [{"ts": "2024-01-01T00:00:00"}, {"ts": "yesterday"}]
+
+    violations = SchemaValidator(schema).validate(records)
+
+    assert [v.message for v in violations] == ["Record 1 type mismatch expected datetime"]
+
+
+def test_pipeline_parses_each_datetime_column_once(monkeypatch) -> None:
+    from backend.engines import timestamp_engine
+
+    schema = _synthetic_schema()
+    rows = generate_records(schema, 300, seed=5)
+    rows[7]["timestamp"] = "yesterday"
+    expected = SchemaValidator(schema).validate(rows)
+    parsed: list[int] = []
+    original = timestamp_engine.parse_timestamps
+
+    def counting(values):
+        parsed.append(len(values))
+        return original(values)
+
+    monkeypatch.setattr(timestamp_engine, "parse_timestamps", counting)
+    for records in (rows, ColumnarDataset.from_records(rows)):
+        parsed.clear()
+        evaluation = evaluate_dataset(schema, records)
+
+        assert parsed == [300]
+        assert [v.message for v in evaluation.schema_violations] == [v.message for v in expected]
+        assert "Record 7 type mismatch expected datetime" in [
+            v.message for v in evaluation.schema_violations
+        ]
+        assert "Invalid timestamp format in field timestamp" in (
+            evaluation.quality_report.violations
+        )
+
+
+def test_partitioned_validation_matches_single_process() -> None:
+    schema = DatasetSchema(
+        name="demo",
+        version="1.0",
+        fields=[
+            FieldSchema(name="id", dtype="int"),
+            FieldSchema(name="value", dtype="float", min_value=0, max_value=50),
+            FieldSchema(name="timestamp", dtype="datetime"),
+        ],
+    )
+    records = [
+        {"id": i, "value": float(i % 60), "timestamp": f"2024-01-{1 + i % 28:02d}T00:00:00"}
+        for i in range(120)
+    ]
+    records[7]["value"] = None
+    records.extend(records[:2])
+    validator = SchemaValidator(schema)
+
+    parsed = {"timestamp": extract_timestamp_column(records, "timestamp")}
+
+    serial = validator.validate(records)
+    partitioned = validator.validate(records, workers=2, chunk_size=25)
+    reused = validator.validate(records, workers=2, chunk_size=25, timestamps=parsed)
+    serial_quality = generate_quality_report(records, [])
+    partitioned_quality = generate_quality_report(records, [], workers=2, chunk_size=25)
+    whole = scan_quality(records, 0, ["value"], ["timestamp"])
+    combined = QualityPartial.combine(
+        [scan_quality(records[s : s + 25], s, ["value"], ["timestamp"]) for s in range(0, 122, 25)]
+    )
+
+    assert [v.dict() for v in partitioned] == [v.dict() for v in serial]
+    assert [v.dict() for v in reused] == [v.dict() for v in serial]
+    assert partitioned_quality.to_dict() == serial_quality.to_dict()
+    assert combined.missing_messages == whole.missing_messages
+    assert combined.digests == whole.digests
+    np.testing.assert_array_equal(combined.numeric["value"], whole.numeric["value"])
+    np.testing.assert_array_equal(
+        combined.timestamps["timestamp"].positions, whole.timestamps["timestamp"].positions
+    )
+
+
+def test_columnar_dataset_row_view_and_numeric_fast_path() -> None:
+    dataset = ColumnarDataset(
+        {
+            "value": np.array([1.5, np.nan, 3.0]),
+            "group": np.array(["A", "B", "A"]),
+        },
+        absent={"group": np.array([False, False, True])},
+    )
+
+    assert list(dataset) == [
+        {"value": 1.5, "group": "A"},
+        {"value": None, "group": "B"},
+        {"value": 3.0},
+    ]
+    assert dataset[1:].column("value").tolist()[1] == 3.0
+    assert (
+        numeric_values(dataset, "value").tolist() == numeric_values(list(dataset), "value").tolist()
+    )
+
+
+def test_columnar_schema_validation_matches_row_validation() -> None:
+    schema = DatasetSchema(
+        name="demo",
+        version="1.0",
+        fields=[
+            FieldSchema(name="id", dtype="int"),
+            FieldSchema(name="value", dtype="float", min_value=0, max_value=50),
+            FieldSchema(name="group", dtype="str", allowed_values=["A", "B"]),
+            FieldSchema(name="flag", dtype="bool", required=False),
+            FieldSchema(name="timestamp", dtype="datetime"),
+        ],
+    )
+    records = [
+        {"id": 1, "value": 10, "group": "A", "timestamp": "2024-01-01T00:00:00"},
+        {"id": True, "value": 99.5, "group": "C", "flag": 1, "timestamp": "nope"},
+        {"id": "3", "value": None, "group": 7, "flag": False},
+        {"value": -2.0, "group": "B", "timestamp": "2024-01-02"},
+    ]
+    validator = SchemaValidator(schema)
+
+    by_row = validator.validate(records)
+    by_column = validator.validate(ColumnarDataset.from_records(records))
+
+    assert [v.dict() for v in by_column] == [v.dict() for v in by_row]
+    assert len(by_row) == 12
+
+
+def test_audit_writer_appends_json_lines_after_flush(tmp_path) -> None:
+    writer = AuditWriter(tmp_path / "audit.log")
+
+    for score in (10, 70):
+        writer.submit({"tdie_score": score, "decision": "PASS"})
+
+    assert writer.flush()
+    lines = (tmp_path / "audit.log").read_text().splitlines()
+    assert [json.loads(line)["tdie_score"] for line in lines] == [10, 70]
+
+
+def test_audit_writer_keeps_and_retries_entries_while_the_log_is_unwritable(tmp_path) -> None:
+    from backend.utils.metrics import AUDIT_WRITE_FAILURES
+
+    blocked = tmp_path / "blocked"
+    blocked.write_text("a file where the log directory should be")
+    writer = AuditWriter(blocked / "audit.log")
+
+    writer.submit({"tdie_score": 10, "decision": "BLOCK"})
+    stalled = writer.flush(timeout=0.3)
+    held = writer.pending
+    blocked.unlink()
+    blocked.mkdir()
+    recovered = writer.flush(timeout=5)
+
+    assert not stalled and held == 1
+    assert AUDIT_WRITE_FAILURES.value("audit.log") >= 1
+    assert recovered and writer.pending == 0
+    lines = (blocked / "audit.log").read_text().splitlines()
+    assert [json.loads(line)["decision"] for line in lines] == ["BLOCK"]
+
+
+def test_query_logs_reads_backwards_across_rotated_files(tmp_path) -> None:
+    active, rotated = tmp_path / "tdie.log", tmp_path / "tdie.log.1"
+    rotated.write_text(
+        "2024-01-01 00:00:00,000 | backend.api | INFO | old format | with a separator\n"
+        "2024-01-01 00:00:00,000 | backend.api | INFO | r1 | older\n"
+        "2024-01-01 00:00:01,000 | backend.api | ERROR | r2 | boom\n"
+        "Traceback (most recent call last):\n"
+    )
+    active.write_text(
+        "2024-01-01 00:00:02,000 | backend.engines.x | WARNING | r2 | warned\n"
+        "2024-01-01 00:00:03,000 | backend.api | INFO | r3 | newest\n"
+    )
+    files = log_files(active)
+
+    latest = query_logs(LogQuery(), limit=2, files=files)
+    errors = query_logs(LogQuery(level="warning"), limit=10, files=files)
+    by_request = query_logs(LogQuery(request_id="r2", logger_name="backend.api"), 10, files)
+    recent = query_logs(LogQuery(since=datetime(2024, 1, 1, 0, 0, 2)), limit=10, files=files)
+
+    assert files == [active, rotated]
+    assert [line.split(" | ")[-1] for line in latest] == ["warned\n", "newest\n"]
+    assert len(errors) == 2 and errors[0].endswith("Traceback (most recent call last):\n")
+    assert len(by_request) == 1 and "boom" in by_request[0]
+    assert len(recent) == 2
+    assert _parse_header(rotated.read_text().splitlines()[0]) == [
+        "2024-01-01 00:00:00,000",
+        "backend.api",
+        "INFO",
+        "old format | with a separator",
+    ]
+    assert query_logs(LogQuery(request_id="old format"), 10, files) == []
+
+
+def test_records_logged_after_shutdown_are_written_without_queueing(tmp_path, monkeypatch) -> None:
+    from backend.utils import logger as log_module
+
+    factory = log_module.LoggerFactory
+    monkeypatch.setattr(log_module, "LOG_DIR", tmp_path)
+    monkeypatch.setattr(log_module, "LOG_FILE", tmp_path / "tdie.log")
+    monkeypatch.setattr(log_module, "LOG_QUEUE_SIZE", 1)
+    monkeypatch.setattr(log_module, "LOG_QUEUE_POLICY", "block")
+    monkeypatch.setattr(factory, "_handler", None)
+    monkeypatch.setattr(factory, "_listener", None)
+    handler = factory.queue_handler()
+    logger = log_module.logging.getLogger("tdie.test_shutdown")
+    logger.addHandler(handler)
+    logger.setLevel("INFO")
+    try:
+        logger.info("before shutdown")
+        factory.shutdown()
+        started = time.perf_counter()
+        for index in range(3):
+            logger.info("after shutdown %d", index)
+        elapsed = time.perf_counter() - started
+    finally:
+        logger.removeHandler(handler)
+        for target in handler.direct or []:
+            target.close()
+
+    text = (tmp_path / "tdie.log").read_text()
+    assert "before shutdown" in text and "after shutdown 2" in text
+    assert elapsed < log_module.LOG_BLOCK_TIMEOUT
+    assert handler.dropped == 0 and handler.queue.empty()
+
+
+def test_benchmark_case_records_metrics_and_flags_regressions() -> None:
+    result = run_case("hash_dataset", rows=200, width=2, cardinality=3, repeat=1)
+    slower = {**result, "wall_seconds": result["wall_seconds"] * 2}
+
+    assert result["wall_seconds"] > 0 and result["peak_rss_bytes"] > 0
+    assert result["alloc_peak_bytes"] > 0
+    assert compare([result], [result], threshold=0.2) == []
+    assert len(compare([slower], [result], threshold=0.2)) == 1
+
+
+def _synthetic_schema() -> DatasetSchema:
+    return DatasetSchema(
+        name="synthetic",
+        version="1.0",
+        fields=[
+            FieldSchema(name="id", dtype="int"),
+            FieldSchema(name="value", dtype="float", min_value=-50, max_value=50),
+            FieldSchema(name="group", dtype="str"),
+            FieldSchema(name="label", dtype="int"),
+            FieldSchema(name="note", dtype="str"),
+            FieldSchema(name="timestamp", dtype="datetime"),
+        ],
+    )
+
+
+def test_synthetic_generator_is_schema_conformant_and_injects_defects() -> None:
+    schema = _synthetic_schema()
+    clean = generate_records(schema, 500, seed=3)
+    defects = DefectProfile(duplicate_rate=0.05, label_flip_rate=0.02, trigger_rate=0.02)
+    dirty = generate_records(schema, 500, defects, seed=3)
+
+    assert SchemaValidator(schema).validate(clean) == []
+    assert clean == generate_records(schema, 500, seed=3)
+    assert any(str(row["note"]).startswith("trigger") for row in dirty)
+    assert detect_duplicates(dirty)[0] > 0
+
+
+def test_synthetic_defects_keep_labels_in_vocabulary_and_duplicates_exact() -> None:
+    schema = _synthetic_schema()
+    clean = generate_records(schema, 2_000, seed=5)
+    generator = SyntheticGenerator(schema, DefectProfile(label_flip_rate=0.3), seed=5)
+    flipped = [row for columns in generator.chunks(2_000) for row in chunk_records(columns)]
+    changed = [new for old, new in zip(clean, flipped, strict=True) if old["label"] != new["label"]]
+
+    assert SchemaValidator(schema).validate(flipped) == []
+    assert len(changed) == generator.injected["label_flips"] > 0
+    assert {type(row["label"]) for row in flipped} == {int}
+    assert {row["label"] for row in flipped} == {0, 1}
+
+    generator = SyntheticGenerator(schema, DefectProfile(duplicate_rate=0.4), seed=5)
+    rows = [row for columns in generator.chunks(2_000) for row in chunk_records(columns)]
+    distinct = {stable_json(row) for row in rows}
+    assert len(rows) - len(distinct) == generator.injected["duplicates"]
+
+
+def test_synthetic_npy_output_streams_chunks_into_column_files(tmp_path) -> None:
+    generator = SyntheticGenerator(_synthetic_schema(), DefectProfile(null_rate=0.1), seed=1)
+    summary = write_dataset(generator, 2_500, tmp_path / "cols", fmt="npy", chunk_rows=1_000)
+    dataset = open_dataset(tmp_path / "cols", "npy")
+
+    assert len(dataset) == 2_500 and summary["injected"]["nulls"] > 0
+    assert list(dataset.column("id")) == list(range(2_500))
+    assert dataset.column("timestamp").dtype.kind == "M"
+
+
+def test_metrics_registry_renders_prometheus_text() -> None:
+    registry = MetricsRegistry()
+    latency = registry.register(Histogram("demo_seconds", "Demo latency.", ("stage",), (0.1, 1.0)))
+    hits = registry.register(Counter("demo_hits_total", "Demo hits.", ("cache",)))
+    for value in (0.05, 0.5, 5.0):
+        latency.observe(value, "load")
+    hits.inc("registry", amount=2)
+
+    lines = registry.render().splitlines()
+
+    assert "# TYPE demo_seconds histogram" in lines
+    assert 'demo_seconds_bucket{stage="load",le="0.1"} 1' in lines
+    assert 'demo_seconds_bucket{stage="load",le="1"} 2' in lines
+    assert 'demo_seconds_bucket{stage="load",le="+Inf"} 3' in lines
+    assert 'demo_seconds_count{stage="load"} 3' in lines
+    assert 'demo_hits_total{cache="registry"} 2' in lines
+
+
+IMPORT_BUDGET_SECONDS = float(os.environ.get("TDIE_IMPORT_BUDGET", "1.5"))
+
+
+def test_api_cold_import_stays_within_budget() -> None:
+    probe = (
+        "import json, sys, threading, time\n"
+        "started = time.perf_counter()\n"
+        "import backend.main\n"
+        "print(json.dumps({'seconds': time.perf_counter() - started,"
+        " 'modules': sorted(m for m in ('sklearn', 'pandas', 'matplotlib') if m in sys.modules),"
+        " 'threads': threading.active_count()}))\n"
+    )
+    root = pathlib.Path(__file__).resolve().parents[1]
+    result = subprocess.run(
+        [sys.executable, "-c", probe], cwd=root, capture_output=True, text=True, check=True
+    )
+    measured = json.loads(result.stdout)
+
+    assert measured["modules"] == []
+    assert measured["threads"] == 1
+    assert measured["seconds"] < IMPORT_BUDGET_SECONDS
+
+
+def test_cli_scores_partitions_and_maps_decisions_to_exit_codes(
+    tmp_path, monkeypatch, capsys
+) -> None:
+    from backend.engines import provenance
+
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(provenance, "PROVENANCE_LOG", tmp_path / "provenance_log.json")
+    schema = _synthetic_schema()
+    (tmp_path / "schema.json").write_text(schema.json())
+    parts = tmp_path / "parts"
+    parts.mkdir()
+    for seed in (1, 2):
+        rows = generate_records(schema, 50, seed=seed)
+        (parts / f"part{seed}.json").write_text(json.dumps(rows))
+
+    args = ["parts", "--schema", "schema.json", "--workers", "2", "--fingerprint"]
+    permissive = cli_main([*args, "--guardrail", "PERMISSIVE"])
+    lines = [json.loads(line) for line in capsys.readouterr().out.splitlines()]
+    strict = cli_main(["parts/part1.json", "--schema", "schema.json", "--threshold", "101"])
+    with pytest.raises(SystemExit) as missing:
+        cli_main(["nowhere"])
+
+    assert permissive == 0 and strict == 2 and missing.value.code == 3
+    assert sorted(line["partition"] for line in lines) == ["parts/part1.json", "parts/part2.json"]
+    assert all(line["rows"] == 50 and line["dataset_hash"] for line in lines)
+    assert len(json.loads((tmp_path / "provenance_log.json").read_text())) == 3
+
+
+def _append_many(path: str, worker: int) -> None:
+    store = JsonListStore(pathlib.Path(path))
+    for index in range(20):
+        store.append({"worker": worker, "index": index})
+
+
+def test_json_list_store_appends_safely_from_many_processes(tmp_path) -> None:
+    path = tmp_path / "provenance_log.json"
+    processes = [
+        multiprocessing.Process(target=_append_many, args=(str(path), worker))
+        for worker in range(4)
+    ]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join()
+
+    entries = JsonListStore(path).read()
+    assert len(entries) == 80
+    assert {(entry["worker"], entry["index"]) for entry in entries} == {
+        (worker, index) for worker in range(4) for index in range(20)
+    }
+    assert not list(tmp_path.glob("*.tmp"))
+
+
+def test_sqlite_list_store_keeps_collections_apart(tmp_path) -> None:
+    history = SqliteListStore(tmp_path / "state.sqlite3", "checksum_history")
+    provenance = SqliteListStore(tmp_path / "state.sqlite3", "provenance_log")
+    history.append({"dataset_hash": "a"})
+    history.append({"dataset_hash": "b"})
+    provenance.append({"source": "synthetic"})
+
+    assert [entry["dataset_hash"] for entry in history.read()] == ["a", "b"]
+    assert history.last() == {"dataset_hash": "b"}
+    assert provenance.read() == [{"source": "synthetic"}]
+
+
+def test_incremental_batches_reproduce_full_dataset_results(tmp_path, monkeypatch) -> None:
+    monkeypatch.setattr(incremental, "INCREMENTAL_DIR", tmp_path)
+    monkeypatch.setattr(incremental, "MERKLE_BLOCK_ROWS", 4)
+    schema = DatasetSchema(
+        name="demo",
+        version="1.0",
+        expected_records=20,
+        fields=[
+            FieldSchema(name="id", dtype="int"),
+            FieldSchema(name="value", dtype="float", max_value=50),
+            FieldSchema(name="timestamp", dtype="datetime"),
+        ],
+    )
+    records = [
+        {
+            "id": idx % 9,
+            "value": 500.0 if idx == 13 else float(idx % 9),
+            "group": "A" if idx % 3 else "B",
+            "label": idx % 2,
+            "timestamp": f"2024-01-{1 + (idx * 7) % 28:02d}T00:00:00",
+            "note": "" if idx % 5 == 0 else "ok",
+        }
+        for idx in range(18)
+    ]
+    records[5], records[9] = dict(records[2]), dict(records[1])  # duplicates across batches
+
+    for start, stop in ((0, 5), (5, 6), (6, 18)):
+        update = incremental.append_rows("demo", schema, records[start:stop], start)
+
+    full = generate_quality_report(records, [])
+    assert update.rows == 18 and update.delta_rows == 12
+    assert update.schema_violations == SchemaValidator(schema).validate(records)
+    assert update.quality_report([]).to_dict() == full.to_dict()
+    assert update.bias_report == run_bias_checks(records)
+    blocks = [hash_dataset(records[i : i + 4]) for i in range(0, 18, 4)]
+    assert update.summary()["merkle_root"] == merkle_root(blocks)
+    with pytest.raises(incremental.IncrementalStateError):
+        incremental.append_rows("demo", schema, records[:2], expected_offset=6)
+
+
+def test_sample_estimates_match_full_scan_and_bound_rates() -> None:
+    records = generate_records(_synthetic_schema(), 400, DefectProfile(outlier_rate=0.05), seed=3)
+    dataset = ColumnarDataset.from_records(records)
+
+    estimate, (low, high) = sampling.estimate_quality(dataset, dataset, [], 0.95)
+    sample, indices = sampling.draw_sample(
+        dataset, SampleSpec(size=40, method="stratified", stratify_by="group", seed=1)
+    )
+    strata = [record["group"] for record in records]
+
+    assert estimate.score == generate_quality_report(dataset, []).score
+    assert low <= estimate.score <= high
+    assert len(sample) == 40 and list(indices) == sorted(set(indices.tolist()))
+    for group in set(strata):
+        share = strata.count(group) / len(strata)
+        assert abs(sum(strata[i] == group for i in indices) - 40 * share) <= 1
+    assert sampling.wilson_interval(0, 100, 0.95)[1] > 0
+    low_rate, high_rate = sampling.wilson_interval(30, 100, 0.95)
+    assert low_rate < 0.3 < high_rate
+
+
+def test_short_circuit_skips_stages_once_decision_is_fixed() -> None:
+    schema = _synthetic_schema()
+    submission = {"source": "synthetic", "user": "tester", "transformation_steps": ["scaling"]}
+    clean = ColumnarDataset.from_records(generate_records(schema, 3000, seed=5))
+    broken = generate_records(schema, 3000, seed=5)
+    for record in broken[:10]:
+        record["id"] = str(record["id"])
+
+    rejected = evaluate_short_circuit(schema, broken, 100.0)
+    settled = assemble_report(schema, evaluate_short_circuit(schema, clean, 100.0), submission, {})
+    full = assemble_report(schema, evaluate_dataset(schema, clean), submission, {})
+
+    assert rejected.short_circuit["stages_run"] == ["schema_validate"]
+    assert rejected.short_circuit["decision"] == "BLOCK"
+    assert rejected.short_circuit["schema_rows_checked"] < len(broken)
+    assert rejected.bias_report is None and rejected.quality_report is None
+    low, high = settled["short_circuit"]["score_bounds"]
+    assert settled["tdie_score"] is None and settled["tdie_score_bounds"] == [low, high]
+    assert low <= full["tdie_score"] <= high
+    assert settled["decision"] == full["decision"]
+    assert math.isnan(run_row(settled, len(clean))["tdie_score"])
+
+
+def test_engine_registry_computes_intermediates_once_and_frees_them(monkeypatch) -> None:
+    calls: list[str] = []
+    custom = registry.EngineRegistry()
+    custom.register(
+        "doubled", lambda records: calls.append("doubled") or [2 * r for r in records], ("records",)
+    )
+    custom.register("total", lambda doubled: sum(doubled), ("doubled",), engine=True)
+    custom.register("peak", lambda doubled: max(doubled), ("doubled",), engine=True)
+    custom.register("loop", lambda loop: loop, ("loop",), engine=True)
+
+    run = custom.start({"records": [1, 2, 3]}, ["total", "peak"])
+    assert run.result("total") == 12 and run.held == ["doubled"]
+    assert run.result("peak") == 6 and run.held == []
+    assert calls == ["doubled"]
+    with pytest.raises(ValueError):
+        custom.plan(["loop"])
+
+    vectorised: list[int] = []
+    original = registry._vectorise
+    monkeypatch.setattr(
+        registry, "_vectorise", lambda *args: vectorised.append(1) or original(*args)
+    )
+    registry.default_registry.register(
+        "matrix_rows", lambda numeric_matrix: len(numeric_matrix), ("numeric_matrix",), True
+    )
+    try:
+        evaluation = evaluate_dataset(
+            _synthetic_schema(), generate_records(_synthetic_schema(), 50)
+        )
+    finally:
+        registry.default_registry.unregister("matrix_rows")
+    assert evaluation.detectors == {"matrix_rows": 50}
+    assert len(vectorised) == 1
+
+
+def test_scheduler_caps_heavy_lane_by_memory_and_keeps_cheap_lane_open() -> None:
+    scheduler = Scheduler(memory_budget_mb=100, max_heavy=4, cheap_slots=1, heavy_seconds=0.1)
+    heavy = ("tdie_score", 200_000, 5, ["quality_report", "poisoning_risk"])  # ~95 MB
+
+    small = ("bias_check", 100, 2, ["bias_checks"])
+    with scheduler.admit(*heavy) as first:
+        with pytest.raises(SchedulerBusy) as rejected:
+            scheduler.admit(*heavy).__enter__()
+        with scheduler.admit(*small) as cheap, pytest.raises(SchedulerBusy):
+            scheduler.admit(*small).__enter__()
+    with scheduler.admit(*heavy) as second:
+        pass
+
+    assert first.heavy and second.heavy and not cheap.heavy
+    assert rejected.value.status_code == 429
+    assert int(rejected.value.headers["Retry-After"]) >= 1
+
+
+def test_scheduler_admits_bodies_by_size_and_hands_them_to_the_engine_admission() -> None:
+    scheduler = Scheduler(memory_budget_mb=100, max_heavy=1, cheap_slots=4, heavy_seconds=0.1)
+    heavy = ("tdie_score", 200_000, 5, ["quality_report", "poisoning_risk"])
+
+    with scheduler.admit_body("tdie_score", 1_000) as small:
+        pass
+    with scheduler.admit_body("tdie_score", 10**7) as body, scheduler.admit(*heavy) as job:
+        assert scheduler._heavy == [job]
+        with pytest.raises(SchedulerBusy), scheduler.admit_body("tdie_score", 10**7):
+            pass
+    with scheduler.admit(*heavy), pytest.raises(SchedulerBusy):
+        scheduler.admit_body("tdie_score", 10**7).__enter__()
+
+    assert small is None
+    assert body.released and job.heavy
+    assert job.cost.memory_bytes == max(JobCost(200_000, 5, heavy[3]).memory_bytes, 5.5e7)
+    assert scheduler._heavy == []
+
+
+def test_memory_budget_spills_intermediates_without_changing_results(monkeypatch) -> None:
+    schema = _synthetic_schema()
+    defects = DefectProfile(duplicate_rate=0.05, outlier_rate=0.02)
+    rows = generate_records(schema, 3_000, defects, seed=5)
+    columnar = ColumnarDataset.from_records(rows)
+    values = np.concatenate([np.zeros(500), np.random.default_rng(0).normal(size=2_001)])
+    in_memory = [generate_quality_report(data, data).to_dict() for data in (rows, columnar)]
+    matrix = _vectorise(columnar, ["id", "value"])
+
+    monkeypatch.setattr(memory, "STAGE_MEMORY_MB", 0.01)
+    spilled_matrix = _vectorise(columnar, ["id", "value"])
+
+    assert [generate_quality_report(data, data).to_dict() for data in (rows, columnar)] == (
+        in_memory
+    )
+    assert isinstance(spilled_matrix, np.memmap)
+    assert np.array_equal(spilled_matrix, matrix)
+    assert 0 < len(detect_cluster_anomalies(columnar, ["id", "value"], spilled_matrix)) < 3_000
+    assert memory.percentiles(values, (0, 25, 50, 75, 100)) == [
+        percentile(values, p) for p in (0, 25, 50, 75, 100)
+    ]
+    digest = hashlib.sha256(stable_json(rows).encode("utf-8")).hexdigest()
+    assert hash_dataset(rows) == digest
+    assert (
+        hash_features(rows)["id"]
+        == hashlib.sha256(stable_json([row["id"] for row in rows]).encode("utf-8")).hexdigest()
+    )
+
+
+def test_compact_encoding_round_trips_and_shrinks_per_sample_lists() -> None:
+    rng = np.random.default_rng(2)
+    sparse = sorted(rng.choice(1_000_000, 50_000, replace=False).tolist())
+    report = {
+        "poisoning_risk_score": 100.0,
+        "suspected_poison_samples": sparse,
+        "signals": {"label_flips": list(range(10, 200_010)), "rare_pattern": [3, 7]},
+        "scores": rng.normal(size=1_000).tolist(),
+        "violations": ["Record 1 missing value in x"] * 40,
+        "unsorted": list(range(40, 0, -1)),
+    }
+
+    body = compress(encode_compact(report, COMPACT_JSON_MEDIA_TYPE), "gzip")
+
+    assert decode_compact(body, COMPACT_JSON_MEDIA_TYPE, "gzip") == report
+    assert len(body) * 10 < len(json.dumps(report))
+    assert negotiate_media_type(None) == JSON_MEDIA_TYPE
+    assert negotiate_media_type("*/*") == JSON_MEDIA_TYPE
+    assert negotiate_media_type(f"application/json;q=0.5, {COMPACT_JSON_MEDIA_TYPE}") == (
+        COMPACT_JSON_MEDIA_TYPE
+    )
+    assert negotiate_encoding("gzip;q=0, br") is None
+
+
+@pytest.mark.parametrize("accelerated", [True, False])
+def test_json_decoding_and_compact_encoding_with_and_without_orjson(
+    monkeypatch, accelerated: bool
+) -> None:
+    if accelerated:
+        pytest.importorskip("orjson")
+    else:
+        monkeypatch.setattr(data_loader, "orjson", None)
+        monkeypatch.setattr(encoding, "orjson", None)
+    report = {
+        "scores": [0.25] * 40,
+        "mixed": [0.5, 1, 2] * 20,
+        "mean": np.float64(1.5),
+        "name": "caf\u00e9",
+        "at": datetime(2024, 1, 1, 12, 30),
+    }
+
+    body = encode_compact(report, COMPACT_JSON_MEDIA_TYPE)
+    decoded = decode_compact(body, COMPACT_JSON_MEDIA_TYPE)
+
+    assert decode_json(b'{"records": [{"id": 1, "value": 0.5}]}') == {
+        "records": [{"id": 1, "value": 0.5}]
+    }
+    with pytest.raises(ValueError):
+        decode_json(b"{")
+    assert decoded == {**report, "mean": 1.5, "at": "2024-01-01T12:30:00"}
+    assert [type(value) for value in decoded["mixed"][:3]] == [float, int, int]
+    with pytest.raises((TypeError, ValueError)):
+        encode_compact({"handle": object()}, COMPACT_JSON_MEDIA_TYPE)
+
+
+def test_evidence_store_deduplicates_bundles_and_applies_retention(tmp_path) -> None:
+    store = EvidenceStore(tmp_path, retention_days=30, max_bundles=2)
+    provenance = {"source": "synthetic", "user": "alice", "timestamp": "2024-01-01T00:00:00"}
+    report = link_evidence({"tdie_score": 82.0, "decision": "PASS"}, "ab" * 32, provenance)
+
+    digests = [store.submit(report) for _ in range(3)]
+    pending = store.read(digests[0])
+    assert store.flush()
+    for score in range(3):
+        store.submit({"tdie_score": float(score)})
+    assert store.flush()
+
+    assert len(set(digests)) == 1
+    assert gzip.decompress(pending) == gzip.decompress(store.read(digests[0]))
+    text = gzip.decompress(store.read(digests[0])).decode()
+    assert f"dataset_hash: {'ab' * 32}" in text and "provenance_digest: " in text
+    assert len(list(tmp_path.glob("*/*.gz"))) == 4
+    assert store.collect_garbage() == 2
+    assert len(list(tmp_path.glob("*/*.gz"))) == 2
+    assert store.collect_garbage(now=time.time() + 31 * 86400) == 2
+    assert store.read("not-a-digest") is None
+
+
+def test_schema_registry_caches_compiled_contracts_and_reports_compatibility(
+    tmp_path, monkeypatch
+) -> None:
+    from collections import OrderedDict
+
+    from backend.utils import schema_registry
+
+    monkeypatch.setattr(schema_registry, "SCHEMA_REGISTRY", tmp_path / "schemas.json")
+    monkeypatch.setattr(schema_registry, "_compiled", OrderedDict())
+    monkeypatch.setattr(schema_registry, "SCHEMA_CACHE_SIZE", 1)
+    v1 = DatasetSchema(
+        name="orders",
+        version="1",
+        fields=[
+            FieldSchema(name="qty", dtype="int", min_value=0),
+            FieldSchema(name="status", dtype="str", allowed_values=["new", "paid", "void"]),
+            FieldSchema(name="note", dtype="str", required=False),
+        ],
+    )
+    v2 = DatasetSchema(
+        name="orders",
+        version="2",
+        fields=[
+            FieldSchema(name="qty", dtype="float", min_value=1),
+            FieldSchema(name="status", dtype="str", allowed_values=["new", "paid"]),
+            FieldSchema(name="channel", dtype="str", required=False),
+        ],
+    )
+    register_schema(v1)
+    entry = register_schema(v2)
+
+    schema = resolve_schema(SchemaRef(name="orders", version="1"))
+    assert resolve_schema(SchemaRef(name="orders", version="1")) is schema
+    assert validator_for(schema) is validator_for(schema)
+    assert validator_for(v1) is not validator_for(schema)
+    records = [{"qty": 1, "status": "paid"}, {"qty": 2, "status": "lost"}, {"qty": 3}]
+    assert [v.dict() for v in validator_for(schema).validate(records)] == [
+        v.dict() for v in SchemaValidator(v1).validate(records)
+    ]
+    resolve_schema(SchemaRef(name="orders", version="2"))
+    assert resolve_schema(SchemaRef(name="orders", version="1")) is not schema
+    with pytest.raises(KeyError):
+        resolve_schema(SchemaRef(name="orders", version="3"))
+
+    assert entry["compatibility"] == {
+        "against": "1",
+        "compatible": False,
+        "breaking": ["qty: min raised to 1.0", "status: allowed values narrowed"],
+        "changes": ["channel: added as optional", "note: removed", "qty: dtype int -> float"],
+    }
+    assert compare_schemas(v2, v1)["breaking"] == ["qty: dtype float -> int"]
+
+
+def test_bloom_filter_has_no_false_negatives_and_bounded_false_positives() -> None:
+    digests = [hashlib.sha256(str(i).encode()).hexdigest() for i in range(20000)]
+    bloom = BloomFilter(10000, fp_rate=0.01)
+    bloom.add(digests[:10000])
+
+    assert bloom.contains(digests[:10000]).all()
+    assert bloom.contains(digests[10000:]).mean() < 0.02
+    assert bloom.stats()["estimated_fp_rate"] < 0.02
+
+
+def test_blocklist_flags_reused_poisoned_blocks(tmp_path, monkeypatch) -> None:
+    from backend.utils import blocklist
+
+    monkeypatch.setattr(blocklist, "BLOCKLIST_PATH", tmp_path / "blocklist.json")
+    monkeypatch.setattr(blocklist, "BLOCKLIST_BLOCK_ROWS", 100)
+    clean = [{"id": i, "value": float(i)} for i in range(250)]
+    poisoned = [{"id": i, "value": -1.0} for i in range(100)]
+    dataset_hash, blocks = hash_dataset_blocks(clean, 100)
+
+    assert dataset_hash == hash_dataset(clean)
+    assert blocks[1] == hash_block([stable_json(row) for row in clean[100:200]])
+    screen_dataset(clean, len(clean))  # empty blocklist: nothing to check
+
+    add_to_blocklist(block_hashes=hash_dataset_blocks(poisoned, 100)[1], reason="label flip")
+    screen_dataset(clean, len(clean))
+    with pytest.raises(KnownBadDataset, match=r"blocks \[1\]"):
+        screen_dataset(ColumnarDataset.from_records(clean[:100] + poisoned), 200)
+    assert check_blocklist(dataset_hash, blocks) == {
+        "known_bad": False,
+        "dataset": None,
+        "blocks": [],
+    }
+    with pytest.raises(ValueError):
+        add_to_blocklist(["not-a-digest"])
+
+
+def test_sampled_screen_hashes_only_a_sample_sized_set_of_blocks(tmp_path, monkeypatch) -> None:
+    from backend.utils import blocklist
+
+    monkeypatch.setattr(blocklist, "BLOCKLIST_PATH", tmp_path / "blocklist.json")
+    monkeypatch.setattr(blocklist, "BLOCKLIST_BLOCK_ROWS", 100)
+    poisoned = [{"id": i, "value": -1.0} for i in range(100)] * 10
+    clean = [{"id": i, "value": float(i)} for i in range(1000)]
+    add_to_blocklist([hash_dataset(clean)], hash_dataset_blocks(poisoned, 100)[1][:1])
+
+    with pytest.raises(KnownBadDataset) as rejected:
+        screen_dataset(poisoned, 1000, sample_rows=250, seed=3)
+    with pytest.raises(KnownBadDataset, match="known-bad"):
+        screen_dataset(clean, 1000)
+
+    # Every block matches, so the rejection lists exactly the blocks that were hashed.
+    assert str(rejected.value).count(",") == 2
+    screen_dataset(clean, 1000, sample_rows=250)  # the dataset digest needs a full pass
+
+
+def test_class_conditional_clustering_finds_poison_hidden_in_one_class() -> None:
+    rng = np.random.default_rng(0)
+    labels = np.repeat([0, 1, 2], 200)
+    points = rng.normal(labels[:, None] * 10.0, 1.0, size=(600, 2))
+    poisoned = np.arange(20)  # class 0 rows planted on top of class 2
+    points[poisoned] += 20.0
+    rows = [{"x": x, "y": y, "label": int(c)} for (x, y), c in zip(points, labels, strict=True)]
+    columnar = ColumnarDataset.from_records(rows)
+    matrix = _vectorise(columnar, ["x", "y"])
+
+    flagged, suspicion, classes = detect_class_anomalies(columnar, ["x", "y"], matrix, workers=1)
+    pooled, pooled_suspicion, _ = detect_class_anomalies(rows, ["x", "y"], workers=2)
+    global_hits = detect_cluster_anomalies(columnar, ["x", "y"], matrix)
+
+    assert [len(part) for part in class_partitions(rows)] == [200, 200, 200]
+    assert set(poisoned.tolist()) <= set(flagged)
+    assert pooled == flagged
+    np.testing.assert_allclose(pooled_suspicion, suspicion)
+    assert not set(poisoned.tolist()) & set(global_hits)
+    # Planted rows outrank every clean row, in their class and in the others.
+    assert suspicion[poisoned].min() > np.delete(suspicion, poisoned).max()
+    assert [(entry["label"], entry["rows"]) for entry in classes] == [(0, 200), (1, 200), (2, 200)]
+    assert classes[0]["max_suspicion"] == pytest.approx(suspicion[:200].max(), abs=1e-4)
+
+    mixed = [{**row, "label": "1" if row["label"] == 0 else row["label"]} for row in rows]
+    mixed += [{"x": 0.0, "y": 0.0, "label": None}]
+    _, mixed_suspicion, mixed_classes = detect_class_anomalies(mixed, ["x", "y"], workers=1)
+    assert sorted(entry["label"] for entry in mixed_classes if entry["label"] != "1") == [1, 2]
+    assert "1" in [entry["label"] for entry in mixed_classes]
+    assert np.isnan(mixed_suspicion[-1])
+
+
+def test_history_store_queries_and_downsamples_time_partitioned_runs(tmp_path, monkeypatch) -> None:
+    from backend.utils import history
+
+    monkeypatch.setattr(history, "HISTORY_DIR", tmp_path)
+    day = datetime(2024, 1, 30, tzinfo=UTC)
+    runs = [
+        (day, {"tdie_score": 90.0, "quality_score": 95.0, "decision": "PASS"}),
+        (day.replace(hour=6), {"tdie_score": 70.0, "decision": "REVIEW"}),
+        (day.replace(month=2, day=2), {"tdie_score": 20.0, "decision": "BLOCK"}),
+        (day.replace(hour=3), {"tdie_score": 80.0, "quality_score": 85.0, "decision": "PASS"}),
+    ]
+    for moment, report in runs:
+        record_run("orders", {**report, "signals": {"embedding_drift": 1.5}}, 10, at=moment)
+
+    assert sorted(path.name for path in (tmp_path / "orders").iterdir() if path.is_dir()) == [
+        "2024-01",
+        "2024-02",
+    ]
+    january = query_history("orders", end=datetime(2024, 2, 1), metrics=["tdie_score"])
+    assert january["columns"]["tdie_score"] == [90.0, 80.0, 70.0]
+    latest = query_history("orders", limit=1)["columns"]
+    assert latest["decision"] == ["BLOCK"] and latest["quality_score"] == [None]
+    assert latest["embedding_drift"] == [1.5] and latest["rows"] == [10]
+
+    daily = downsample_history("orders", 86400, metrics=["tdie_score", "quality_score"])
+    assert daily["count"] == [3, 1]
+    assert daily["metrics"]["tdie_score"] == {
+        "mean": [80.0, 20.0],
+        "min": [70.0, 20.0],
+        "max": [90.0, 20.0],
+    }
+    assert daily["metrics"]["quality_score"]["mean"] == [90.0, None]
+    assert daily["decisions"] == {"PASS": [2, 0], "REVIEW": [1, 0], "BLOCK": [0, 1]}
+
+    # A torn append leaves one column longer; reads ignore it and the next append trims it.
+    with (tmp_path / "orders" / "2024-02" / "tdie_score.bin").open("ab") as handle:
+        handle.write(np.array([1.0]).tobytes())
+    assert len(load_range("orders")["tdie_score"]) == 4
+    record_run("orders", {"tdie_score": 30.0}, 5, at=day.replace(month=2, day=3))
+    assert load_range("orders", start=datetime(2024, 2, 1))["tdie_score"].tolist() == [20.0, 30.0]
+    with pytest.raises(ValueError):
+        load_range("orders", metrics=["nope"])
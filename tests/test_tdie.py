@@ -131,3 +131,407 @@ async def test_tdie_score_and_training_gate(client: httpx.AsyncClient):
     )
     assert train_res.status_code == 200
     assert "training_decision" in train_res.json()
+
+
+async def test_dataset_reference_matches_inline_records(
+    client: httpx.AsyncClient, tmp_path, monkeypatch
+):
+    import numpy as np
+
+    from backend.utils import dataset_refs
+
+    payload = example_payload()
+    columns = tmp_path / "demo_columns"
+    columns.mkdir()
+    for name in ("id", "value", "group", "label", "timestamp"):
+        np.save(columns / f"{name}.npy", np.array([r[name] for r in payload["records"]]))
+    monkeypatch.setattr(dataset_refs, "DATASET_ROOT", tmp_path)
+    monkeypatch.setattr(dataset_refs, "DATASET_REGISTRY", tmp_path / "registry.json")
+
+    inline = await client.post("/bias_check", json=payload)
+    register = await client.post("/datasets", json={"id": "demo", "path": "demo_columns"})
+    by_path = await client.post(
+        "/bias_check", json={**payload, "records": None, "dataset": {"path": "demo_columns"}}
+    )
+    by_id = await client.post(
+        "/validate_dataset", json={**payload, "records": None, "dataset": {"id": "demo"}}
+    )
+    escape = await client.post(
+        "/bias_check", json={**payload, "records": None, "dataset": {"path": "../etc"}}
+    )
+
+    assert register.status_code == 200
+    assert by_path.json() == inline.json()
+    assert by_id.status_code == 200
+    assert by_id.json()["schema_violations"] == []
+    assert escape.status_code == 400
+    assert dataset_refs.reference_bytes(dataset_refs.DatasetReference(id="demo")) == sum(
+        path.stat().st_size for path in columns.iterdir()
+    )
+
+
+async def test_registered_schema_can_be_referenced_instead_of_sent(
+    client: httpx.AsyncClient, tmp_path, monkeypatch
+):
+    from collections import OrderedDict
+
+    from backend.utils import schema_registry
+
+    monkeypatch.setattr(schema_registry, "SCHEMA_REGISTRY", tmp_path / "schemas.json")
+    monkeypatch.setattr(schema_registry, "_compiled", OrderedDict())
+    payload = example_payload()
+    ref = {"name": "synthetic_demo", "version": "1.0"}
+    stricter = {**payload["schema"], "version": "2.0"}
+    stricter["fields"] = [*stricter["fields"], {"name": "region", "dtype": "str"}]
+
+    created = await client.post("/schemas", json={"schema": payload["schema"]})
+    again = await client.post("/schemas", json={"schema": payload["schema"]})
+    altered = await client.post("/schemas", json={"schema": {**payload["schema"], "fields": []}})
+    refused = await client.post("/schemas", json={"schema": stricter, "require_compatible": True})
+    inline = await client.post("/validate_dataset", json=payload)
+    by_ref = await client.post(
+        "/validate_dataset", json={**payload, "schema": None, "schema_ref": ref}
+    )
+    unknown = await client.post(
+        "/validate_dataset", json={**payload, "schema": None, "schema_ref": {**ref, "version": "9"}}
+    )
+
+    assert created.status_code == 200 and created.json()["created"] is True
+    assert again.json()["created"] is False
+    assert altered.status_code == 409
+    assert refused.status_code == 409 and "region" in refused.json()["detail"]
+    assert by_ref.json() == inline.json()
+    assert unknown.status_code == 400
+    assert (await client.get("/schemas")).json() == {"synthetic_demo": ["1.0"]}
+
+
+async def test_blocklisted_dataset_is_rejected_before_engines_run(
+    client: httpx.AsyncClient, tmp_path, monkeypatch
+):
+    from backend.utils import blocklist
+
+    monkeypatch.setattr(blocklist, "BLOCKLIST_PATH", tmp_path / "blocklist.json")
+    payload = example_payload()
+
+    added = await client.post("/blocklist", json={**payload, "reason": "poisoned shard"})
+    scored = await client.post("/tdie_score", json=payload)
+    fingerprint = (await client.post("/fingerprint", json=payload)).json()
+    other = await client.post("/tdie_score", json={**payload, "records": payload["records"][:2]})
+    stats = (await client.get("/blocklist")).json()
+
+    assert added.json()["added"] == {"datasets": 1, "blocks": 1}
+    assert scored.status_code == 400 and "blocklist" in scored.json()["detail"]
+    assert fingerprint["blocklist"]["known_bad"] is True
+    assert fingerprint["blocklist"]["dataset"]["reason"] == "poisoned shard"
+    assert other.status_code == 200
+    assert stats["datasets"] == 1 and stats["filter"]["entries"] == 2
+
+
+async def test_poison_detect_can_cluster_per_class(client: httpx.AsyncClient):
+    import numpy as np
+
+    np.random.seed(0)
+    payload = example_payload()
+    payload["records"] = [
+        {**record, "id": record["id"] + 3 * copy, "value": record["value"] + copy % 5}
+        for copy in range(10)
+        for record in payload["records"]
+    ]
+
+    response = await client.post("/poison_detect", json={**payload, "class_conditional": True})
+    default = await client.post("/poison_detect", json=payload)
+    disabled = await client.post("/poison_detect", json={**payload, "class_conditional": "false"})
+    invalid = await client.post("/poison_detect", json={**payload, "class_conditional": "maybe"})
+
+    assert response.status_code == 200
+    report = response.json()
+    summary = {entry["label"]: entry["rows"] for entry in report["class_conditional"]["classes"]}
+    assert summary == {0: 10, 1: 20}
+    scored = report["class_conditional"]["row_suspicion"]
+    assert scored["indices"] == list(range(30)) and len(scored["scores"]) == 30
+    assert set(report["signals"]["cluster_outliers"]) <= set(report["suspected_poison_samples"])
+    assert "class_conditional" not in default.json()
+    assert "class_conditional" not in disabled.json()
+    assert invalid.status_code == 400
+
+
+async def test_scored_runs_are_recorded_in_metrics_history(
+    client: httpx.AsyncClient, tmp_path, monkeypatch
+):
+    import numpy as np
+
+    from backend.utils import history
+
+    np.random.seed(0)
+    monkeypatch.setattr(history, "HISTORY_DIR", tmp_path)
+    payload = example_payload()
+
+    scores = [(await client.post("/tdie_score", json=payload)).json() for _ in range(2)]
+    runs = await client.get("/history/synthetic_demo", params={"metrics": "tdie_score,decision"})
+    yearly = await client.get(
+        "/history/synthetic_demo/downsample", params={"bucket_seconds": 3600 * 24 * 365}
+    )
+    bad = await client.get("/history/synthetic_demo", params={"metrics": "nope"})
+
+    assert (await client.get("/history")).json() == ["synthetic_demo"]
+    columns = runs.json()["columns"]
+    assert columns["tdie_score"] == [report["tdie_score"] for report in scores]
+    assert columns["decision"] == [report["decision"] for report in scores]
+    assert set(columns) == {"timestamp", "tdie_score", "decision"}
+    assert sum(yearly.json()["count"]) == 2
+    assert bad.status_code == 400
+
+
+async def test_logs_endpoint_filters_and_tags_request_ids(client: httpx.AsyncClient):
+    response = await client.get("/logs", params={"lines": 5, "level": "info"})
+    bad_level = await client.get("/logs", params={"level": "loud"})
+    spoofed = await client.get("/health", headers={"X-Request-ID": "a | b"})
+
+    assert response.status_code == 200
+    assert response.headers["X-Request-ID"]
+    assert len(spoofed.headers["X-Request-ID"]) == 32
+    assert isinstance(response.json(), list)
+    assert bad_level.status_code == 400
+
+
+async def test_metrics_endpoint_exposes_stage_timings(client: httpx.AsyncClient):
+    await client.post("/tdie_score", json=example_payload())
+    response = await client.get("/metrics")
+    body = response.text
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+    assert 'tdie_stage_duration_seconds_count{stage="load_dataset"}' in body
+    assert 'tdie_stage_rows_total{stage="poisoning_risk"}' in body
+    assert 'tdie_http_request_bytes_total{route="/tdie_score"}' in body
+
+
+async def test_profiled_request_is_retrievable_by_request_id(
+    client: httpx.AsyncClient, tmp_path, monkeypatch
+):
+    from backend.utils import profiling
+
+    monkeypatch.setattr(profiling, "PROFILE_DIR", tmp_path)
+    headers = {"X-TDIE-Profile": "1", "X-Request-ID": "profile-demo"}
+
+    scored = await client.post("/tdie_score", json=example_payload(), headers=headers)
+    listed = await client.get("/admin/profiles")
+    summary = await client.get("/admin/profiles/profile-demo")
+    missing = await client.get("/admin/profiles/unknown")
+
+    assert scored.headers["X-TDIE-Profile-Id"] == "profile-demo"
+    assert [entry["request_id"] for entry in listed.json()] == ["profile-demo"]
+    stages = [stage["stage"] for stage in summary.json()["stages"]]
+    assert stages[0] == "load_dataset"
+    assert stages.index("timestamp_columns") < stages.index("schema_validate")
+    assert summary.json()["top_functions"]
+    assert summary.json()["allocations"]["peak_bytes"] > 0
+    assert missing.status_code == 404
+
+
+async def test_profile_header_is_set_only_when_a_profile_was_stored(
+    client: httpx.AsyncClient, tmp_path, monkeypatch
+):
+    from backend.utils import profiling
+
+    monkeypatch.setattr(profiling, "PROFILE_DIR", tmp_path)
+    headers = {"X-TDIE-Profile": "1", "X-Request-ID": "profile-busy"}
+
+    health = await client.get("/health", headers=headers)
+    with profiling._profiler_lock:  # another request is being profiled
+        busy = await client.post("/tdie_score", json=example_payload(), headers=headers)
+
+    assert health.status_code == 200 and "X-TDIE-Profile-Id" not in health.headers
+    assert busy.status_code == 200 and "X-TDIE-Profile-Id" not in busy.headers
+    assert (await client.get("/admin/profiles")).json() == []
+
+
+async def test_incremental_tdie_score_covers_all_appended_rows(
+    client: httpx.AsyncClient, tmp_path, monkeypatch
+):
+    from backend.engines import incremental
+    from backend.utils import history
+
+    monkeypatch.setattr(incremental, "INCREMENTAL_DIR", tmp_path / "incremental")
+    monkeypatch.setattr(history, "HISTORY_DIR", tmp_path / "history")
+    payload = example_payload()
+    first, second = payload["records"][:2], payload["records"][2:]
+
+    await client.post("/tdie_score", json={**payload, "records": first, "incremental_id": "demo"})
+    appended = await client.post(
+        "/tdie_score", json={**payload, "records": second, "incremental_id": "demo"}
+    )
+    full = await client.post("/tdie_score", json=payload)
+    replay = await client.post(
+        "/validate_dataset",
+        json={**payload, "records": second, "incremental_id": "demo", "incremental_offset": 2},
+    )
+
+    assert appended.status_code == 200
+    assert appended.json()["incremental"]["rows"] == 3
+    assert appended.json()["incremental"]["delta_rows"] == 1
+    assert appended.json()["quality_score"] == full.json()["quality_score"]
+    assert appended.json()["bias_integrity_score"] == full.json()["bias_integrity_score"]
+    assert replay.status_code == 400
+    runs = await client.get("/history/synthetic_demo", params={"metrics": "rows"})
+    assert runs.json()["columns"]["rows"] == [2, 3, 3]
+
+
+async def test_sampled_tdie_score_reports_intervals(
+    client: httpx.AsyncClient, tmp_path, monkeypatch
+):
+    from backend.utils import history
+
+    monkeypatch.setattr(history, "HISTORY_DIR", tmp_path)
+    payload = example_payload()
+    template = payload["records"][0]
+    payload["records"] = [
+        {**template, "id": idx, "value": float(idx % 40), "group": "AB"[idx % 2]}
+        for idx in range(200)
+    ]
+    sample = {"size": 50, "seed": 7, "escalate": False}
+
+    sampled = await client.post("/tdie_score", json={**payload, "sample": sample})
+    bias = await client.post("/bias_check", json={**payload, "sample": sample})
+    conflict = await client.post(
+        "/tdie_score", json={**payload, "sample": sample, "incremental_id": "demo"}
+    )
+
+    block = sampled.json()["sampling"]
+    assert block["sample_size"] == 50 and block["population"] == 200
+    low, high = block["intervals"]["tdie_score"]
+    assert low <= sampled.json()["tdie_score"] <= high
+    assert set(bias.json()["sampling"]["intervals"]) >= {
+        "demographic_parity_gap",
+        "bias_integrity_score",
+    }
+    assert conflict.status_code == 400
+    runs = await client.get("/history/synthetic_demo", params={"metrics": "rows,sampled"})
+    assert runs.json()["columns"]["rows"] == [200]
+    assert runs.json()["columns"]["sampled"] == [1]
+
+
+async def test_short_circuit_rejects_schema_failures_without_later_stages(
+    client: httpx.AsyncClient,
+):
+    payload = example_payload()
+    template = payload["records"][0]
+    payload["records"] = [{**template, "id": f"row-{idx}"} for idx in range(8)]
+
+    response = await client.post("/tdie_score", json={**payload, "short_circuit": True})
+
+    body = response.json()
+    assert response.status_code == 200
+    assert body["decision"] == "BLOCK"
+    assert body["tdie_score"] is None
+    assert body["tdie_score_bounds"] == body["short_circuit"]["score_bounds"]
+    assert body["short_circuit"]["stages_skipped"] == [
+        "bias_checks",
+        "poisoning_risk",
+        "quality_report",
+    ]
+    assert "poisoning_risk_score" not in body
+
+
+async def test_saturated_heavy_lane_returns_429_while_health_stays_up(
+    client: httpx.AsyncClient, monkeypatch
+):
+    from backend.utils.scheduler import default_scheduler
+
+    monkeypatch.setattr(default_scheduler, "heavy_seconds", 0.0)
+    monkeypatch.setattr(default_scheduler, "max_heavy", 1)
+
+    with default_scheduler.admit("tdie_score", 10**6, 5, ["quality_report"]):
+        busy = await client.post("/tdie_score", json=example_payload())
+        health = await client.get("/health")
+    after = await client.post("/tdie_score", json=example_payload())
+
+    assert busy.status_code == 429
+    assert int(busy.headers["Retry-After"]) >= 1
+    assert health.status_code == 200
+    assert after.status_code == 200
+
+
+async def test_large_bodies_are_admitted_before_they_are_decoded(
+    client: httpx.AsyncClient, monkeypatch
+):
+    from backend.utils.scheduler import default_scheduler
+
+    monkeypatch.setattr(default_scheduler, "heavy_seconds", 0.0)
+    monkeypatch.setattr(default_scheduler, "max_heavy", 1)
+
+    # The route's admission takes over the body's, so a lone request still fits the lane.
+    alone = await client.post("/tdie_score", json=example_payload())
+    with default_scheduler.admit("tdie_score", 10**6, 5, ["quality_report"]):
+        busy = await client.post(
+            "/tdie_score", content=b"{" * 10_000, headers={"Content-Type": "application/json"}
+        )
+    malformed = await client.post(
+        "/tdie_score", content=b"{" * 10_000, headers={"Content-Type": "application/json"}
+    )
+
+    assert alone.status_code == 200
+    assert busy.status_code == 429  # rejected before the malformed body was decoded
+    assert malformed.status_code == 400
+    assert default_scheduler._heavy == []
+
+
+async def test_responses_report_peak_rss(client: httpx.AsyncClient):
+    response = await client.post("/tdie_score", json=example_payload())
+    metrics_text = (await client.get("/metrics")).text
+
+    assert response.status_code == 200
+    assert int(response.headers["X-TDIE-Peak-RSS"]) > 0
+    assert 'tdie_request_peak_rss_bytes_count{route="/tdie_score"}' in metrics_text
+
+
+async def test_poison_detect_negotiates_compact_encoding(client: httpx.AsyncClient):
+    import numpy as np
+
+    from backend.utils.encoding import COMPACT_JSON_MEDIA_TYPE, decode_compact
+
+    payload = example_payload()
+    payload["records"] = [
+        {"id": idx, "value": float(idx % 7), "group": "A", "label": "flipped" if idx else "ok"}
+        for idx in range(200)
+    ]
+    np.random.seed(0)
+    plain = await client.post("/poison_detect", json=payload)
+    np.random.seed(0)
+    packed = await client.post(
+        "/poison_detect",
+        json=payload,
+        headers={"Accept": COMPACT_JSON_MEDIA_TYPE, "Accept-Encoding": "gzip"},
+    )
+
+    assert plain.headers["content-type"] == "application/json"
+    assert packed.headers["content-type"] == COMPACT_JSON_MEDIA_TYPE
+    assert packed.headers["content-encoding"] == "gzip"
+    assert "$indices" in packed.text
+    assert decode_compact(packed.content, COMPACT_JSON_MEDIA_TYPE) == plain.json()
+
+
+async def test_training_evidence_is_content_addressed_and_fetchable(
+    client: httpx.AsyncClient, tmp_path, monkeypatch
+):
+    from backend.utils import evidence
+
+    monkeypatch.setattr(evidence, "EVIDENCE_DIR", tmp_path)
+    body = {
+        "tdie_score": 75,
+        "guardrail_level": "MODERATE",
+        "dataset_hash": "cd" * 32,
+        "provenance": {"source": "synthetic", "user": "qa"},
+    }
+
+    first = (await client.post("/train_if_clean", json=body)).json()
+    second = (await client.post("/train_if_clean", json=body)).json()
+    bundle = await client.get(first["evidence_url"])
+    missing = await client.get("/evidence/" + "0" * 64)
+
+    assert first["evidence_digest"] == second["evidence_digest"]
+    assert first["evidence_path"].startswith(str(tmp_path))
+    assert bundle.status_code == 200
+    assert f"dataset_hash: {'cd' * 32}" in bundle.text
+    assert "training_decision: PASS" in bundle.text
+    assert missing.status_code == 404